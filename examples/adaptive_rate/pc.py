@@ -0,0 +1,88 @@
+"""
+Loopback demonstration of the adaptive publish rate.
+
+A publisher and a subscriber run in this process on the loopback multicast group.
+The subscriber drops a share of the received datagrams during the lossy phase; its
+heartbeats report the loss, the publisher backs off the 'telemetry' topic towards its
+minimum rate and recovers once the loss stops. The critical 'stop' topic keeps its rate.
+"""
+import random
+import time
+
+from romer_minirobot.urtps import uRTPS, EventPubNode, EventSubNode
+
+# Multicast group details
+MULTICAST_GROUP = '224.0.0.253'
+MULTICAST_TOPIC_PORT = 5017
+
+PHASES = [(0.0, 6), (0.3, 6), (0.0, 10)]  # (loss, seconds)
+
+
+class LossySocket:
+    """Drops received datagrams with probability `loss`."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.loss = 0.0
+
+    def recvfrom(self, size):
+        data = self.sock.recvfrom(size)
+        while random.random() < self.loss:
+            data = self.sock.recvfrom(size)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+
+class LossyRTPS(uRTPS):
+    def connect(self):
+        if super().connect():
+            self.sock = LossySocket(self.sock)
+        return self.sock
+
+
+class Counter(EventPubNode):
+    def __init__(self, name):
+        super().__init__(name, 'publishing')
+        self.count = 0
+
+    async def tick(self):
+        self.count += 1
+        self.set_message(self.count)
+
+
+class Sink(EventSubNode):
+    def __init__(self, name):
+        super().__init__(name, 'subscribing')
+        self.received = 0
+
+    def set_message(self, message):
+        self.received += 1
+        super().set_message(message)
+
+
+if __name__ == "__main__":
+    publisher = uRTPS(MULTICAST_GROUP, MULTICAST_TOPIC_PORT, 'ERROR', sync_period=0)
+    publisher.add_topics([Counter('telemetry'), Counter('stop')])
+    publisher.set_rate('telemetry', min_rate=2, max_rate=50)
+    publisher.set_rate('stop', max_rate=20, critical=True)
+
+    subscriber = LossyRTPS(MULTICAST_GROUP, MULTICAST_TOPIC_PORT, 'ERROR', sync_period=0)
+    telemetry, stop = Sink('telemetry'), Sink('stop')
+    subscriber.add_topics([telemetry, stop])
+
+    publisher._start_async_main_in_thread()
+    subscriber._start_async_main_in_thread()
+    time.sleep(0.5)
+
+    print(' time  loss  telemetry rate  stop rate  received/s')
+    start = time.time()
+    for loss, duration in PHASES:
+        subscriber.sock.loss = loss
+        for _ in range(duration * 2):
+            received = telemetry.received
+            time.sleep(0.5)
+            rates = publisher.rate_control.rates()
+            print(f'{time.time() - start:5.1f}  {loss:4.0%}  {rates["telemetry"]:14.1f}  '
+                  f'{rates["stop"]:9.1f}  {(telemetry.received - received) * 2:10d}')
@@ -0,0 +1,35 @@
+from romer_minirobot.sim import hal
+board = hal.install()
+
+import _thread
+import time
+from romer_minirobot.urtps.urtpspi import uRTPSPi
+from romer_minirobot.modules import pico, robot
+from romer_minirobot.robot import MiniRobot
+
+# Multicast group details
+MULTICAST_GROUP = '224.0.0.252'
+MULTICAST_TOPIC_PORT = 5007
+
+if __name__ == "__main__":
+    # The firmware of examples/two_wheel/pico.py, on emulated hardware
+    urtps = uRTPSPi('ssid', 'password', MULTICAST_GROUP, MULTICAST_TOPIC_PORT, 'ERROR')
+    urtps.add_subscribing_topics(pico.TwoWheel())
+    urtps.add_publishing_topics(pico.Button(12, 'pull_up', True, name='button1'))
+    _thread.start_new_thread(urtps.start, ())
+
+    hardware_spec = {
+        'drive': robot.TwoWheel(),
+        'button1': robot.Button('button1'),
+    }
+    r = MiniRobot(hardware_spec, MULTICAST_GROUP, MULTICAST_TOPIC_PORT, 'ERROR')
+
+    for x_linear, z_angular in [(0.5, 0), (0.5, 0.2), (0, -0.3), (0, 0)]:
+        r.drive.move(x_linear, z_angular)
+        time.sleep(0.5)
+        print(f'move({x_linear}, {z_angular}) -> duty',
+              {pin: board.duty(pin) for pin in (6, 7, 19, 20)})
+
+    board.set_input(12, 0)
+    time.sleep(0.5)
+    print(f'Button: {r.button1.get()}.')
@@ -0,0 +1,103 @@
+"""
+Benchmarks the firmware code paths, the modules.pico nodes and the send and receive
+path of uRTPSPi, on the MicroPython unix port with stubbed hardware modules.
+
+Reports the time, the heap allocated and the peak heap of each operation. Save a
+baseline and check later runs against it to catch regressions without a device:
+
+    MICROPYPATH=src micropython -X heapsize=256k examples/firmware_bench/bench.py --save base.json
+    MICROPYPATH=src micropython -X heapsize=256k examples/firmware_bench/bench.py --check base.json
+
+Also runs on a Pico, and on CPython with the emulated hardware, reporting times only.
+"""
+import sys
+from romer_minirobot import bench
+from romer_minirobot.utils import is_running_on_pico, now_us
+
+if not is_running_on_pico():
+    from romer_minirobot.sim import hal
+    hal.install()
+elif sys.platform != 'rp2':
+    bench.install()
+
+from romer_minirobot.urtps import EventPubNode, EventSubNode
+from romer_minirobot.urtps.urtpspi import uRTPSPi
+from romer_minirobot.modules.mixing import pack_duties
+from romer_minirobot.modules.pico import (TwoWheel, TwoWheelPID, PIDTelemetry, Holonomic,
+                                          Button, NeoPixel, Battery)
+
+COLORS = ','.join(['255', '0', '0', '0', '255', '0', '0', '0', '255', '12.5', '200', '7'] * 2)
+
+
+def command(node, message):
+    node.set_message(message)
+    bench.tick(node)
+
+
+def batch(telemetry, samples):
+    # Packs the last samples of the controller again, as if they had just been recorded.
+    telemetry.sent = telemetry.drive.recorded - samples
+    telemetry.get_message()
+    bench.tick(telemetry)
+
+
+def publish(participant, topic, message):
+    topic.set_message(message)
+    participant._publish(now_us())
+
+
+def receive(participant):
+    received = participant.transport.receive()
+    participant._dispatch(received[0], now_us())
+
+
+def participant(frames):
+    sock = bench.LoopbackSocket(frames)
+    participant = uRTPSPi('ssid', 'password', debug='ERROR')
+    participant._create_multicast_socket = lambda group, port: sock
+    participant.transport.open(participant)
+    return participant
+
+
+if __name__ == "__main__":
+    benchmark = bench.Benchmark()
+
+    two_wheel = TwoWheel()
+    benchmark.run('twoWheel.tick, text', command, two_wheel, '0.5,-0.25')
+    benchmark.run('twoWheel.tick, duties', command, two_wheel, pack_duties([45000, -12000], 10000))
+    holonomic = Holonomic()
+    benchmark.run('holonomic.tick, text', command, holonomic, '0.5,0.1,-0.25')
+    pid = TwoWheelPID()
+    benchmark.run('twoWheelPID.tick', bench.tick, pid)
+    benchmark.run('twoWheelPID.control', pid.control)
+    benchmark.run('PI.pi', pid.pi1.pi)
+    encoder = pid.pi1.encoder
+    benchmark.run('encoder edge', encoder.hall1_edge, encoder.hall1_pin)
+    benchmark.run('encoder.update', encoder.update, 10000)
+    telemetry = PIDTelemetry(pid, period_ms=0)
+    benchmark.run('PIDTelemetry.tick, 10 samples', batch, telemetry, 10)
+    pixels = NeoPixel(0, 8)
+    benchmark.run('neopixel.tick, 8 pixels', command, pixels, COLORS)
+    button = Button(5, 'pull_up', False)
+    benchmark.run('button.tick', bench.tick, button)
+    battery = Battery(26, 0)
+    benchmark.run('battery.tick', bench.tick, battery)
+
+    sender = participant([])
+    topic = EventPubNode('pose', 'publishing')
+    sender.add_topics(topic)
+    benchmark.run('uRTPSPi send', publish, sender, topic, '1.25,-0.5,0.785')
+    frame = b'twoWheel|a1b2c3|17|1234567890|0.5,-0.25'
+    receiver = participant([frame])
+    receiver.add_topics(EventSubNode('twoWheel', 'subscribing'))
+    benchmark.run('uRTPSPi receive', receive, receiver)
+
+    benchmark.report()
+    if '--save' in sys.argv:
+        benchmark.save(sys.argv[sys.argv.index('--save') + 1])
+    if '--check' in sys.argv:
+        regressions = benchmark.check(sys.argv[sys.argv.index('--check') + 1])
+        for regression in regressions:
+            print('regression:', regression)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,114 @@
+"""
+Measures the command handling of pico.TwoWheel before and after fixed-point mixing, and
+with the duty cycles precomputed by robot.TwoWheel on the PC.
+
+Runs on a Pico or the MicroPython unix port, where `romer_minirobot.bench` stubs the
+hardware modules and it also reports the heap allocated per command, or on a PC with
+the emulated hardware. The point of fixed point is that mixing does not allocate on
+MicroPython, where every float is a heap object; on CPython, where integers and floats
+are both objects, the float mixing is faster, so only the Pico gives numbers that
+tell them apart.
+
+A scale of 2.0 takes the wider arithmetic of `mixing.scale_duty` for limits whose
+product with 65535 would not be a small integer.
+"""
+import gc
+import sys
+from romer_minirobot.utils import is_running_on_pico, ticks_us, ticks_diff
+
+if not is_running_on_pico():
+    from romer_minirobot.sim import hal
+    hal.install()
+elif sys.platform != 'rp2':
+    from romer_minirobot import bench
+    bench.install()
+
+import micropython
+from romer_minirobot.modules.pico import TwoWheel
+from romer_minirobot.modules.pico.fixedpoint import parse_fixed, parse_float
+from romer_minirobot.modules.mixing import pack_duties
+
+COMMANDS = 2000
+MESSAGES = ['0.5,0.2', '-0.3,0.75', '1.0,0', '0.125,-0.5', '0,0', '-1,-1', '0.333,0.1']
+
+
+def legacy_tick(node, message):
+    # The command handling of TwoWheel.tick with float mixing.
+    x_linear, z_angular = message.split(",")
+    x_linear = float(x_linear)
+    z_angular = float(z_angular)
+
+    x_linear = max(-node.scale, min(node.scale, x_linear))
+    z_angular = max(-node.scale, min(node.scale, z_angular))
+    duty_cycle = int((x_linear / node.scale * 65535))
+    duty_cycle_r = int((z_angular / node.scale * 65535))
+
+    duty_cycle_1 = duty_cycle + duty_cycle_r
+    duty_cycle_2 = duty_cycle - duty_cycle_r
+    node.motor1_write(abs(duty_cycle_1), duty_cycle_1 > 0)
+    node.motor2_write(abs(duty_cycle_2), duty_cycle_2 > 0)
+
+
+def fixed_tick(node, message):
+    # The command handling of TwoWheel.tick with fixed-point mixing, as legacy_tick
+    # without the coroutine and the message slot.
+    setpoint = node.setpoint
+    if parse_fixed(message, setpoint) != 2:
+        parse_float(message, setpoint)
+    node.mix(setpoint[0], setpoint[1])
+
+
+def run_tick(node, message):
+    node.set_message(message)
+    coro = node.tick()
+    try:
+        coro.send(None)
+    except StopIteration:
+        pass
+
+
+def run_mix(node, setpoint):
+    node.mix(setpoint[0], setpoint[1])
+
+
+def measure(name, function, node, arguments):
+    gc.collect()
+    mem_alloc = getattr(gc, 'mem_alloc', None)
+    if mem_alloc:
+        gc.disable()
+        allocated = mem_alloc()
+    start = ticks_us()
+    for i in range(COMMANDS):
+        function(node, arguments[i % len(arguments)])
+    elapsed = ticks_diff(ticks_us(), start)
+    line = f'{name:<28} {elapsed / COMMANDS:8.2f} us'
+    if mem_alloc:
+        line += f' {(mem_alloc() - allocated) / COMMANDS:8.1f} bytes'
+        gc.enable()
+    print(line)
+
+
+if __name__ == "__main__":
+    node = TwoWheel()
+    setpoints = [[5000, 2000], [-3000, 7500], [10000, 0], [1250, -5000], [0, 0]]
+    print(f'{"per command":<28} {"time":>11} {"heap":>14}')
+    measure('float mixing (before)', legacy_tick, node, MESSAGES)
+    measure('fixed-point mixing (after)', fixed_tick, node, MESSAGES)
+    measure('tick, fixed point', run_tick, node, MESSAGES)
+    measure('mix, integer setpoints', run_mix, node, setpoints)
+    wide = TwoWheel(scale=2.0)
+    wide_setpoints = [[2 * x, 2 * z] for x, z in setpoints]
+    measure('mix, scale 2.0', run_mix, wide, wide_setpoints)
+    # As sent by robot.TwoWheel(precompute=True)
+    duties = [pack_duties([x + z, x - z], 10000) for x, z in
+              [(32767, 13107), (-19660, 49151), (65535, 0), (8191, -32767), (0, 0)]]
+    measure('tick, precomputed duties', run_tick, node, duties)
+    if is_running_on_pico():
+        # Raises MemoryError if mixing allocates.
+        micropython.heap_lock()
+        for setpoint in setpoints:
+            node.mix(setpoint[0], setpoint[1])
+        for setpoint in wide_setpoints:
+            wide.mix(setpoint[0], setpoint[1])
+        micropython.heap_unlock()
+        print('mix ran with the heap locked')
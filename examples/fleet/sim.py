@@ -0,0 +1,84 @@
+"""
+Load test of a pursuit controller against a fleet of simulated two-wheel robots.
+
+All robots chase a target moving on a circle, as in hot_pursuit. The fleet simulator
+and the controller are separate uRTPS participants exchanging one drive and one pose
+topic per robot, on virtual time. The time of one integration step of the whole
+fleet is measured first. Usage: python sim.py [robots]
+"""
+import asyncio
+import math
+import sys
+import time
+
+from romer_minirobot.sim import Simulation, VirtualNetwork, Fleet
+from romer_minirobot.urtps import uRTPS, EventSubNode
+from romer_minirobot.modules import robot
+
+DURATION = 30  # seconds
+CONTROL_PERIOD = 0.1  # seconds
+
+
+def benchmark_step():
+    print('robots  step us')
+    for count in (10, 100, 1000, 10000):
+        fleet = Fleet(count)
+        fleet.set_commands([[0.5, 0, 0.2]] * count)
+        start = time.perf_counter()
+        fleet.step(100)
+        print(f'{count:6d}  {(time.perf_counter() - start) / 100 * 1000000:7.1f}')
+
+
+def target(t):
+    return 3 * math.cos(t / 10), 3 * math.sin(t / 10)
+
+
+async def pursue(sim, drives, poses, errors):
+    while True:
+        await asyncio.sleep(CONTROL_PERIOD)
+        tx, ty = target(sim.time)
+        total = 0.0
+        count = 0
+        for drive, pose in zip(drives, poses):
+            if pose.message is None:
+                continue
+            x, y, theta = map(float, pose.message.split(','))
+            distance = math.hypot(tx - x, ty - y)
+            heading = math.atan2(ty - y, tx - x) - theta
+            heading = math.atan2(math.sin(heading), math.cos(heading))
+            drive.move(min(1.0, distance) * max(0.0, math.cos(heading)), max(-1.0, min(1.0, 2 * heading)))
+            total += distance
+            count += 1
+        if count:
+            errors.append(total / count)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    benchmark_step()
+
+    # Both participants run on a PC: a scheduling pass of 100 us lets each of them
+    # receive the 2000 frames per second of 100 robots, one frame per pass.
+    sim = Simulation(step_us=100, network=VirtualNetwork(latency=0.002, seed=1))
+    fleet = Fleet(count, spacing=0.5, seed=1)
+    robots = uRTPS(debug='ERROR', sync_period=0)
+    fleet.add_to(robots, pose_topic='pose{i}', sensor_rate=10, noise=0.01)
+
+    controller = uRTPS(debug='ERROR', sync_period=0)
+    drives = [robot.TwoWheel(f'twoWheel{i}') for i in range(count)]
+    poses = [EventSubNode(f'pose{i}', 'subscribing') for i in range(count)]
+    controller.add_topics(drives + poses)
+
+    sim.add(robots)
+    sim.add(controller)
+    errors = []
+    sim.add_task(pursue(sim, drives, poses, errors))
+
+    print(f'\n{count} robots, mean distance to the target')
+    start = time.perf_counter()
+    for second in range(0, DURATION, 5):
+        sim.run(5)
+        print(f'{sim.time:4.0f} s  {errors[-1]:6.2f} m')
+    elapsed = time.perf_counter() - start
+    sim.close()
+    print(f'Simulated {DURATION} s in {elapsed:.1f} s of wall time, network: {sim.network.stats()}')
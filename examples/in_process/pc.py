@@ -0,0 +1,74 @@
+"""
+A planner and a controller in one process, over the in-process transport or UDP.
+
+The planner publishes a velocity command as fast as it can; the controller counts the
+commands it receives and their latency, and the frames dropped when the planner fills
+the inbox while the controller's thread waits for the interpreter. Run with 'udp' as
+argument to compare with the loopback multicast transport. The nodes are the same in
+both cases.
+"""
+import sys
+import time
+
+from romer_minirobot.urtps import uRTPS, EventPubNode, EventSubNode, InProcessTransport
+
+# Multicast group details
+MULTICAST_GROUP = '224.0.0.253'
+MULTICAST_TOPIC_PORT = 5019
+
+DURATION = 3  # seconds
+
+
+class Planner(EventPubNode):
+    def __init__(self):
+        super().__init__('cmd_vel', 'publishing')
+        self.count = 0
+
+    async def tick(self):
+        self.count += 1
+        self.set_message(f'{self.count % 100 / 100},0.1')
+
+
+class Controller(EventSubNode):
+    def __init__(self):
+        super().__init__('cmd_vel', 'subscribing')
+        self.received = 0
+        self.latency = None
+        self.latency_sum = 0
+
+    def set_message(self, message):
+        # Counts every command dispatched, not only the last one before a tick.
+        if self.latency is not None:
+            self.received += 1
+            self.latency_sum += self.latency
+        return super().set_message(message)
+
+    async def tick(self):
+        self.event = False
+
+
+if __name__ == "__main__":
+    udp = sys.argv[1:] == ['udp']
+
+    def transport():
+        return None if udp else InProcessTransport()
+
+    planner_rtps = uRTPS(MULTICAST_GROUP, MULTICAST_TOPIC_PORT, 'ERROR', transport=transport())
+    planner_rtps.add_topics(Planner())
+    controller_rtps = uRTPS(MULTICAST_GROUP, MULTICAST_TOPIC_PORT, 'ERROR', transport=transport())
+    controller = Controller()
+    controller_rtps.add_topics(controller)
+
+    planner_rtps._start_async_main_in_thread()
+    controller_rtps._start_async_main_in_thread()
+    time.sleep(2)  # let the clocks synchronize
+
+    received, latency_sum = controller.received, controller.latency_sum
+    dropped = 0 if udp else controller_rtps.transport.dropped
+    time.sleep(DURATION)
+    received, latency_sum = controller.received - received, controller.latency_sum - latency_sum
+    print(f'{"udp" if udp else "in-process"}: {received / DURATION:.0f} commands/s, '
+          f'mean latency {latency_sum / max(received, 1):.0f} us')
+    if not udp:
+        dropped = controller_rtps.transport.dropped - dropped
+        print(f'{dropped / DURATION:.0f} frames/s dropped from the full inbox')
@@ -0,0 +1,73 @@
+"""
+Passes NumPy arrays between two participants of one process with a raw in-process
+transport.
+
+A scanner publishes a simulated range scan as a float32 array; a mapper receives the
+array object itself, without encoding or copying, and checks each one it gets is the
+array that was published. The mapper is a Node rather than an EventSubNode, which
+compares each message with the last and so cannot take arrays. Requires NumPy.
+"""
+import time
+
+import numpy as np
+
+from romer_minirobot.urtps import uRTPS, Node, EventPubNode, InProcessTransport
+
+# Multicast group details
+MULTICAST_GROUP = '224.0.0.253'
+MULTICAST_TOPIC_PORT = 5020
+
+DURATION = 2  # seconds
+KEPT = 1000  # the last scans published, to check the one received against
+
+
+class Scanner(EventPubNode):
+    def __init__(self):
+        super().__init__('scan', 'publishing')
+        self.published = [None] * KEPT
+        self.count = 0
+
+    async def tick(self):
+        self.count += 1
+        scan = np.full(360, self.count, dtype=np.float32)
+        self.published[self.count % KEPT] = scan
+        self.set_message(scan)
+
+
+class Mapper(Node):
+    def __init__(self):
+        super().__init__('scan', 'subscribing')
+        self.received = 0
+        self.arrays = 0
+
+    def set_message(self, message):
+        # Each scan is delivered as the array the scanner published.
+        self.received += 1
+        self.arrays += isinstance(message, np.ndarray) and message.dtype == np.float32
+        super().set_message(message)
+
+    async def tick(self):
+        pass
+
+
+if __name__ == "__main__":
+    scanner_rtps = uRTPS(MULTICAST_GROUP, MULTICAST_TOPIC_PORT, 'ERROR',
+                         transport=InProcessTransport(raw=True))
+    scanner = Scanner()
+    scanner_rtps.add_topics(scanner)
+    mapper_rtps = uRTPS(MULTICAST_GROUP, MULTICAST_TOPIC_PORT, 'ERROR',
+                        transport=InProcessTransport(raw=True))
+    mapper = Mapper()
+    mapper_rtps.add_topics(mapper)
+
+    scanner_rtps._start_async_main_in_thread()
+    mapper_rtps._start_async_main_in_thread()
+    time.sleep(DURATION)
+    scan = mapper.message
+    scanner_rtps.stop()
+    mapper_rtps.stop()
+
+    print(f'{scanner.count} scans published, {mapper.received} received, '
+          f'{mapper.arrays} as float32 arrays')
+    assert mapper.received and mapper.arrays == mapper.received
+    assert scan is scanner.published[int(scan[0]) % KEPT], 'the scan was copied'
@@ -0,0 +1,57 @@
+"""
+Measures how the PC side of uRTPS copes with a growing number of Picos.
+
+For every fleet size a load generator emulates the Picos with buttons, battery readings,
+telemetry and LED strips, and a MiniRobot subscribes to all of them and writes the
+strips. Usage: python load.py [processes] [sizes...]
+"""
+import sys
+import time
+
+from romer_minirobot.robot import MiniRobot
+from romer_minirobot.sim import LoadGenerator
+from romer_minirobot.sim.loadgen import DEFAULT_MIX
+
+# Multicast group details
+MULTICAST_GROUP = '224.0.0.252'
+MULTICAST_TOPIC_PORT = 5007
+
+WARM_UP = 3  # seconds
+MEASURE = 10  # seconds
+
+
+def measure(count, processes):
+    load = LoadGenerator(count, processes=processes, multicast_group=MULTICAST_GROUP,
+                         multicast_port=MULTICAST_TOPIC_PORT)
+    r = MiniRobot(load.topics(), MULTICAST_GROUP, MULTICAST_TOPIC_PORT, 'ERROR')
+    load.start()
+    period = 1 / DEFAULT_MIX['neopixel']
+    end = time.monotonic() + WARM_UP + MEASURE
+    reset = False
+    frame = 0
+    while time.monotonic() < end:
+        if not reset and time.monotonic() > end - MEASURE:
+            load.reset(r.mpi)
+            reset = True
+        frame += 1
+        load.write_leds((frame % 256, 0, 255 - frame % 256))
+        time.sleep(period)
+    upstream = load.report(r.mpi)
+    downstream = load.stop()
+    r.stop()
+    return upstream, downstream
+
+
+if __name__ == "__main__":
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    sizes = [int(n) for n in sys.argv[2:]] or [10, 50, 100, 200]
+    print('picos  heard  frames/s  loss %  mean ms  p50 ms  p99 ms  max ms  down loss %')
+    for count in sizes:
+        up, down = measure(count, processes)
+        down_total = down['received'] + down['lost']
+        down_loss = 100 * down['lost'] / down_total if down_total else 0
+        print(f"{count:5d}  {up['picos']:5d}  {up['received'] / MEASURE:8.0f}  "
+              f"{100 * up['loss_rate']:6.2f}  {up.get('latency_mean_ms', 0):7.2f}  "
+              f"{up.get('latency_p50_ms', 0):6.2f}  {up.get('latency_p99_ms', 0):6.2f}  "
+              f"{up.get('latency_max_ms', 0):6.1f}  {down_loss:11.2f}")
+        time.sleep(1)
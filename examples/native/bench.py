@@ -0,0 +1,121 @@
+"""
+Measures the hot functions of the Pico code before and after they were restructured and
+compiled with @micropython.native: the encoder interrupt handler of TwoWheelPID, the
+motor writes, NeoPixel.fillwith and the decoding and dispatching of received frames.
+
+Meant for the MicroPython unix port, where `romer_minirobot.bench` stubs the hardware
+modules, e.g. `micropython -X heapsize=256k examples/native/bench.py` with the package
+on MICROPYPATH. It also runs on a Pico, and on a PC with the emulated hardware, where the
+decorators are no-ops and only the restructuring shows.
+"""
+import gc
+import sys
+from romer_minirobot.utils import is_running_on_pico, has_pico_hal, ticks_us, ticks_diff
+
+if not is_running_on_pico():
+    from romer_minirobot.sim import hal
+    hal.install()
+elif sys.platform != 'rp2':
+    from romer_minirobot import bench
+    bench.install()
+
+from romer_minirobot.urtps import BaseRTPS, Node, EventSubNode
+from romer_minirobot.modules.pico import TwoWheel, TwoWheelPID, NeoPixel
+
+CALLS = 5000
+FRAME = b'twoWheel|a1b2c3|17|1234567890|0.5,-0.25'
+
+
+def legacy_handler(pi, hall2_pin):
+    # The encoder interrupt handler as a closure, as PI.__init__ defined it.
+    def interrupt_handler(hall1_val):
+        if hall1_val == 1:
+            if hall2_pin.value() == 0:
+                pi.position += 1
+            else:
+                pi.position -= 1
+        else:
+            if hall2_pin.value() == 1:
+                pi.position += 1
+            else:
+                pi.position -= 1
+    return interrupt_handler
+
+
+class LegacyTwoWheel(TwoWheel):
+    # The same body without the decorator, called as a bound method like the new one.
+    def motor1_write(self, duty_cycle, direction):
+        if direction:
+            self.motor1_pin1.duty_u16(duty_cycle)
+            self.motor1_pin2.duty_u16(0)
+        else:
+            self.motor1_pin1.duty_u16(0)
+            self.motor1_pin2.duty_u16(duty_cycle)
+
+
+def legacy_fillwith(node, colors):
+    for i in range(0, len(colors), 3):
+        color = (
+            int(float(colors[i + 0])),
+            int(float(colors[i + 1])),
+            int(float(colors[i + 2]))
+        )
+        node.pixels[i // 3] = color
+    node.pixels.write()
+
+
+def legacy_decode(data):
+    if b'|\xff' in data:
+        fields = data.split(b'|', 4)
+        message = fields.pop()
+        fields = [field.decode() for field in fields]
+        fields.append(message)
+        return fields
+    return data.decode().split('|', 4)
+
+
+def fillwith(node, colors):
+    # fillwith draws into the back buffer; show writes the strip, as the legacy code did.
+    node.fillwith(colors)
+    node.show()
+
+
+def measure(function, *args):
+    # Garbage left by the previous measurement is not collected during this one.
+    gc.collect()
+    start = ticks_us()
+    for _ in range(CALLS):
+        function(*args)
+    return ticks_diff(ticks_us(), start) / CALLS
+
+
+def compare(name, before, after):
+    print(f'{name:<24} {before:9.2f} us {after:9.2f} us {before / after:6.2f}x')
+
+
+if __name__ == "__main__":
+    if not has_pico_hal():
+        raise SystemExit('The Pico hardware modules are missing')
+
+    pid = TwoWheelPID()
+    pi = pid.pi1.encoder
+    handler = legacy_handler(pi, pi.hall2_pin)
+    two_wheel = TwoWheel()
+    pixels = NeoPixel(0, 8)
+    colors = ['255', '0', '0', '0', '255', '0', '0', '0', '255', '12.5', '200', '7'] * 2
+    participant = BaseRTPS('224.0.0.253', 5007, debug='ERROR')
+    topic = EventSubNode('twoWheel', 'subscribing')
+    participant.set_topics({}, {'twoWheel': topic})
+    decoded = Node.decode(FRAME)
+
+    print(f'{"per call":<24} {"before":>12} {"after":>12} {"speedup":>7}')
+    # The new handlers also stamp the time of the edge for the speed estimate.
+    compare('encoder edge', measure(handler, pi.hall1_pin), measure(pi.hall1_edge, pi.hall1_pin))
+    compare('motor write', measure(LegacyTwoWheel().motor1_write, 30000, True),
+            measure(two_wheel.motor1_write, 30000, True))
+    compare('fillwith, 8 pixels', measure(legacy_fillwith, pixels, colors),
+            measure(fillwith, pixels, colors))
+    compare('decode', measure(legacy_decode, FRAME), measure(Node.decode, FRAME))
+    print(f'{"dispatch":<24} {"":>12} {measure(participant._dispatch, decoded, 0):9.2f} us')
+    if not is_running_on_pico():
+        print('CPython ignores @micropython.native, the differences come from the restructuring.')
@@ -0,0 +1,95 @@
+"""
+Measures the frames per second a strip can be driven at, before and after NeoPixel
+frames were sent as raw bytes: the text message of comma-separated channels built by
+robot.NeoPixel and parsed pixel by pixel by pico.NeoPixel, against the binary frame
+copied into the strip buffer with one slice assignment.
+
+On a PC with the emulated hardware it measures both sides; on a Pico, or on the
+MicroPython unix port with the stubs of romer_minirobot.bench, the Pico side only. The
+emulated strip does not include the time of the bit-banged write, about 30 us per pixel
+on a real strip.
+"""
+import sys
+from romer_minirobot.utils import is_running_on_pico, ticks_us, ticks_diff
+
+if not is_running_on_pico():
+    from romer_minirobot.sim import hal
+    hal.install()
+    from romer_minirobot.modules import robot
+elif sys.platform != 'rp2':
+    from romer_minirobot import bench
+    bench.install()
+
+from romer_minirobot.modules.pico import NeoPixel
+from romer_minirobot.modules.pixels import pack_frame
+
+FRAMES = 200
+SIZES = (8, 18, 60, 144, 300)
+# The size of the receive buffer of the multicast transport.
+DATAGRAM = 1024
+
+
+def legacy_text(pixels, color, brightness):
+    # robot.NeoPixel before: a list of tuples scaled when set, rendered with str.
+    pixels[:] = [(int(color[0] * brightness), int(color[1] * brightness),
+                  int(color[2] * brightness))] * len(pixels)
+    return str([item for sublist in pixels for item in sublist])[1:-1]
+
+
+def binary_frame(strip, color):
+    strip.fill_with(color)
+    strip.write()
+
+
+def legacy_fillwith(node, message):
+    # pico.NeoPixel.tick before: a tuple per pixel, assigned one by one.
+    colors = message.split(',')
+    for i in range(0, len(colors), 3):
+        color = (
+            int(float(colors[i + 0])),
+            int(float(colors[i + 1])),
+            int(float(colors[i + 2]))
+        )
+        node.pixels[i // 3] = color
+    node.pixels.write()
+
+
+def binary_write(node, frame):
+    node.write_frame(frame)
+    node.show()
+
+
+def per_frame(function, *args):
+    start = ticks_us()
+    for _ in range(FRAMES):
+        function(*args)
+    return ticks_diff(ticks_us(), start) / FRAMES
+
+
+def fps(us):
+    return 1000000 / us if us else 0
+
+
+def size_of(message):
+    # Datagrams beyond the receive buffer are cut off.
+    return f'{len(message)}{"" if len(message) < DATAGRAM else " (cut)"}'
+
+
+if __name__ == "__main__":
+    color = (255, 64, 8)
+    print(f'{"pixels":>6} {"side":<5} {"text fps":>10} {"binary fps":>11} {"text bytes":>11} '
+          f'{"binary bytes":>13}')
+    for size in SIZES:
+        node = NeoPixel(0, size)
+        text = ','.join(['255', '64', '8'] * size)
+        frame = pack_frame(bytes([64, 255, 8] * size))
+        if not is_running_on_pico():
+            strip = robot.NeoPixel(size, brightness=0.5)
+            legacy = [(0, 0, 0)] * size
+            before = per_frame(legacy_text, legacy, color, 0.5)
+            after = per_frame(binary_frame, strip, color)
+            print(f'{size:>6} {"PC":<5} {fps(before):10.0f} {fps(after):11.0f}')
+        before = per_frame(legacy_fillwith, node, text)
+        after = per_frame(binary_write, node, frame)
+        print(f'{size:>6} {"Pico":<5} {fps(before):10.0f} {fps(after):11.0f} '
+              f'{size_of(text):>11} {size_of(frame):>13}')
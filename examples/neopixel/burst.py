@@ -0,0 +1,65 @@
+"""
+Feeds pico.NeoPixel a burst of frames, one per pass of the loop, and reports how often
+the strip is written and the longest a pass is held up, with and without the refresh
+limit.
+
+Runs on a PC with the emulated hardware. The emulated strip writes at once, so the write
+is made to wait 30 us per pixel, as the bit-banged write of a real strip does.
+"""
+from romer_minirobot.sim import hal
+hal.install()
+
+from romer_minirobot import bench
+from romer_minirobot.modules.pixels import pack_frame
+from romer_minirobot.utils import ticks_us, ticks_diff
+
+from romer_minirobot.modules.pico import NeoPixel
+
+PIXELS = 150
+FRAMES = 200
+# The time between passes of the loop: the motors and the network also need it.
+PASS_US = 1000
+
+
+def wait(us):
+    start = ticks_us()
+    while ticks_diff(ticks_us(), start) < us:
+        pass
+
+
+def bit_banged(pixels):
+    write = pixels.write
+
+    def slow_write():
+        wait(30 * len(pixels.buf) // pixels.bpp)
+        write()
+    return slow_write
+
+
+def run(max_fps):
+    node = NeoPixel(0, PIXELS, max_fps=max_fps)
+    node.pixels.write = bit_banged(node.pixels)
+    frames = [pack_frame(bytes([i % 256, 0, 255 - i % 256]) * PIXELS) for i in range(8)]
+    longest = total = 0
+    start = ticks_us()
+    for i in range(FRAMES):
+        node.set_message(frames[i % len(frames)])
+        tick = ticks_us()
+        bench.tick(node)
+        spent = ticks_diff(ticks_us(), tick)
+        longest = max(longest, spent)
+        total += spent
+        wait(PASS_US - spent)
+    # The last frame is written in a later slot.
+    while node.dropped + node.writes < FRAMES:
+        bench.tick(node)
+    elapsed = ticks_diff(ticks_us(), start) / 1000000
+    return node.writes, node.dropped, total / FRAMES, longest, elapsed
+
+
+if __name__ == "__main__":
+    print(f'{FRAMES} frames of {PIXELS} pixels, one per {PASS_US} us pass')
+    print(f'{"max fps":>8} {"writes":>7} {"dropped":>8} {"mean pass":>10} {"longest pass":>13}')
+    for max_fps in (0, 60, 30):
+        writes, dropped, mean, longest, elapsed = run(max_fps)
+        print(f'{max_fps or "none":>8} {writes:7d} {dropped:8d} {mean:7.0f} us {longest:10d} us')
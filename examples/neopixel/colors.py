@@ -0,0 +1,76 @@
+"""
+Measures the time robot.NeoPixel takes to build a frame of a moving rainbow, a gradient
+and a fade, pixel by pixel against the NumPy operations, for a fleet of robots with long
+strips.
+
+Needs NumPy.
+"""
+import colorsys
+import time
+import numpy as np
+
+from romer_minirobot.modules import robot
+from romer_minirobot.modules.robot.colors import hsv_to_rgb
+
+PIXELS = 300
+ROBOTS = 20
+FRAMES = 20
+
+
+def rainbow_loop(strip, t):
+    for i in range(strip.num_pixels):
+        r, g, b = colorsys.hsv_to_rgb((i / strip.num_pixels + t) % 1.0, 1.0, 1.0)
+        strip[i] = (r * 255, g * 255, b * 255)
+
+
+def rainbow_numpy(strip, t):
+    hue = np.linspace(0.0, 1.0, strip.num_pixels, endpoint=False) + t
+    strip.set_pixels(hsv_to_rgb(np.stack((hue, np.ones_like(hue), np.ones_like(hue)), -1)))
+
+
+def gradient_loop(strip, t):
+    last = strip.num_pixels - 1
+    for i in range(strip.num_pixels):
+        strip[i] = (255 * (last - i) / last, 64, 255 * i / last)
+
+
+def gradient_numpy(strip, t):
+    strip.fill_gradient([(255, 64, 0), (0, 64, 255)])
+
+
+def fade_loop(strip, t):
+    for i in range(strip.num_pixels):
+        r, g, b = strip[i]
+        strip[i] = (r + (255 - r) * 0.1, g * 0.9, b * 0.9)
+
+
+def fade_numpy(strip, t):
+    strip.blend((255, 0, 0), 0.1)
+
+
+def per_frame(function, strips):
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        for strip in strips:
+            function(strip, frame / FRAMES)
+            strip.write()
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+if __name__ == "__main__":
+    strips = [robot.NeoPixel(PIXELS, brightness=0.5, gamma=2.2) for _ in range(ROBOTS)]
+    print(f'{ROBOTS} robots with {PIXELS} pixels, ms per frame of the fleet')
+    print(f'{"operation":<10} {"per pixel":>10} {"numpy":>8}')
+    for name, loop, vectorised in (('rainbow', rainbow_loop, rainbow_numpy),
+                                   ('gradient', gradient_loop, gradient_numpy),
+                                   ('fade', fade_loop, fade_numpy)):
+        before = per_frame(loop, strips)
+        after = per_frame(vectorised, strips)
+        print(f'{name:<10} {before:10.2f} {after:8.2f}')
+
+    # Both ways build the same frame, up to rounding.
+    a, b = robot.NeoPixel(PIXELS), robot.NeoPixel(PIXELS)
+    rainbow_loop(a, 0.3)
+    rainbow_numpy(b, 0.3)
+    difference = np.abs(a.get_pixels().astype(int) - b.get_pixels().astype(int)).max()
+    print(f'largest difference of a channel between the two rainbows: {difference}')
@@ -0,0 +1,115 @@
+"""
+Compares the bytes sent per update by robot.NeoPixel with delta encoding against whole
+frames, for a few typical animations, and checks that the strip of pico.NeoPixel ends up
+with the right colours when messages are lost, or coalesced by a publish rate below the
+write rate.
+
+Runs on a PC with the emulated hardware.
+"""
+import random
+from romer_minirobot.sim import hal
+hal.install()
+
+from romer_minirobot import bench
+from romer_minirobot.modules import robot
+from romer_minirobot.modules.pico import NeoPixel
+
+PIXELS = 144
+UPDATES = 200
+
+
+def status(strip, i):
+    # One status pixel blinking on an otherwise steady strip.
+    strip[0] = (0, 255, 0) if i % 2 else (0, 0, 0)
+
+
+def chase(strip, i):
+    # A dot of three pixels running along the strip.
+    strip[(i - 3) % strip.num_pixels] = (0, 0, 0)
+    strip[i % strip.num_pixels] = (255, 64, 0)
+
+
+def bar(strip, i):
+    # A level meter, e.g. the battery charge.
+    level = i % strip.num_pixels
+    strip[level] = (0, 0, 255) if (i // strip.num_pixels) % 2 == 0 else (0, 0, 0)
+
+
+def rainbow(strip, i):
+    # Every pixel changes: deltas fall back to keyframes.
+    for pixel in range(strip.num_pixels):
+        strip[pixel] = ((pixel + i) * 7 % 256, (pixel * 3 + i) % 256, (i * 5) % 256)
+
+
+def sent_bytes(animation, delta):
+    strip = robot.NeoPixel(PIXELS, brightness=0.5, delta=delta, keyframe_period=3600)
+    strip.fill_with((8, 8, 8))
+    total = 0
+    for i in range(UPDATES):
+        animation(strip, i)
+        strip.write()
+        total += len(strip.get_message())
+    return total / UPDATES, strip.keyframes, strip.deltas
+
+
+def lossy(loss, seed=1):
+    # Drops messages at random. The strip is right again as soon as a delta referring
+    # to the last keyframe received, or the next keyframe, gets through.
+    random.seed(seed)
+    strip = robot.NeoPixel(PIXELS, keyframe_period=3600)
+    # Every frame is written to the strip, without a refresh limit.
+    node = NeoPixel(0, PIXELS, max_fps=0)
+    wrong = 0
+    for i in range(UPDATES):
+        chase(strip, i)
+        # A keyframe every 50 updates.
+        strip.keyframe_period = 0 if i % 50 == 0 else 3600
+        strip.write()
+        message = strip.get_message()
+        if random.random() >= loss:
+            node.set_message(message)
+            bench.tick(node)
+        expected = strip.buffer.translate(strip._table)
+        wrong += bytes(node.pixels.buf) != expected
+    return wrong, node.stale
+
+
+def coalesced(writes):
+    # Publishes one message every `writes` writes, as a rate limit would; the others are
+    # replaced before they are sent, keyframes included.
+    strip = robot.NeoPixel(PIXELS, keyframe_period=3600)
+    node = NeoPixel(0, PIXELS, max_fps=0)
+    wrong = 0
+    for i in range(UPDATES):
+        chase(strip, i)
+        strip.keyframe_period = 0 if i % 50 == 0 else 3600
+        strip.write()
+        if i % writes == writes - 1:
+            node.set_message(strip.get_message())
+            bench.tick(node)
+            expected = strip.buffer.translate(strip._table)
+            wrong += bytes(node.pixels.buf) != expected
+    return wrong, node.stale
+
+
+if __name__ == "__main__":
+    print(f'{PIXELS} pixels, {UPDATES} updates')
+    print(f'{"animation":<10} {"frame bytes":>12} {"delta bytes":>12} {"keyframes":>10} '
+          f'{"deltas":>7}')
+    for animation in (status, chase, bar, rainbow):
+        frame, _, _ = sent_bytes(animation, False)
+        delta, keyframes, deltas = sent_bytes(animation, True)
+        print(f'{animation.__name__:<10} {frame:12.1f} {delta:12.1f} {keyframes:10d} {deltas:7d}')
+
+    print()
+    print(f'{"loss":>5} {"wrong updates":>14} {"stale deltas":>13}')
+    for loss in (0.0, 0.1, 0.3):
+        wrong, stale = lossy(loss)
+        print(f'{loss:5.1f} {wrong:14d} {stale:13d}')
+
+    print()
+    print(f'{"writes per message":>18} {"wrong messages":>15} {"stale deltas":>13}')
+    for writes in (2, 3):
+        wrong, stale = coalesced(writes)
+        print(f'{writes:18d} {wrong:15d} {stale:13d}')
+        assert not wrong and not stale
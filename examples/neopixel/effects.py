@@ -0,0 +1,68 @@
+"""
+Shows the effects rendered by pico.NeoPixel, and the bytes a minute of animation costs
+when streamed as frames at 50 frames per second against one effect message.
+
+Runs on a PC with the emulated hardware. Each strip is drawn as a line of characters,
+'#' for a pixel close to the effect colour, '+' for a dimmer one and '.' for a dark one.
+"""
+from romer_minirobot.sim import hal
+hal.install()
+
+from romer_minirobot import bench
+from romer_minirobot.modules import robot
+from romer_minirobot.modules.pico import NeoPixel
+from romer_minirobot.modules.pixels import unpack_effect, render_effect
+
+PIXELS = 30
+FPS = 50
+SECONDS = 60
+
+
+def draw(node):
+    buf = node.pixels.buf
+    line = ''
+    for i in range(0, len(buf), node.pixels.bpp):
+        level = max(buf[i:i + node.pixels.bpp])
+        line += '#' if level > 170 else '+' if level > 40 else '.'
+    return line
+
+
+def show(strip, node, times_ms):
+    # Delivers the effect message, then renders it at the given times.
+    message = strip.get_message()
+    node.set_message(message)
+    bench.tick(node)
+    effect = unpack_effect(message)
+    for elapsed in times_ms:
+        render_effect(effect, node.pixels.buf, node.pixels.ORDER, node.pixels.bpp, elapsed)
+        print(f'  {elapsed:5d} ms {draw(node)}')
+    return len(message)
+
+
+if __name__ == "__main__":
+    strip = robot.NeoPixel(PIXELS)
+    node = NeoPixel(0, PIXELS)
+
+    print('gradient')
+    strip.gradient((255, 0, 0), (0, 0, 0))
+    show(strip, node, (0,))
+    print('progress 40 %')
+    strip.progress(0.4, (0, 255, 0))
+    show(strip, node, (0,))
+    print('blink, 1 s')
+    strip.blink((255, 255, 0), period=1.0)
+    show(strip, node, (0, 250, 500, 750))
+    print('breathe, 2 s')
+    strip.breathe((0, 0, 255), period=2.0)
+    show(strip, node, (0, 250, 500, 1000, 1500))
+    print('chase of 4, 1.5 s')
+    strip.chase((255, 64, 0), length=4, period=1.5)
+    size = show(strip, node, (0, 250, 500, 750))
+
+    strip.fill_with((255, 64, 0))
+    strip.delta = False
+    strip.write()
+    frames = len(strip.get_message()) * FPS * SECONDS
+    print()
+    print(f'a minute of a chase over {PIXELS} pixels: {frames} bytes as frames at {FPS} fps, '
+          f'{size} bytes as an effect')
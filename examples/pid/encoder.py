@@ -0,0 +1,83 @@
+"""
+Feeds synthetic quadrature signals to the encoder of pico.TwoWheelPID on emulated
+hardware and virtual time, and compares its speed estimate with the count per control
+period that PI.update used before.
+
+The hall sensors are driven from a known speed profile, so each estimate can be checked
+against the true speed: slow constant speeds of one or two edges per 10 ms period, a
+ramp, and a reversal. The filtered speed lags the unfiltered one by about its time
+constant, which shows on the ramp.
+"""
+import math
+from romer_minirobot.sim import hal
+from romer_minirobot.sim.runner import VirtualClock
+from romer_minirobot.sim.hal import utime
+
+clock = VirtualClock()
+hal.set_time_source(clock)
+utime.reset_ticks()
+board = hal.install(hal.Board())
+
+from machine import Pin
+from romer_minirobot.modules.pico.encoder import Encoder
+
+PERIOD_US = 10000
+STEP_US = 20
+DURATION_US = 3000000
+# The levels of the two sensors at each position modulo 4, the first sensor leading.
+STATES = ((0, 0), (1, 0), (1, 1), (0, 1))
+
+PROFILES = {
+    'slow, 120 edges/s': lambda t: 120.0,
+    'slow, 250 edges/s': lambda t: 250.0,
+    'ramp to 3000/s': lambda t: min(1.0, t / 1.5) * 3000.0,
+    'reversal, 400/s': lambda t: 400.0 * math.sin(2 * math.pi * t / 2.0),
+}
+
+
+def run(profile):
+    board.start_us = clock.time_us
+    hall1, hall2 = Pin(4, Pin.IN), Pin(5, Pin.IN)
+    board.set_input(4, 0)
+    board.set_input(5, 0)
+    encoder = Encoder(hall1, hall2)
+    position = 0.0
+    count = 0
+    last_count = 0
+    new_errors, raw_errors, old_errors, old_values, accel_errors = [], [], [], set(), []
+    for step in range(DURATION_US // STEP_US):
+        t = step * STEP_US / 1000000
+        clock.advance(STEP_US)
+        speed = profile(t)
+        position += speed * STEP_US / 1000000
+        # Drives one edge at a time, as the sensors would.
+        while count != math.floor(position):
+            count += 1 if math.floor(position) > count else -1
+            level1, level2 = STATES[count % 4]
+            board.set_input(4, level1)
+            board.set_input(5, level2)
+        if (step + 1) % (PERIOD_US // STEP_US) == 0:
+            estimate = encoder.update(PERIOD_US)
+            old = (encoder.position - last_count) * 1000000 / PERIOD_US
+            last_count = encoder.position
+            if t > 0.5:
+                new_errors.append(estimate - speed)
+                raw_errors.append(encoder.raw_speed - speed)
+                accel = (profile(t + 0.001) - profile(t - 0.001)) / 0.002
+                accel_errors.append(encoder.acceleration - accel)
+                old_errors.append(old - speed)
+                old_values.add(old)
+    rms = lambda errors: math.sqrt(sum(e * e for e in errors) / len(errors))
+    return (rms(old_errors), rms(raw_errors), rms(new_errors), len(old_values),
+            rms(accel_errors))
+
+
+if __name__ == "__main__":
+    print(f'RMS error of the speed after the first 0.5 s, edges per second, '
+          f'{PERIOD_US // 1000} ms period')
+    print(f'{"profile":<20} {"count per period":>17} {"edge timing":>12} {"filtered":>9} '
+          f'{"values before":>14} {"acceleration":>13}')
+    for name, profile in PROFILES.items():
+        old, raw, new, values, accel = run(profile)
+        print(f'{name:<20} {old:17.1f} {raw:12.1f} {new:9.1f} {values:14d} {accel:13.1f}')
+    hal.set_time_source(None)
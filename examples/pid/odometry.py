@@ -0,0 +1,109 @@
+"""
+Drives pico.TwoWheelPID along an arc with a model of both motors on emulated hardware and
+virtual time, and compares the pose it integrates and publishes with pico.Odometry to
+the true pose of the model and to the pose the PC would integrate from the raw encoder
+counts.
+
+The robot publishes its pose 20 times a second; the raw counts would be streamed at the
+control rate, 100 times a second, so the PC integrates them at the same rate. A fifth of
+the messages of both are lost. A lost pose only delays the next one, as each carries the
+whole pose; the PC integrating the counts takes the arc between the counts it received
+as one. The pose on the robot is that of its last control step, up to a period behind
+the model.
+"""
+import math
+import random
+from romer_minirobot.sim import hal, DCMotor
+from romer_minirobot.sim.motor import advance
+from romer_minirobot.sim.runner import VirtualClock
+from romer_minirobot.sim.hal import utime
+
+clock = VirtualClock()
+hal.set_time_source(clock)
+utime.reset_ticks()
+board = hal.install(hal.Board())
+
+from romer_minirobot import bench
+from romer_minirobot.modules import pico, robot
+
+PERIOD_US = 10000
+EDGE_M = 0.0001
+TRACK_M = 0.1
+# The linear and angular speeds of the drive command from each time on, in seconds.
+COMMANDS = ((0.0, 0.1, 0.0), (1.0, 0.1, 0.005), (4.0, 0.05, -0.01))
+DURATION = 6.0
+LOSS = 0.2
+# The peer id, sequence number and stamp of a frame, see BaseNode.frame.
+HEADER = ('a1b2c3', '123', '1234567890')
+
+
+def arc(pose, right, left):
+    # Moves a pose by the distances travelled by the wheels, in metres.
+    x, y, theta = pose
+    distance = (right + left) / 2
+    turn = (right - left) / TRACK_M
+    heading = theta + turn / 2
+    return x + distance * math.cos(heading), y + distance * math.sin(heading), theta + turn
+
+
+def error(pose, truth):
+    return math.hypot(pose[0] - truth[0], pose[1] - truth[1]) * 1000
+
+
+if __name__ == "__main__":
+    drive = pico.TwoWheelPID(period_us=PERIOD_US, timer_id=None, edge_m=EDGE_M,
+                             track_m=TRACK_M)
+    drive.set_gains(47568, 1024000)
+    right = DCMotor(board, clock)
+    left = DCMotor(board, clock, pins=(20, 19, 22, 21))
+    firmware = pico.Odometry(drive, period_ms=50)
+    pc = robot.Odometry()
+    network = random.Random(1)
+
+    truth = (0.0, 0.0, 0.0)
+    counts = (0, 0)
+    counted = (0.0, 0.0, 0.0)
+    pose_bytes = count_bytes = 0
+    for step in range(int(DURATION * 1000000) // PERIOD_US):
+        t = step * PERIOD_US / 1000000
+        for start, x_linear, z_angular in COMMANDS:
+            if t >= start:
+                drive.pi1.set_ref_speed(x_linear + z_angular)
+                drive.pi2.set_ref_speed(x_linear - z_angular)
+        drive.control()
+        for _ in range(10):
+            positions = right.position, left.position
+            advance((right, left), PERIOD_US // 10)
+            truth = arc(truth, (right.position - positions[0]) * EDGE_M,
+                        (left.position - positions[1]) * EDGE_M)
+
+        # The raw counts, as the PC would receive them at the control rate.
+        message = f'{drive.pi1.position},{drive.pi2.position}'
+        count_bytes += len(firmware.frame(message.encode(), *HEADER))
+        if network.random() >= LOSS:
+            position = drive.pi1.position, drive.pi2.position
+            counted = arc(counted, (position[0] - counts[0]) * EDGE_M,
+                          (position[1] - counts[1]) * EDGE_M)
+            counts = position
+
+        bench.tick(firmware)
+        message = firmware.get_message()
+        if message:
+            pose_bytes += len(firmware.frame(bytes(message), *HEADER))
+            if network.random() >= LOSS:
+                pc.stamp = clock.time_us
+                pc.set_message(bytes(message))
+
+    time_us, x, y, theta = pc.get()
+    print(f'After {DURATION:.0f} s, {LOSS:.0%} of the messages lost:')
+    print(f'{"":<24} {"x":>8} {"y":>8} {"theta":>8} {"error":>9} {"bytes/s":>8}')
+    print(f'{"model":<24} {truth[0]:8.3f} {truth[1]:8.3f} {truth[2]:8.3f}')
+    print(f'{"on the robot":<24} {drive.x:8.3f} {drive.y:8.3f} {drive.theta:8.3f} '
+          f'{error((drive.x, drive.y), truth):6.1f} mm')
+    print(f'{"published, 20 Hz":<24} {x:8.3f} {y:8.3f} {theta:8.3f} '
+          f'{error((x, y), truth):6.1f} mm {pose_bytes / DURATION:8.0f}')
+    print(f'{"raw counts, 100 Hz":<24} {counted[0]:8.3f} {counted[1]:8.3f} '
+          f'{counted[2]:8.3f} {error(counted, truth):6.1f} mm {count_bytes / DURATION:8.0f}')
+    print(f'Last pose {(clock.time_us - time_us) / 1000:.0f} ms old, '
+          f'{pc.updates} poses received, speeds {pc.linear:.3f} m/s {pc.angular:.3f} rad/s')
+    hal.set_time_source(None)
@@ -0,0 +1,83 @@
+"""
+Runs pico.TwoWheelPID on emulated hardware and virtual time while the PC streams drive
+commands and NeoPixel frames to it, and reports the control rate and its jitter: on its
+timer, run from tick when due, and on every tick as before.
+
+The loop of the firmware is held up by each write of a 150-pixel strip, about 4.5 ms,
+and a pass of the loop takes 250 us. Before, the controllers ran on every tick, so their
+rate followed the passes of the loop and the traffic; run from tick when due they keep
+their rate on average but take the delays of the loop as jitter. On a Pico the timer schedules the
+step between two bytecodes, so only the write of the strip itself, which is native
+code, delays it; the emulated timer fires on the event loop and shows the same delays.
+"""
+from romer_minirobot.sim import hal
+hal.install()
+
+import asyncio
+from romer_minirobot.sim import Simulation, VirtualNetwork
+from romer_minirobot.urtps import uRTPS
+from romer_minirobot.urtps.urtpspi import uRTPSPi
+from romer_minirobot.modules import pico, robot
+
+DURATION = 10  # seconds
+PIXELS = 150
+
+
+class EveryTick(pico.TwoWheelPID):
+    # The controllers of before: a step on every tick, whatever the time since the last.
+    def start(self):
+        self.started = True
+
+    async def tick(self):
+        await super().tick()
+        self.control()
+
+
+def run(timer_id, frames_per_second, node=pico.TwoWheelPID):
+    sim = Simulation(step_us=250, network=VirtualNetwork(latency=0.002, seed=1))
+    hal.Board().use()
+    drive = node(period_us=10000, timer_id=timer_id)
+    strip = pico.NeoPixel(0, PIXELS, max_fps=0)
+    write = strip.pixels.write
+
+    def bit_banged():
+        # The write of a real strip blocks the loop for 30 us per pixel.
+        sim.clock.advance(30 * PIXELS)
+        write()
+    strip.pixels.write = bit_banged
+
+    firmware = uRTPSPi('ssid', 'password', debug='ERROR')
+    firmware.add_topics([drive, strip])
+    pc = uRTPS(debug='ERROR')
+    command, pixels = robot.TwoWheelPID(), robot.NeoPixel(PIXELS, delta=False)
+    pc.add_topics([command, pixels])
+    sim.add(firmware)
+    sim.add(pc)
+
+    async def scenario():
+        i = 0
+        while True:
+            command.move(0.5, 0.1 * (i % 3))
+            if frames_per_second:
+                pixels.fill_with((i % 256, 0, 255 - i % 256))
+                pixels.write()
+            i += 1
+            await asyncio.sleep(1 / (frames_per_second or 20))
+
+    sim.add_task(scenario())
+    sim.run(1)
+    drive.reset_stats()
+    sim.run(DURATION)
+    sim.close()
+    return drive.steps / DURATION, drive.mean_jitter_us(), drive.max_jitter_us
+
+
+if __name__ == "__main__":
+    print(f'{"control":<8} {"frames/s":>8} {"steps/s":>8} {"mean jitter":>12} {"max jitter":>11}')
+    for name, timer_id in (('timer', -1), ('tick', None)):
+        for frames_per_second in (0, 30):
+            rate, mean, largest = run(timer_id, frames_per_second)
+            print(f'{name:<8} {frames_per_second:8d} {rate:8.1f} {mean:9.0f} us {largest:8d} us')
+    for frames_per_second in (0, 30):
+        rate, _, _ = run(-1, frames_per_second, EveryTick)
+        print(f'{"before":<8} {frames_per_second:8d} {rate:8.1f}')
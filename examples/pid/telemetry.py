@@ -0,0 +1,94 @@
+"""
+Runs pico.TwoWheelPID against a model of its first motor on emulated hardware and
+virtual time, publishes its samples with pico.PIDTelemetry, and reassembles them on the
+PC side with robot.PIDTelemetry into NumPy arrays.
+
+The reference steps up, then reverses. The batches are passed straight from the firmware
+node to the PC node, as the network would, stamped with the virtual time they are
+packed at. The report compares the traffic of the batches with that of one message per
+sample, counting the header of each frame.
+"""
+from romer_minirobot.sim import hal, DCMotor
+from romer_minirobot.sim.runner import VirtualClock
+from romer_minirobot.sim.hal import utime
+
+clock = VirtualClock()
+hal.set_time_source(clock)
+utime.reset_ticks()
+board = hal.install(hal.Board())
+
+from romer_minirobot import bench
+from romer_minirobot.modules import pico, robot
+from romer_minirobot.modules.telemetry import SAMPLE_SIZE
+from romer_minirobot.tools import step_metrics
+
+PERIOD_US = 10000
+# The reference of the first wheel from each time on, in seconds.
+STEPS = ((0.0, 0.5), (1.5, -0.3))
+DURATION = 3.0
+# The peer id, sequence number and stamp of a frame, see BaseNode.frame.
+HEADER = ('a1b2c3', '123', '1234567890')
+
+
+if __name__ == "__main__":
+    drive = pico.TwoWheelPID(period_us=PERIOD_US, timer_id=None)
+    drive.set_gains(47568, 1024000)
+    motor = DCMotor(board, clock)
+    firmware = pico.PIDTelemetry(drive, period_ms=100)
+    pc = robot.PIDTelemetry()
+
+    batched = 0
+    for step in range(int(DURATION * 1000000) // PERIOD_US):
+        t = step * PERIOD_US / 1000000
+        for start, ref in STEPS:
+            if t >= start:
+                drive.pi1.set_ref_speed(ref)
+        drive.control()
+        motor.advance(PERIOD_US)
+        bench.tick(firmware)
+        message = firmware.get_message()
+        if message:
+            batched += len(firmware.frame(bytes(message), *HEADER))
+            pc.stamp = clock.time_us
+            pc.set_message(bytes(message))
+
+    samples = pc.samples()
+    single = len(firmware.frame(bytes(1 + SAMPLE_SIZE), *HEADER)) * pc.received
+    print(f'{drive.recorded} samples recorded, {pc.received} received in {pc.batches} '
+          f'batches, {pc.lost} lost, {firmware.dropped} dropped')
+    print(f'{batched / DURATION:.0f} bytes/s in batches, {single / DURATION:.0f} bytes/s '
+          f'as one message per sample')
+
+    print(f'{"time":>8} {"ref":>7} {"speed":>7} {"error":>7} {"effort":>7}')
+    for i in range(0, len(samples['index']), 15):
+        print(f'{samples["time_us"][i] / 1000:6.0f} ms {samples["ref"][i, 0]:7.3f} '
+              f'{samples["speed"][i, 0]:7.3f} {samples["error"][i, 0]:7.3f} '
+              f'{samples["effort"][i, 0]:7.0f}')
+
+    first = samples['time_us'] < STEPS[1][0] * 1000000
+    times = (samples['time_us'][first] - samples['time_us'][0]) / 1000000
+    metrics = step_metrics(list(times), list(samples['speed'][first, 0]), STEPS[0][1])
+    print('Step response from the telemetry:',
+          ', '.join(f'{key} {value:.3f}' for key, value in metrics.items()))
+
+    # The robot reboots, its ticks and sample indices start over, and the first batch
+    # after the reboot is lost: the PC takes the next batch for a restart.
+    utime.reset_ticks()
+    received = pc.received
+    drive = pico.TwoWheelPID(period_us=PERIOD_US, timer_id=None)
+    firmware = pico.PIDTelemetry(drive, period_ms=100)
+    batches = 0
+    for step in range(100):
+        drive.control()
+        clock.advance(PERIOD_US)
+        bench.tick(firmware)
+        message = firmware.get_message()
+        if message:
+            batches += 1
+            if batches > 1:
+                pc.stamp = clock.time_us
+                pc.set_message(bytes(message))
+    print(f'After a reboot whose first batch was lost: {pc.restarts} restart, '
+          f'{pc.received - received} samples received')
+    assert pc.restarts == 1 and pc.received - received == drive.recorded - 10
+    hal.set_time_source(None)
@@ -0,0 +1,53 @@
+"""
+Tunes the gains of pico.TwoWheelPID against a model of its motors, and compares the step
+response of the default gains with that of the tuned ones.
+
+Each response runs the firmware on emulated hardware and virtual time, with a DC motor
+that follows its duty with a lag and drives the hall sensors edge by edge. Measure the
+time constant and the speed at full duty of the real motors and set them in MOTOR for
+gains that suit them.
+
+With PUSH set, the tuned gains are then sent to the robot, which sets them on both
+wheels until it restarts.
+"""
+import time
+from romer_minirobot.tools import PIDTuner, step_metrics
+
+# The speed at full duty in encoder edges per second, the time constant in seconds, and
+# the fraction of full duty that does not turn the motor.
+MOTOR = {'max_speed': 26000.0, 'tau': 0.05, 'deadband': 0.05}
+REF_SPEED = 0.5
+PUSH = False
+
+# Multicast group details
+MULTICAST_GROUP = '224.0.0.253'
+MULTICAST_TOPIC_PORT = 5007
+
+
+def report(name, tuner, prop, integ):
+    metrics = step_metrics(*tuner.response(prop, integ), REF_SPEED)
+    seconds = lambda value: 'never' if value is None else f'{value * 1000:.0f} ms'
+    print(f'{name:<8} {prop:10.0f} {integ:10.0f} {seconds(metrics["rise_time"]):>10} '
+          f'{metrics["overshoot"]:10.1%} {seconds(metrics["settling_time"]):>10} '
+          f'{metrics["steady_state_error"]:10.1%}')
+
+
+if __name__ == "__main__":
+    tuner = PIDTuner(ref_speed=REF_SPEED, **MOTOR)
+    start = time.perf_counter()
+    prop, integ = tuner.tune()
+    elapsed = time.perf_counter() - start
+    print(f'Step to {REF_SPEED}, {tuner.evaluations} responses in {elapsed:.1f} s')
+    print(f'{"gains":<8} {"prop":>10} {"integ":>10} {"rise":>10} {"overshoot":>10} '
+          f'{"settling":>10} {"error":>10}')
+    report('default', tuner, 10000, 1000)
+    report('tuned', tuner, prop, integ)
+
+    if PUSH:
+        from romer_minirobot.robot import MiniRobot
+        from romer_minirobot.modules import robot
+
+        r = MiniRobot({'drive': robot.TwoWheelPID()}, MULTICAST_GROUP, MULTICAST_TOPIC_PORT)
+        r.drive.set_gains(prop, integ)
+        time.sleep(1)
+        r.stop()
@@ -0,0 +1,96 @@
+"""
+Benchmark of the shared-memory transport against loopback multicast.
+
+One publisher process sends a timestamped message to several subscriber processes,
+first at a fixed rate to measure latency, then as fast as it can to measure
+throughput. Usage: python bench.py [subscribers]
+"""
+import multiprocessing
+import sys
+import time
+
+from romer_minirobot.urtps import uRTPS, EventPubNode, EventSubNode, SharedMemoryTransport
+
+# Multicast group details
+MULTICAST_GROUP = '224.0.0.253'
+MULTICAST_TOPIC_PORT = 5021
+
+WARMUP = 2  # seconds
+DURATION = 3  # seconds
+RATE = 1000  # messages per second in the latency phase
+
+
+class Stamped(EventPubNode):
+    def __init__(self):
+        super().__init__('bench', 'publishing')
+        self.count = 0
+
+    async def tick(self):
+        self.count += 1
+        self.set_message(f'{self.count},{time.time_ns()}')
+
+
+class Receiver(EventSubNode):
+    def __init__(self):
+        super().__init__('bench', 'subscribing')
+        self.latencies = []
+
+    def set_message(self, message):
+        self.latencies.append(time.time_ns() - int(message.split(',')[1]))
+        super().set_message(message)
+
+
+def make_rtps(transport, port):
+    return uRTPS(MULTICAST_GROUP, port, 'ERROR', sync_period=0,
+                 transport=SharedMemoryTransport() if transport == 'shm' else None)
+
+
+def publish(transport, port, rate):
+    rtps = make_rtps(transport, port)
+    rtps.add_topics(Stamped())
+    if rate:
+        rtps.set_rate('bench', max_rate=rate, critical=True)
+    rtps._start_async_main_in_thread()
+    time.sleep(WARMUP + DURATION + 1)
+
+
+def subscribe(transport, port, results):
+    rtps = make_rtps(transport, port)
+    receiver = Receiver()
+    rtps.add_topics(receiver)
+    rtps._start_async_main_in_thread()
+    time.sleep(WARMUP)
+    receiver.latencies = []
+    time.sleep(DURATION)
+    results.put(receiver.latencies[:])
+
+
+def run(transport, subscribers, rate, port):
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=subscribe, args=(transport, port, results))
+                 for _ in range(subscribers)]
+    for p in processes:
+        p.start()
+    time.sleep(0.5)
+    publisher = multiprocessing.Process(target=publish, args=(transport, port, rate))
+    publisher.start()
+    latencies = [results.get() for _ in processes]
+    for p in processes + [publisher]:
+        p.join()
+    received = sum(len(l) for l in latencies) / subscribers / DURATION
+    merged = sorted(x for l in latencies for x in l) or [0]
+    return received, merged[len(merged) // 2] / 1000, merged[len(merged) * 99 // 100] / 1000
+
+
+if __name__ == "__main__":
+    # Spawned processes exit normally, which removes their ring files.
+    multiprocessing.set_start_method('spawn')
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    print(f'{subscribers} subscribers')
+    print('transport  rate  received/s  median us  p99 us')
+    port = MULTICAST_TOPIC_PORT
+    for rate in (RATE, None):
+        for transport in ('udp', 'shm'):
+            received, median, p99 = run(transport, subscribers, rate, port)
+            port += 1
+            print(f'{transport:9}  {rate or "max":>4}  {received:10.0f}  {median:9.0f}  {p99:6.0f}')
@@ -0,0 +1,122 @@
+"""
+Checks the ring buffer of the shared-memory transport across wrap-arounds.
+
+A small ring is written with frames of random lengths up to a quarter of it, until a
+record has been written at every 8-byte offset a record can start at, including the last
+8 bytes where no record header fits. A reader following closely must get every frame
+back intact; a reader lagging by random amounts must get intact frames in order and
+count the rest as overruns. Last, the writer is caught in the middle of a record while
+a reader copies a frame, its new frame copied but not its record header or the head,
+as another process could be; the reader must never return a frame written over.
+Usage: python wraparound.py
+"""
+import os
+import random
+import tempfile
+
+from romer_minirobot.urtps.shmtransport import (RingWriter, RingReader, RECORD, DATA_OFFSET,
+                                                _align)
+
+CAPACITY = 1024
+
+
+def frame(number, length):
+    # A frame whose content tells its number and length.
+    return bytes((number + i) % 251 for i in range(length))
+
+
+def intact(frame_):
+    return frame_ == frame(frame_[0], len(frame_))
+
+
+class Interrupted(RingReader):
+    # A reader during whose read the writer copies the frame of its next record.
+    def __init__(self, path, writer, data) -> None:
+        self.writer = writer
+        self.data = data
+        super().__init__(path)
+
+    def head(self):
+        head = super().head()
+        if self.data is not None:
+            data, self.data = self.data, None
+            writer = self.writer
+            before = bytes(writer.mm)
+            writer.write(data)
+            after = bytes(writer.mm)
+            # Undoes all but the frame itself.
+            start = DATA_OFFSET + (writer.head - _align(RECORD.size + len(data))) % CAPACITY
+            start += RECORD.size
+            writer.mm[:] = before
+            writer.mm[start:start + len(data)] = after[start:start + len(data)]
+            writer.head = head
+        return head
+
+
+def check(frame_, written):
+    number, length = written[frame_[0]]
+    return frame_ == frame(number, length)
+
+
+if __name__ == "__main__":
+    path = os.path.join(tempfile.gettempdir(), f'urtps-wraparound-{os.getpid()}')
+    writer = RingWriter(path, 'writer', CAPACITY)
+    reader = RingReader(path)
+    rng = random.Random(1)
+    # After a wrap the first record starts at 0, and the smallest record is 24 bytes.
+    reachable = {0} | set(range(24, CAPACITY, 8))
+    offsets = set()
+    number = 0
+    while offsets != reachable:
+        offsets.add(writer.head % CAPACITY)
+        length = rng.randrange(1, CAPACITY // 4 - RECORD.size + 1)
+        data = frame(number, length)
+        writer.write(data)
+        assert reader.read() == data, f'frame {number} of {length} bytes'
+        assert reader.read() is None
+        number += 1
+    print(f'Close reader: {number} frames, records started at all {len(reachable)} offsets, '
+          f'{reader.overruns} overruns')
+    assert reader.overruns == 0
+
+    written = {}
+    received = 0
+    lagging = RingReader(path)
+    last = None
+    for number in range(20000):
+        length = rng.randrange(1, CAPACITY // 4 - RECORD.size + 1)
+        # The first byte of each frame identifies it among those still in the ring.
+        data = frame(number, length)
+        written[data[0]] = (number, length)
+        writer.write(data)
+        for _ in range(rng.choice((0, 0, 0, 1, 2, 5))):
+            read = lagging.read()
+            if read is None:
+                break
+            assert check(read, written), f'corrupt frame after frame {number}'
+            order = written[read[0]][0]
+            assert last is None or order > last, 'frames out of order'
+            last = order
+            received += 1
+    print(f'Lagging reader: {received} intact frames in order, '
+          f'{lagging.overruns} overruns')
+    lagging.close()
+    reader.close()
+    writer.close()
+
+    received = corrupt = overruns = 0
+    for trial in range(2000):
+        writer = RingWriter(path, 'writer', CAPACITY)
+        racing = Interrupted(path, writer, None)
+        # Lags the reader by up to a whole ring.
+        while writer.head - racing.tail < rng.randrange(CAPACITY // 4, CAPACITY):
+            writer.write(frame(rng.randrange(251), rng.randrange(1, 64)))
+        racing.data = b'\xee' * rng.randrange(1, CAPACITY // 4 - RECORD.size + 1)
+        read = racing.read()
+        received += read is not None
+        corrupt += read is not None and not intact(read)
+        overruns += racing.overruns
+        racing.close()
+        writer.close()
+    print(f'Interrupted reader: {received} frames, {corrupt} corrupt, {overruns} overruns')
+    assert not corrupt
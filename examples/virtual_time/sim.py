@@ -0,0 +1,70 @@
+"""
+Ten minutes of a robot session simulated on virtual time.
+
+The firmware of a Pico (a button, a battery monitor and a two-wheel drive on emulated
+hardware) and the PC side run in one process over an in-memory network with 5 ms
+latency and 2% loss. The clock starts one minute before `ticks_ms` and `ticks_us` wrap around.
+"""
+from romer_minirobot.sim import hal
+hal.install()
+
+import asyncio
+import time
+from romer_minirobot.sim import Simulation, VirtualNetwork
+from romer_minirobot.utils.clock import TICKS_PERIOD
+from romer_minirobot.urtps import uRTPS, EventSubNode
+from romer_minirobot.urtps.urtpspi import uRTPSPi
+from romer_minirobot.modules import pico, robot
+
+DURATION = 600  # seconds
+
+sim = Simulation(start_us=TICKS_PERIOD * 1000 - 60000000,
+                 network=VirtualNetwork(latency=0.005, jitter=0.002, loss=0.02, seed=1))
+board = hal.Board().use()
+# The battery drains from 8.4 V to 7.0 V over the session.
+board.script_adc(26, lambda t: (8.4 - 1.4 * t / (DURATION * 1000000)) / 3.3 / (147 / 47) * 65535)
+
+firmware = uRTPSPi('ssid', 'password', debug='ERROR')
+firmware.add_topics([pico.Button(12, 'pull_up', True, name='button1'),
+                     pico.Battery(26, 1000),
+                     pico.TwoWheel()])
+
+pc = uRTPS(debug='ERROR')
+button, battery, drive = robot.Button('button1'), EventSubNode('battery', 'subscribing'), robot.TwoWheel()
+pc.add_topics([button, battery, drive])
+
+sim.add(firmware)
+sim.add(pc)
+
+
+async def scenario():
+    # Every 30 s the button is held and the robot driven for one second.
+    while True:
+        await asyncio.sleep(14)
+        board.set_input(12, 0)
+        drive.move(0.5, 0.1)
+        await asyncio.sleep(1)
+        board.set_input(12, 1)
+        drive.move(0, 0)
+        await asyncio.sleep(15)
+
+
+def report():
+    peers = list(pc.clock_sync.stats().values())
+    offset = peers[0]['offset_us'] if peers else None
+    links = list(pc.link_monitor.stats().values())
+    loss = links[0]['lost'] / (links[0]['received'] + links[0]['lost']) if links else 0
+    print(f'{sim.time:6.0f}  {float(battery.message or 0):7.2f}  {str(button.get()):6}  '
+          f'{board.duty(7):6d}  {offset!s:>10}  {loss:6.1%}')
+
+
+sim.add_task(scenario())
+for minute in range(1, DURATION // 60 + 1):
+    sim.call_at(minute * 60 + 14.5, report)
+
+print('  time  battery  button    duty   offset_us    loss')
+start = time.perf_counter()
+sim.run(DURATION + 30)
+elapsed = time.perf_counter() - start
+sim.close()
+print(f'Simulated {sim.time:.0f} s in {elapsed:.1f} s of wall time, network: {sim.network.stats()}')
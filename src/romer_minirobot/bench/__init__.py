@@ -0,0 +1 @@
+from .harness import Benchmark, LoopbackSocket, install, tick
\ No newline at end of file
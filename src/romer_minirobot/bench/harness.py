@@ -0,0 +1,216 @@
+import gc
+import json
+import sys
+from errno import EAGAIN
+
+from ..utils import is_running_on_pico, ticks_us, ticks_diff
+
+
+def install():
+    """
+    Registers the stub `machine`, `neopixel` and `network` modules in `sys.modules`.
+
+    The MicroPython unix port has no GPIO, PWM, NeoPixel or Wi-Fi, so `modules.pico` and
+    `uRTPSPi` only import there with these stubs installed. Call it before importing
+    them. On CPython use `sim.hal.install` instead, which also emulates `utime`.
+    """
+    from . import machine, neopixel, network
+    sys.modules['machine'] = machine
+    sys.modules['neopixel'] = neopixel
+    sys.modules['network'] = network
+
+
+def tick(node):
+    """
+    Runs the `tick` coroutine of a node to its first suspension, without an event loop.
+
+    Args:
+        node (Node): The node.
+    """
+    coro = node.tick()
+    try:
+        coro.send(None)
+    except StopIteration:
+        pass
+
+
+class LoopbackSocket:
+    """
+    Stands in for the multicast socket of a participant.
+
+    Sent datagrams are only counted. `recvfrom` returns the given frames in turn,
+    starting over after the last one, or raises EAGAIN if there are none, so receiving
+    costs the benchmark nothing but the code under test.
+
+    Args:
+        frames (list, optional): The datagrams to receive.
+        address (tuple, optional): The address they are received from.
+
+    Attributes:
+        sent (int): The number of datagrams sent.
+        received (int): The number of datagrams received.
+    """
+
+    def __init__(self, frames=(), address=('10.0.0.2', 5007)) -> None:
+        self.frames = list(frames)
+        self.address = address
+        self.sent = 0
+        self.received = 0
+
+    def sendto(self, data, address):
+        self.sent += 1
+        return len(data)
+
+    def recvfrom(self, size):
+        if not self.frames:
+            raise OSError(EAGAIN)
+        frame = self.frames[self.received % len(self.frames)]
+        self.received += 1
+        return frame, self.address
+
+    def setsockopt(self, level, option, value):
+        pass
+
+    def setblocking(self, flag):
+        pass
+
+    def close(self):
+        pass
+
+
+class Benchmark:
+    """
+    Measures the time per call, the heap allocated per call and the peak heap of
+    operations of the firmware.
+
+    Each operation is timed over `calls` calls with the garbage collector enabled. It
+    is then called `alloc_calls` more times with the collector disabled, so the drop of
+    `gc.mem_free` is what the calls allocated; the peak heap is the heap in use before
+    plus the most a single call allocated. Heap figures are only available on
+    MicroPython; CPython reports times only, which say little about the RP2040.
+
+    Results can be saved as JSON and later runs checked against them, so regressions of
+    the firmware are caught without a device.
+
+    Args:
+        calls (int, optional): The number of timed calls per operation. Defaults to 1000.
+        alloc_calls (int, optional): The number of calls with the collector disabled.
+            Defaults to 50.
+
+    Attributes:
+        results (list): A dict per operation with 'name', 'time_us', 'alloc_bytes' and
+            'peak_heap', the last two None on CPython.
+
+    Example:
+        bench = Benchmark()
+        bench.run('twoWheel.tick', run_command, drive, '0.5,0.2')
+        bench.report()
+        bench.save('baseline.json')
+    """
+
+    def __init__(self, calls=1000, alloc_calls=50) -> None:
+        self.calls = calls
+        self.alloc_calls = alloc_calls
+        self.heap = is_running_on_pico() and hasattr(gc, 'mem_free')
+        self.results = []
+
+    def run(self, name, function, *args):
+        """
+        Measures an operation.
+
+        Args:
+            name (str): The name of the operation.
+            function (callable): Performs the operation once.
+            *args: The arguments of `function`.
+
+        Returns:
+            dict: The result of the operation, also appended to `results`.
+        """
+        # The first calls may allocate caches, e.g. interned strings.
+        for _ in range(10):
+            function(*args)
+        gc.collect()
+        start = ticks_us()
+        for _ in range(self.calls):
+            function(*args)
+        elapsed = ticks_diff(ticks_us(), start)
+        allocated = peak = None
+        if self.heap:
+            allocated, peak = self._heap(function, args)
+        result = {
+            'name': name,
+            'time_us': elapsed / self.calls,
+            'alloc_bytes': allocated,
+            'peak_heap': peak,
+        }
+        self.results.append(result)
+        return result
+
+    def _heap(self, function, args):
+        gc.collect()
+        gc.disable()
+        try:
+            free = gc.mem_free()
+            in_use = gc.mem_alloc()
+            worst = 0
+            for _ in range(self.alloc_calls):
+                before = gc.mem_alloc()
+                function(*args)
+                allocated = gc.mem_alloc() - before
+                if allocated > worst:
+                    worst = allocated
+            total = free - gc.mem_free()
+        finally:
+            gc.enable()
+        return total / self.alloc_calls, in_use + worst
+
+    def report(self):
+        """
+        Prints the results as a table.
+        """
+        print(f'{"operation":<28} {"time":>11} {"alloc":>12} {"peak heap":>12}')
+        for result in self.results:
+            line = f'{result["name"]:<28} {result["time_us"]:8.2f} us'
+            if result['alloc_bytes'] is not None:
+                line += f' {result["alloc_bytes"]:7.1f} bytes {result["peak_heap"]:6d} bytes'
+            print(line)
+
+    def save(self, path):
+        """
+        Writes the results to a JSON file.
+
+        Args:
+            path (str): The file.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.results, f)
+
+    def check(self, path, tolerance=0.25):
+        """
+        Compares the results with those saved by an earlier run.
+
+        An operation regressed if it got slower by more than `tolerance`, or allocates
+        more than before. Operations missing from either run are ignored.
+
+        Args:
+            path (str): The file written by `save`.
+            tolerance (float, optional): The accepted relative slowdown. Defaults to 0.25.
+
+        Returns:
+            list: A description of each regression, empty if there is none.
+        """
+        with open(path) as f:
+            baseline = {result['name']: result for result in json.load(f)}
+        regressions = []
+        for result in self.results:
+            before = baseline.get(result['name'])
+            if before is None:
+                continue
+            if result['time_us'] > before['time_us'] * (1 + tolerance):
+                regressions.append(f'{result["name"]}: {before["time_us"]:.2f} us -> '
+                                   f'{result["time_us"]:.2f} us')
+            if (result['alloc_bytes'] is not None and before['alloc_bytes'] is not None
+                    and result['alloc_bytes'] > before['alloc_bytes'] + 0.5):
+                regressions.append(f'{result["name"]}: {before["alloc_bytes"]:.1f} bytes -> '
+                                   f'{result["alloc_bytes"]:.1f} bytes per call')
+        return regressions
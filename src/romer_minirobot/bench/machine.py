@@ -0,0 +1,108 @@
+"""
+Stub `machine` module for benchmarks on the MicroPython unix port.
+
+`sim.hal.machine` cannot stand in here: the `sim` package refuses to import on
+MicroPython, its pins and PWM slices register with a `Board`, PWM keeps a history
+`deque` that allocates on every duty change and would show up in the allocation
+figures, and its `Timer` fires on the asyncio event loop. These stubs only hold the
+last value, allocate nothing after construction and fire nothing on their own. Keep
+the names and signatures in step with `sim.hal.machine` when adding hardware.
+"""
+
+def freq(hz=None):
+    return 125000000
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state=0):
+    pass
+
+
+class Pin:
+    """
+    A GPIO pin holding its level; `irq` keeps the handler so a benchmark can call it.
+    """
+
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None) -> None:
+        self.id = id
+        self.level = value or 0
+        self.handler = None
+
+    def value(self, x=None):
+        if x is None:
+            return self.level
+        self.level = 1 if x else 0
+
+    def irq(self, handler=None, trigger=0, hard=False):
+        self.handler = handler
+
+
+class PWM:
+    """
+    A PWM output holding its frequency and duty cycle.
+    """
+
+    def __init__(self, pin, freq=None, duty_u16=None) -> None:
+        self.pin = pin
+        self.frequency = freq or 1000
+        self.duty = duty_u16 or 0
+
+    def freq(self, value=None):
+        if value is None:
+            return self.frequency
+        self.frequency = value
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self.duty
+        self.duty = value
+
+    def deinit(self):
+        pass
+
+
+class ADC:
+    """
+    An ADC channel returning a fixed reading, half of the range by default.
+    """
+
+    def __init__(self, pin) -> None:
+        self.pin = pin
+        self.reading = 32768
+
+    def read_u16(self):
+        return self.reading
+
+
+class Timer:
+    """
+    A timer holding its callback; it only fires when `fire` is called.
+    """
+
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs) -> None:
+        self.callback = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, freq=-1, period=-1, callback=None, tick_hz=1000, hard=None):
+        self.callback = callback
+
+    def fire(self):
+        if self.callback is not None:
+            self.callback(self)
+
+    def deinit(self):
+        self.callback = None
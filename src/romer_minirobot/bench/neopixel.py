@@ -0,0 +1,41 @@
+"""
+Stub `neopixel` module for benchmarks on the MicroPython unix port.
+
+Unlike `sim.hal.neopixel`, `write` keeps no copy of the frame, so it does not add
+allocations of its own to the figures of `modules.pico.NeoPixel`, and the module
+imports without the CPython-only `sim` package.
+"""
+
+class NeoPixel:
+    """
+    A strip with the buffer layout of MicroPython's `neopixel` module, GRB(W), whose
+    `write` only counts the frames.
+    """
+
+    ORDER = (1, 0, 2, 3)
+
+    def __init__(self, pin, n, bpp=3, timing=1) -> None:
+        self.pin = pin
+        self.n = n
+        self.bpp = bpp
+        self.buf = bytearray(n * bpp)
+        self.writes = 0
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, index, value):
+        offset = index * self.bpp
+        for i in range(self.bpp):
+            self.buf[offset + self.ORDER[i]] = value[i]
+
+    def __getitem__(self, index):
+        offset = index * self.bpp
+        return tuple(self.buf[offset + self.ORDER[i]] for i in range(self.bpp))
+
+    def fill(self, value):
+        for i in range(self.n):
+            self[i] = value
+
+    def write(self):
+        self.writes += 1
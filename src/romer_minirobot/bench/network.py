@@ -0,0 +1,33 @@
+"""
+Stub `network` module for benchmarks on the MicroPython unix port.
+
+`sim.hal.network` reports the state and address of the current `Board`, which does
+not exist outside the CPython simulator; this one connects at once to the loopback.
+"""
+
+STA_IF = 0
+AP_IF = 1
+
+
+class WLAN:
+    """
+    A Wi-Fi interface that connects at once.
+    """
+
+    def __init__(self, interface=STA_IF) -> None:
+        self.enabled = False
+        self.connected = False
+
+    def active(self, is_active=None):
+        if is_active is None:
+            return self.enabled
+        self.enabled = bool(is_active)
+
+    def connect(self, ssid=None, key=None):
+        self.connected = self.enabled
+
+    def isconnected(self):
+        return self.connected
+
+    def ifconfig(self, config=None):
+        return ('127.0.0.1', '255.0.0.0', '127.0.0.1', '127.0.0.1')
@@ -0,0 +1,203 @@
+import struct
+
+from ..urtps.node import BINARY
+
+# Command values are integers in units of 1/ONE, e.g. 5000 is 0.5.
+ONE = 10000
+DUTY_MAX = 65535
+# The largest limit whose product with DUTY_MAX is a small integer on MicroPython, which
+# holds 31-bit signed integers without allocating.
+SMALL_LIMIT = 16384
+
+TWO_WHEEL_MOTORS = 2
+HOLONOMIC_MOTORS = 4
+
+
+def to_fixed(value):
+    """
+    Converts a command to fixed point, rounding to the nearest unit so that 0.123 and
+    '0.123' parsed by `parse_fixed` give the same value.
+
+    Args:
+        value (float): The command.
+
+    Returns:
+        int: The command in units of 1/`ONE`, saturated at 1000.
+    """
+    return round(max(-1000.0, min(1000.0, float(value))) * ONE)
+
+
+def to_limit(scale):
+    """
+    Converts a scale, the command of full duty, to the limit commands are mixed with.
+
+    Args:
+        scale (float): The command of full duty.
+
+    Returns:
+        int: The limit in units of 1/`ONE`.
+
+    Raises:
+        ValueError: If the limit is not from 1 to 65535, the range a drive message can
+            carry, i.e. the scale is not from 0.0001 to 6.5535.
+    """
+    limit = int(scale * ONE)
+    if not 1 <= limit <= DUTY_MAX:
+        raise ValueError(f'Scale {scale} out of range, it must be from 0.0001 to 6.5535')
+    return limit
+
+
+def scale_duty(value, limit):
+    """
+    Scales a fixed-point command to a duty cycle, truncating towards zero like `int`.
+
+    Every intermediate value stays a small integer, which is not a heap object on
+    MicroPython, for any `limit` a drive message can carry.
+
+    Args:
+        value (int): The command, clamped to [-limit, limit] or to [-`ONE`, `ONE`].
+        limit (int): The command of full duty, in units of 1/`ONE`, from 1 to 65535.
+
+    Returns:
+        int: The signed duty cycle.
+    """
+    negative = value < 0
+    if negative:
+        value = -value
+    if limit <= SMALL_LIMIT:
+        duty = value * DUTY_MAX // limit
+    else:
+        # DUTY_MAX is 255 * 257: multiplying by each in turn, and carrying the remainder
+        # of the first division, keeps the products below 2 ** 25.
+        quotient = value * 255 // limit
+        remainder = value * 255 - quotient * limit
+        duty = quotient * 257 + remainder * 257 // limit
+    return -duty if negative else duty
+
+
+def clamp_duty(duty):
+    """
+    Clamps a signed duty cycle to the range of `PWM.duty_u16`.
+
+    Args:
+        duty (int): The signed duty cycle.
+
+    Returns:
+        int: The duty cycle in [-65535, 65535].
+    """
+    if duty > DUTY_MAX:
+        return DUTY_MAX
+    if duty < -DUTY_MAX:
+        return -DUTY_MAX
+    return duty
+
+
+def mix_two_wheel(x_linear, z_angular, limit, out):
+    """
+    Mixes a two-wheel command into the signed duty cycles of its motors.
+
+    Both commands are clamped to `limit`. This is the mixing of `pico.TwoWheel` and of
+    `robot.TwoWheel` with `precompute` set; it allocates no memory.
+
+    Args:
+        x_linear (int): The linear command in units of 1/`ONE`.
+        z_angular (int): The angular command in units of 1/`ONE`.
+        limit (int): The command of full duty, the scale in units of 1/`ONE`.
+        out (list): Receives the duty cycles of motors 1 and 2, before clamping.
+    """
+    duty_cycle = scale_duty(max(-limit, min(limit, x_linear)), limit)
+    duty_cycle_r = scale_duty(max(-limit, min(limit, z_angular)), limit)
+    out[0] = duty_cycle + duty_cycle_r
+    out[1] = duty_cycle - duty_cycle_r
+
+
+def mix_holonomic(x_linear, y_linear, z_angular, limit, out):
+    """
+    Mixes a holonomic command into the signed duty cycles of its motors.
+
+    The linear commands are clamped to `limit` and the angular command to 1. This is the
+    mixing of `pico.Holonomic` and of `robot.Holonomic` with `precompute` set; it
+    allocates no memory.
+
+    Args:
+        x_linear (int): The forward command in units of 1/`ONE`.
+        y_linear (int): The sideways command in units of 1/`ONE`.
+        z_angular (int): The angular command in units of 1/`ONE`.
+        limit (int): The command of full duty, the scale in units of 1/`ONE`.
+        out (list): Receives the duty cycles of motors 1 to 4, before clamping.
+    """
+    duty_cycle_x = scale_duty(max(-limit, min(limit, x_linear)), limit)
+    duty_cycle_y = scale_duty(max(-limit, min(limit, y_linear)), limit)
+    duty_cycle_r = scale_duty(max(-ONE, min(ONE, z_angular)), limit)
+    out[0] = duty_cycle_x - duty_cycle_y + duty_cycle_r
+    out[1] = duty_cycle_x + duty_cycle_y - duty_cycle_r
+    out[2] = duty_cycle_x + duty_cycle_y + duty_cycle_r
+    out[3] = duty_cycle_x - duty_cycle_y - duty_cycle_r
+
+
+def pack_duties(duties, limit):
+    """
+    Packs signed duty cycles into a binary drive message.
+
+    The message is the `BINARY` mark, one little-endian int16 per motor and the limit
+    the duties were mixed with as uint16. Duty cycles are clamped and sent with 15 bits
+    of magnitude; `unpack_duty` restores 16 bits by bit replication, so full duty stays
+    65535.
+
+    Args:
+        duties (list): The signed duty cycle of each motor.
+        limit (int): The limit the duty cycles were mixed with, in units of 1/`ONE`.
+
+    Returns:
+        bytes: The message.
+    """
+    values = []
+    for duty in duties:
+        duty = clamp_duty(duty)
+        values.append(duty // 2 if duty >= 0 else -(-duty // 2))
+    return BINARY + struct.pack('<' + 'h' * len(values) + 'H', *values, limit)
+
+
+def unpack_duty(message, index):
+    """
+    Reads the duty cycle of a motor from a binary drive message without allocating.
+
+    Args:
+        message (bytes): The message built by `pack_duties`.
+        index (int): The index of the motor.
+
+    Returns:
+        int: The signed duty cycle.
+    """
+    offset = 1 + 2 * index
+    value = message[offset] | message[offset + 1] << 8
+    if value & 0x8000:
+        value = 0x10000 - value
+        return -((value << 1) | (value >> 14))
+    return (value << 1) | (value >> 14)
+
+
+def unpack_limit(message):
+    """
+    Reads the limit a binary drive message was mixed with.
+
+    Args:
+        message (bytes): The message built by `pack_duties`.
+
+    Returns:
+        int: The limit in units of 1/`ONE`.
+    """
+    return message[-2] | message[-1] << 8
+
+
+def duty_message_size(motors):
+    """
+    Returns the length of a binary drive message.
+
+    Args:
+        motors (int): The number of motors.
+
+    Returns:
+        int: The length in bytes.
+    """
+    return 3 + 2 * motors
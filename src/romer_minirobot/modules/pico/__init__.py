@@ -1,10 +1,11 @@
-from ...utils import is_running_on_pico
+from ...utils import has_pico_hal
 
-if not is_running_on_pico():
-    raise ImportError("This module is only available on Raspberry Pi Pico.")
+if not has_pico_hal():
+    raise ImportError("This module is only available on Raspberry Pi Pico "
+                      "or with the emulated hardware of romer_minirobot.sim.hal installed.")
 
 from .twoWheel import TwoWheel
-from .twoWheelPID import TwoWheelPID
+from .twoWheelPID import TwoWheelPID, PIDTelemetry, Odometry
 from .holonomic import Holonomic
 from .button import Button
 from .neopixel import NeoPixel
@@ -1,7 +1,7 @@
 from machine import Pin, ADC
-from utime import ticks_ms
 
 from ...urtps import Node
+from ...utils import ticks_ms, ticks_diff
 
 class Battery(Node):
     """
@@ -32,7 +32,7 @@ class Battery(Node):
         """
         self.set_message(None)
         time = ticks_ms()
-        if time - self.last_time < self.delta_time:
+        if ticks_diff(time, self.last_time) < self.delta_time:
             return
         self.last_time = time
         self.battery_percentage = self.battery_adc.read_u16() / 65535 * 3.3 * self.ratio
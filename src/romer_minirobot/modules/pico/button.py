@@ -1,7 +1,7 @@
 from machine import Pin
-from utime import ticks_ms
 
-from ...urtps import EventPubNode
+from ...urtps import EventPubNode, CONTROL
+from ...utils import ticks_ms, ticks_diff
 
 class Button(EventPubNode):
     """
@@ -21,6 +21,8 @@ class Button(EventPubNode):
         # The button is named 'my_button'.
     """
 
+    traffic_class = CONTROL
+
     def __init__(self, pin_number, mode, invert, poll_ms = 500, repeat = 5, name='button') -> None:
         super().__init__(name, 'publishing')
         self.pin = Pin(pin_number, Pin.IN)
@@ -51,7 +53,7 @@ class Button(EventPubNode):
         if not self.changed_state:
             return
         
-        if ticks_ms() - self.last_time < self.poll_ms:
+        if ticks_diff(ticks_ms(), self.last_time) < self.poll_ms:
             if self.repeats < self.repeat:
                 self.set_message(str(self.last_value == self.invert))
                 self.last_time = ticks_ms()
@@ -0,0 +1,144 @@
+from machine import Pin, disable_irq, enable_irq
+
+from ...utils import ticks_us, ticks_diff, micropython
+
+
+class Encoder:
+    """
+    A quadrature encoder on two hall sensors, estimating speed and acceleration from the
+    times of its edges.
+
+    The interrupt handlers count the edges and stamp the last one with `ticks_us`. Each
+    `update` divides the edges counted since the previous update by the time between
+    the last edge before it and the last edge now, rather than by the update period: a
+    count over the exact time it took. At high speeds this is the count over about one
+    period; at low speeds, with one edge or none per period, it is the time between
+    edges, so the estimate does not jump between a few values. While no edge arrives
+    the speed is capped by one edge over the time since the last edge, so it decays to
+    zero when the wheel stops. Speed and acceleration are then low-pass filtered.
+
+    Args:
+        hall1_pin (Pin): The pin of the first hall sensor.
+        hall2_pin (Pin): The pin of the second hall sensor.
+        filter_us (int, optional): The time constant of the filters in microseconds, 0
+            for none. Defaults to 10000.
+
+    Attributes:
+        position (int): The edges counted, up when the first sensor leads.
+        edge_us (int): The `ticks_us` of the last edge.
+        edges (int): The edges counted between the last two updates, e.g. for odometry.
+        raw_speed (float): The last unfiltered speed, in edges per second.
+        speed (float): The filtered speed, in edges per second.
+        acceleration (float): The filtered acceleration, in edges per second squared.
+
+    Example:
+        encoder = Encoder(Pin(4, Pin.IN), Pin(5, Pin.IN))
+        ...
+        encoder.update(10000)  # every 10 ms
+        print(encoder.speed, encoder.acceleration)
+    """
+
+    def __init__(self, hall1_pin, hall2_pin, filter_us=10000) -> None:
+        self.hall1_pin = hall1_pin
+        self.hall2_pin = hall2_pin
+        self.filter_us = filter_us
+        self.position = 0
+        self.edge_us = ticks_us()
+        self.edges = 0
+        self.raw_speed = 0.0
+        self.speed = 0.0
+        self.acceleration = 0.0
+        self._position = 0
+        self._edge_us = self.edge_us
+
+        # The bound methods are created once, the handlers run without allocating.
+        hall1_pin.irq(self.hall1_edge, Pin.IRQ_RISING | Pin.IRQ_FALLING)
+        hall2_pin.irq(self.hall2_edge, Pin.IRQ_RISING | Pin.IRQ_FALLING)
+
+    @micropython.native
+    def hall1_edge(self, pin):
+        """
+        Interrupt handler of the first hall sensor, counting quadrature edges.
+
+        The position goes up when the sensors differ after an edge of the first sensor,
+        i.e. when the first sensor leads.
+
+        Args:
+            pin (Pin): The pin of the first hall sensor.
+        """
+        if pin.value() != self.hall2_pin.value():
+            self.position += 1
+        else:
+            self.position -= 1
+        self.edge_us = ticks_us()
+
+    @micropython.native
+    def hall2_edge(self, pin):
+        """
+        Interrupt handler of the second hall sensor, counting quadrature edges.
+
+        Args:
+            pin (Pin): The pin of the second hall sensor.
+        """
+        if pin.value() == self.hall1_pin.value():
+            self.position += 1
+        else:
+            self.position -= 1
+        self.edge_us = ticks_us()
+
+    def update(self, elapsed_us):
+        """
+        Estimates the speed and acceleration from the edges since the last update.
+
+        Args:
+            elapsed_us (int): The time since the last update in microseconds, e.g. the
+                period of the control loop.
+
+        Returns:
+            float: The filtered speed, in edges per second.
+        """
+        if elapsed_us <= 0:
+            return self.speed
+        state = disable_irq()
+        position = self.position
+        edge_us = self.edge_us
+        enable_irq(state)
+        now = ticks_us()
+
+        edges = self.edges = position - self._position
+        if edges:
+            span = ticks_diff(edge_us, self._edge_us)
+            if span <= 0:
+                span = elapsed_us
+            speed = edges * 1000000 / span
+            self._position = position
+            self._edge_us = edge_us
+        else:
+            # No edge: the speed is below one edge over the time since the last one.
+            speed = self.raw_speed
+            since = ticks_diff(now, edge_us)
+            if since > 0 and abs(speed) * since > 1000000:
+                speed = (1000000 if speed > 0 else -1000000) / since
+        self.raw_speed = speed
+
+        if self.filter_us > 0:
+            alpha = elapsed_us / (self.filter_us + elapsed_us)
+        else:
+            alpha = 1.0
+        previous = self.speed
+        self.speed = previous + alpha * (speed - previous)
+        acceleration = (self.speed - previous) * 1000000 / elapsed_us
+        self.acceleration += alpha * (acceleration - self.acceleration)
+        return self.speed
+
+    def reset(self):
+        """
+        Forgets the speed and acceleration, e.g. when the motor is stopped.
+        """
+        state = disable_irq()
+        self._position = self.position
+        self._edge_us = self.edge_us
+        enable_irq(state)
+        self.raw_speed = 0.0
+        self.speed = 0.0
+        self.acceleration = 0.0
@@ -0,0 +1,77 @@
+from micropython import const
+
+from ..mixing import ONE, to_fixed
+
+# Integer parts beyond this many units are saturated, so values stay small integers.
+_VALUE_MAX = const(10000000)
+
+
+def parse_fixed(message, out):
+    """
+    Parses comma-separated decimal numbers into fixed-point integers without floats.
+
+    Digits after the fourth decimal are truncated. Small integers are not heap objects on
+    MicroPython and the characters of the message are interned, so parsing allocates no
+    memory.
+
+    Args:
+        message (str): The message, e.g. '0.5,-0.25'.
+        out (list): Receives the values in units of 1/`ONE`; its length is the maximum
+            number of values.
+
+    Returns:
+        int: The number of values parsed, or -1 if the message has more values than
+            `out` or is not plain decimal notation, e.g. '1e-05'.
+    """
+    size = len(out)
+    count = 0
+    value = 0
+    negative = False
+    fraction = False
+    place = 0
+    for c in message:
+        if '0' <= c <= '9':
+            if not fraction:
+                if value < _VALUE_MAX:
+                    value = value * 10 + (ord(c) - 48) * ONE
+            elif place:
+                value += (ord(c) - 48) * place
+                place //= 10
+        elif c == ',':
+            if count >= size:
+                return -1
+            out[count] = -value if negative else value
+            count += 1
+            value = 0
+            negative = False
+            fraction = False
+        elif c == '.':
+            fraction = True
+            place = ONE // 10
+        elif c == '-':
+            negative = True
+        elif c != ' ' and c != '+':
+            return -1
+    if count >= size:
+        return -1
+    out[count] = -value if negative else value
+    return count + 1
+
+
+def parse_float(message, out):
+    """
+    Parses comma-separated numbers of any notation into fixed-point integers.
+
+    This is the fallback of `parse_fixed`; it allocates a float per value.
+
+    Args:
+        message (str): The message.
+        out (list): Receives the values in units of 1/`ONE`.
+
+    Returns:
+        int: The number of values parsed.
+    """
+    values = message.split(',')
+    for i in range(min(len(values), len(out))):
+        out[i] = to_fixed(values[i])
+    return len(values)
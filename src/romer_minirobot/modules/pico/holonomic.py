@@ -1,6 +1,9 @@
 from machine import Pin, PWM
 
 from ...urtps.node import Node
+from ...utils import micropython
+from ..mixing import ONE, mix_holonomic, to_limit, clamp_duty, unpack_duty, unpack_limit, duty_message_size
+from .fixedpoint import parse_fixed, parse_float
         
 class Holonomic(Node):
     """
@@ -14,6 +17,13 @@ class Holonomic(Node):
         freq (int): The frequency of the PWM signal.
         scale (float): The scale factor for the motor speed.
 
+    Commands are parsed and mixed in fixed point, see `mix`, so handling a command does not
+    allocate memory on the Pico. Binary messages carry duty cycles mixed by the PC, see
+    `robot.Holonomic` with `precompute`, which are written as they are.
+
+    Raises:
+        ValueError: If the scale is not from 0.0001 to 6.5535, see `to_limit`.
+
     Example:
         # Create a Holonomic object with default pin configuration and scale factor
         holonomic = Holonomic()
@@ -51,7 +61,11 @@ class Holonomic(Node):
         self.motor4_pin1.freq(freq)
         self.motor4_pin2.freq(freq)
         self.scale = scale
+        self.limit = to_limit(scale)
+        self.duties = [0, 0, 0, 0]
+        self.setpoint = [0, 0, 0]
 
+    @micropython.native
     def motor_write(self, duty_cycle, direction, motor1, motor2):
         """
         Write the duty cycle and direction to the specified motor.
@@ -70,29 +84,80 @@ class Holonomic(Node):
             motor2.duty_u16(duty_cycle)
 
     async def tick(self):
-        if not self.get_message():
+        message = self.get_message()
+        if not message:
+            return
+
+        if isinstance(message, bytes):
+            self.write_message(message)
+            self.set_message(None)
             return
-        x_linear, y_linear, z_angular = self.get_message().split(",")
-        x_linear = float(x_linear)
-        y_linear = float(y_linear)
-        z_angular = float(z_angular)
 
-        x_linear = max(-self.scale, min(self.scale, x_linear))
-        y_linear = max(-self.scale, min(self.scale, y_linear))
-        z_angular = max(-1, min(1, z_angular))
+        setpoint = self.setpoint
+        if parse_fixed(message, setpoint) != 3:
+            parse_float(message, setpoint)
+        self.mix(setpoint[0], setpoint[1], setpoint[2])
+
+        self.set_message(None)
+
+    def mix(self, x_linear, y_linear, z_angular):
+        """
+        Mixes a command given in fixed point and writes the duty cycles of the motors.
 
-        duty_cycle_x = int((x_linear / self.scale * 65535))
-        duty_cycle_y = int((y_linear / self.scale * 65535))
-        duty_cycle_r = int((z_angular / self.scale * 65535))
+        Only small integers are involved, which are not heap objects on MicroPython. The
+        angular command is clamped to 1 rather than to the scale.
 
-        duty_cycle_1 = duty_cycle_x - duty_cycle_y + duty_cycle_r
-        duty_cycle_2 = duty_cycle_x + duty_cycle_y - duty_cycle_r
-        duty_cycle_3 = duty_cycle_x + duty_cycle_y + duty_cycle_r
-        duty_cycle_4 = duty_cycle_x - duty_cycle_y - duty_cycle_r
+        Args:
+            x_linear (int): The forward command in units of 1/10000, e.g. 5000 for 0.5.
+            y_linear (int): The sideways command in units of 1/10000.
+            z_angular (int): The angular command in units of 1/10000.
+        """
+        duties = self.duties
+        mix_holonomic(x_linear, y_linear, z_angular, self.limit, duties)
+        self.write_duties(duties[0], duties[1], duties[2], duties[3])
 
+    def write_message(self, message):
+        """
+        Writes the duty cycles of a binary drive message and adopts the scale it was mixed
+        with, so text commands are mixed as on the PC.
+
+        Args:
+            message (bytes): The message, see `mixing.pack_duties`. Messages of another
+                length are ignored.
+        """
+        if len(message) != duty_message_size(4):
+            return
+        self.set_limit(unpack_limit(message))
+        self.write_duties(unpack_duty(message, 0), unpack_duty(message, 1),
+                          unpack_duty(message, 2), unpack_duty(message, 3))
+
+    def set_limit(self, limit):
+        """
+        Sets the scale in fixed point.
+
+        Args:
+            limit (int): The scale in units of 1/10000.
+        """
+        if limit and limit != self.limit:
+            self.limit = limit
+            self.scale = limit / ONE
+
+    @micropython.native
+    def write_duties(self, duty_cycle_1, duty_cycle_2, duty_cycle_3, duty_cycle_4):
+        """
+        Writes signed duty cycles to the motors, clamped to the range of the PWM.
+
+        Args:
+            duty_cycle_1 (int): The duty cycle of motor 1, negative for backward.
+            duty_cycle_2 (int): The duty cycle of motor 2, negative for backward.
+            duty_cycle_3 (int): The duty cycle of motor 3, negative for backward.
+            duty_cycle_4 (int): The duty cycle of motor 4, negative for backward.
+        """
+        duty_cycle_1 = clamp_duty(duty_cycle_1)
+        duty_cycle_2 = clamp_duty(duty_cycle_2)
+        duty_cycle_3 = clamp_duty(duty_cycle_3)
+        duty_cycle_4 = clamp_duty(duty_cycle_4)
         self.motor_write(abs(duty_cycle_1), duty_cycle_1 > 0, self.motor1_pin1, self.motor1_pin2)
         self.motor_write(abs(duty_cycle_2), duty_cycle_2 > 0, self.motor2_pin1, self.motor2_pin2)
         self.motor_write(abs(duty_cycle_3), duty_cycle_3 > 0, self.motor3_pin1, self.motor3_pin2)
         self.motor_write(abs(duty_cycle_4), duty_cycle_4 > 0, self.motor4_pin1, self.motor4_pin2)
-
-        self.set_message(None)
@@ -2,6 +2,9 @@ import neopixel
 from machine import Pin
 
 from ...urtps import Node
+from ...utils import micropython, ticks_ms, ticks_us, ticks_add, ticks_diff
+from ..pixels import (FRAME, KEYFRAME, DELTA, EFFECT, HEADER_SIZE, SEQUENCE_SIZE, message_kind,
+                      message_sequence, apply_delta, unpack_effect, render_effect, is_animated)
 
 
 class NeoPixel(Node):
@@ -11,32 +14,203 @@ class NeoPixel(Node):
     Args:
         pin_number (int): The pin number to which the NeoPixel strip is connected.
         num_pixels (int): The number of pixels in the NeoPixel strip.
+        effect_ms (int, optional): The time between two frames of an animated effect.
+            Defaults to 20, 50 frames per second.
+        max_fps (int, optional): The most times per second the strip is written, or 0
+            for no limit. Defaults to 60.
+
+    Messages are drawn into `back`, a second buffer, and the strip is written from it at
+    most `max_fps` times per second: a newer frame overwrites one not written yet, and
+    only the latest is written at each refresh. Writing a strip is bit-banged and blocks
+    for about 30 us per pixel, so a burst of frames no longer holds up the loop, and the
+    motors, for a write per frame. The first frame after a pause is written at once.
+
+    Binary frames sent by `robot.NeoPixel` are copied into the back buffer with one
+    slice assignment. Text messages of comma-separated channel values are still
+    understood, see `fillwith`.
+
+    Deltas are written into the back buffer in place, if they refer to the last keyframe
+    received; otherwise the keyframe was lost and they are counted in `stale` and
+    ignored until the next keyframe.
+
+    Effects, see `pixels.pack_effect`, are rendered on the Pico on every tick at most
+    every `effect_ms`, until another message arrives, so an animation costs the network
+    one message of a few bytes.
+
+    Attributes:
+        keyframe (int): The sequence number of the last keyframe, -1 if there is none.
+        stale (int): The number of deltas ignored.
+        effect (tuple): The effect being rendered, see `pixels.unpack_effect`, or None.
+        back (bytearray): The buffer messages are drawn into, in the layout of
+            `pixels.buf`.
+        writes (int): The number of times the strip was written.
+        dropped (int): The number of frames overwritten before they were written.
     """
     
-    def __init__(self, pin_number, num_pixels, name = 'neopixel'):
+    def __init__(self, pin_number, num_pixels, name = 'neopixel', effect_ms=20, max_fps=60):
         super().__init__(name, 'subscribing')
         self.pixels = neopixel.NeoPixel(Pin(pin_number), num_pixels)
+        self.back = bytearray(len(self.pixels.buf))
+        self.refresh_us = 1000000 // max_fps if max_fps else 0
+        self.writes = 0
+        self.dropped = 0
+        self._pending = False
+        # The last refresh slot, one period ago so that the first frame is written at once.
+        self._refresh = ticks_add(ticks_us(), -self.refresh_us)
+        self.keyframe = -1
+        self.stale = 0
+        self.effect = None
+        self.effect_ms = effect_ms
+        self._effect_start = 0
+        self._effect_frame = 0
         
+    @micropython.native
     def fillwith(self, colors):
         """
         Fills the NeoPixel strip with the specified colors.
+
+        The channels are written straight into the back buffer in the byte order of the
+        strip, without building a tuple per pixel.
         
         Args:
             colors (list): A list of RGB color values in the format [R, G, B, R, G, B, ...].
                 Each color value should be a float between 0 and 255.
         """
-        for i in range(0,len(colors),3):
-            color = (
-                int(float(colors[i+0])),
-                int(float(colors[i+1])),
-                int(float(colors[i+2]))
-            )
-            self.pixels[i // 3] = color
+        pixels = self.pixels
+        buf = self.back
+        order = pixels.ORDER
+        red = order[0]
+        green = order[1]
+        blue = order[2]
+        bpp = pixels.bpp
+        offset = 0
+        for i in range(0, len(colors), 3):
+            buf[offset + red] = int(float(colors[i]))
+            buf[offset + green] = int(float(colors[i + 1]))
+            buf[offset + blue] = int(float(colors[i + 2]))
+            offset += bpp
+        self._drawn()
+
+    def write_frame(self, message, offset=HEADER_SIZE):
+        """
+        Copies a binary frame into the back buffer.
+
+        Args:
+            message (bytes): The message, see `pixels.pack_frame`. A frame shorter than
+                the strip leaves the remaining pixels unchanged, the excess of a longer
+                one is ignored.
+            offset (int, optional): Where the pixel bytes start in the message. Defaults
+                to the header size of a frame.
+        """
+        buf = self.back
+        size = min(len(buf), len(message) - offset)
+        buf[:size] = memoryview(message)[offset:offset + size]
+        self._drawn()
+
+    def write_delta(self, message):
+        """
+        Writes the runs of a delta into the back buffer, if the delta refers to the last
+        keyframe received.
+
+        Args:
+            message (bytes): The message, see `pixels.pack_delta`.
+
+        Returns:
+            bool: Whether the delta was applied.
+        """
+        if self.keyframe < 0 or message_sequence(message) != self.keyframe:
+            self.stale += 1
+            return False
+        apply_delta(message, self.back, self.pixels.bpp)
+        self._drawn()
+        return True
+
+    def start_effect(self, message):
+        """
+        Starts rendering an effect.
+
+        Args:
+            message (bytes): The message, see `pixels.pack_effect`.
+        """
+        self.effect = unpack_effect(message)
+        self.keyframe = -1
+        self._effect_start = self._effect_frame = ticks_ms()
+        self.render_effect(0)
+
+    def render_effect(self, elapsed_ms):
+        """
+        Renders the current effect into the back buffer.
+
+        Args:
+            elapsed_ms (int): The time since the effect started.
+        """
+        pixels = self.pixels
+        render_effect(self.effect, self.back, pixels.ORDER, pixels.bpp, elapsed_ms)
+        self._drawn()
+        if not is_animated(self.effect[0]):
+            self.effect = None
+
+    def _drawn(self):
+        if self._pending:
+            self.dropped += 1
+        self._pending = True
+
+    def show(self):
+        """
+        Copies the back buffer into the buffer of the strip and writes it.
+        """
+        self.pixels.buf[:] = self.back
         self.pixels.write()
+        self.writes += 1
+        self._pending = False
+
+    def refresh(self):
+        """
+        Writes the strip if a frame is pending and its refresh slot has come.
+
+        Returns:
+            bool: Whether the strip was written.
+        """
+        now = ticks_us()
+        if ticks_diff(now, self._refresh) < self.refresh_us:
+            return False
+        if not self._pending:
+            return False
+        # Slots follow each other at a fixed rate while frames keep coming, and start
+        # over from the first frame after a pause.
+        if ticks_diff(now, self._refresh) >= 2 * self.refresh_us:
+            self._refresh = now
+        else:
+            self._refresh = ticks_add(self._refresh, self.refresh_us)
+        self.show()
+        return True
 
     async def tick(self):
-        if not self.get_message():
+        message = self.get_message()
+        if not message:
+            if self.effect is not None:
+                now = ticks_ms()
+                if ticks_diff(now, self._effect_frame) >= self.effect_ms:
+                    self._effect_frame = now
+                    self.render_effect(ticks_diff(now, self._effect_start))
+            if self._pending:
+                self.refresh()
             return
-        
-        self.fillwith(self.get_message().split(','))
+
+        self.effect = None
+        if isinstance(message, bytes):
+            kind = message_kind(message)
+            if kind == EFFECT:
+                self.start_effect(message)
+            elif kind == DELTA:
+                self.write_delta(message)
+            elif kind == KEYFRAME:
+                self.write_frame(message, SEQUENCE_SIZE)
+                self.keyframe = message_sequence(message)
+            elif kind == FRAME:
+                self.write_frame(message)
+                self.keyframe = -1
+        else:
+            self.fillwith(message.split(','))
         self.set_message(None)
+        self.refresh()
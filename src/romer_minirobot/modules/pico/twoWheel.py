@@ -1,6 +1,9 @@
 from machine import Pin, PWM
 
 from ...urtps.node import Node
+from ...utils import micropython
+from ..mixing import ONE, mix_two_wheel, to_limit, clamp_duty, unpack_duty, unpack_limit, duty_message_size
+from .fixedpoint import parse_fixed, parse_float
         
 class TwoWheel(Node):
     """
@@ -12,6 +15,13 @@ class TwoWheel(Node):
         freq (int): The frequency of the PWM signal in Hz.
         scale (float): The scale factor for the motor speed. The range of valid values is (-scale, scale).
 
+    Commands are parsed and mixed in fixed point, see `mix`, so handling a command does not
+    allocate memory on the Pico. Binary messages carry duty cycles mixed by the PC, see
+    `robot.TwoWheel` with `precompute`, which are written as they are.
+
+    Raises:
+        ValueError: If the scale is not from 0.0001 to 6.5535, see `to_limit`.
+
     Example:
         To create a TwoWheel object with motor 1 connected to GPIO pins 6 and 7, motor 2 connected to GPIO pins 19 and 20,
         a frequency of 1000 Hz, and a scale factor of 1.0, you can do the following:
@@ -32,7 +42,11 @@ class TwoWheel(Node):
         self.motor2_pin1.freq(freq)
         self.motor2_pin2.freq(freq)
         self.scale = scale
+        self.limit = to_limit(scale)
+        self.duties = [0, 0]
+        self.setpoint = [0, 0]
 
+    @micropython.native
     def motor1_write(self, duty_cycle, direction):
         """
         Set the duty cycle and direction of motor 1.
@@ -53,6 +67,7 @@ class TwoWheel(Node):
             self.motor1_pin1.duty_u16(0)
             self.motor1_pin2.duty_u16(duty_cycle)
 
+    @micropython.native
     def motor2_write(self, duty_cycle, direction):
         """
         Set the duty cycle and direction of motor 2.
@@ -82,23 +97,74 @@ class TwoWheel(Node):
 
             >>> await two_wheel.tick()
         """
-        if not self.get_message():
+        message = self.get_message()
+        if not message:
             return
 
-        x_linear, z_angular = self.get_message().split(",")
-        x_linear = float(x_linear)
-        z_angular = float(z_angular)
-
-        x_linear = max(-self.scale, min(self.scale, x_linear))
-        z_angular = max(-self.scale, min(self.scale, z_angular))
-        duty_cycle = int((x_linear / self.scale * 65535))
-        duty_cycle_r = int((z_angular / self.scale * 65535))
+        if isinstance(message, bytes):
+            self.write_message(message)
+            self.set_message(None)
+            return
 
-        duty_cycle_1 = duty_cycle + duty_cycle_r
-        duty_cycle_2 = duty_cycle - duty_cycle_r
-        direction_1 = duty_cycle_1 > 0
-        direction_2 = duty_cycle_2 > 0
-        self.motor1_write(abs(duty_cycle_1), direction_1)
-        self.motor2_write(abs(duty_cycle_2), direction_2)
+        setpoint = self.setpoint
+        if parse_fixed(message, setpoint) != 2:
+            parse_float(message, setpoint)
+        self.mix(setpoint[0], setpoint[1])
 
         self.set_message(None)
+
+    def mix(self, x_linear, z_angular):
+        """
+        Mixes a command given in fixed point and writes the duty cycles of the motors.
+
+        Only small integers are involved, which are not heap objects on MicroPython.
+
+        Args:
+            x_linear (int): The linear command in units of 1/10000, e.g. 5000 for 0.5.
+            z_angular (int): The angular command in units of 1/10000.
+
+        Example:
+            >>> two_wheel.mix(5000, -2000)  # as the message '0.5,-0.2'
+        """
+        duties = self.duties
+        mix_two_wheel(x_linear, z_angular, self.limit, duties)
+        self.write_duties(duties[0], duties[1])
+
+    def write_message(self, message):
+        """
+        Writes the duty cycles of a binary drive message and adopts the scale it was mixed
+        with, so text commands are mixed as on the PC.
+
+        Args:
+            message (bytes): The message, see `mixing.pack_duties`. Messages of another
+                length are ignored.
+        """
+        if len(message) != duty_message_size(2):
+            return
+        self.set_limit(unpack_limit(message))
+        self.write_duties(unpack_duty(message, 0), unpack_duty(message, 1))
+
+    def set_limit(self, limit):
+        """
+        Sets the scale in fixed point.
+
+        Args:
+            limit (int): The scale in units of 1/10000.
+        """
+        if limit and limit != self.limit:
+            self.limit = limit
+            self.scale = limit / ONE
+
+    @micropython.native
+    def write_duties(self, duty_cycle_1, duty_cycle_2):
+        """
+        Writes signed duty cycles to the motors, clamped to the range of the PWM.
+
+        Args:
+            duty_cycle_1 (int): The duty cycle of motor 1, negative for backward.
+            duty_cycle_2 (int): The duty cycle of motor 2, negative for backward.
+        """
+        duty_cycle_1 = clamp_duty(duty_cycle_1)
+        duty_cycle_2 = clamp_duty(duty_cycle_2)
+        self.motor1_write(abs(duty_cycle_1), duty_cycle_1 > 0)
+        self.motor2_write(abs(duty_cycle_2), duty_cycle_2 > 0)
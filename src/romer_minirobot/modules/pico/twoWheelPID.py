@@ -1,14 +1,45 @@
-from machine import Pin, PWM
-from utime import ticks_ms
+import math
+from machine import Pin, PWM, Timer
 
-from ...urtps.node import Node
+from ...urtps.node import Node, EventPubNode
+from ...utils import ticks_ms, ticks_us, ticks_add, ticks_diff, micropython
+from ..telemetry import (SAMPLE_SIZE, BATCH_MAX, POSE_SIZE, pack_sample, pack_header,
+                         batch_size, pack_pose, stamp_pose)
+from .encoder import Encoder
         
 class TwoWheelPID(Node):
     """
     A class representing a two-wheel PID controller for motor control.
 
+    The controllers run at a fixed period on a hardware timer, started by the first
+    tick: the timer interrupt schedules `control`, which MicroPython runs between two
+    bytecodes of whatever the loop is doing, so the control rate does not depend on
+    how often the node is ticked or how much traffic there is. `tick` only takes the
+    commands. The time between steps is measured, and its deviation from the period
+    reported as jitter.
+
+    A command is either the linear and angular speeds, "x,z", or new gains for both
+    controllers, "gains,prop,integ", e.g. as found by `tools.PIDTuner`.
+
+    Each step records the references, speeds and efforts into a ring buffer allocated
+    once, which `PIDTelemetry` publishes in batches.
+
+    Each step also integrates the odometry of the differential drive from the edges of
+    the encoders, on the arc between the headings before and after the step, and packs
+    the pose into a buffer that `Odometry` publishes. Motor 1 is the right wheel, as a
+    positive angular speed turns the robot to the left.
+
     Args:
-        dt (float): The time interval between control updates in seconds. Default is 0.3 seconds.
+        period_us (int, optional): The period of the control loop in microseconds.
+            Defaults to 10000, 100 Hz.
+        timer_id (int, optional): The id of the `machine.Timer`, -1 for a virtual timer,
+            or None to run `control` from `tick` when due instead. Defaults to -1.
+        samples (int, optional): The samples the ring buffer holds, 0 to record none.
+            Defaults to 64.
+        edge_m (float, optional): The distance a wheel travels per encoder edge, in
+            metres. Defaults to 0.0001.
+        track_m (float, optional): The distance between the wheels, in metres.
+            Defaults to 0.1.
 
     Attributes:
         motor1_pin2 (PWM): The PWM object representing the control pin for motor 1.
@@ -21,12 +52,33 @@ class TwoWheelPID(Node):
         motor2_hall_2 (Pin): The Pin object representing the hall sensor input for motor 2.
         pi1 (PI): The PI controller object for motor 1.
         pi2 (PI): The PI controller object for motor 2.
-        last_time (int): The timestamp of the last control update.
-        dt (float): The time interval between control updates in seconds.
+        period_us (int): The period of the control loop in microseconds.
+        timer (Timer): The timer running the control loop, None until the first tick.
+        started (bool): Whether the control loop was started.
+        steps (int): The number of control steps run.
+        jitter_us (int): The time between the last two steps minus the period.
+        max_jitter_us (int): The largest absolute jitter since `reset_stats`.
+        missed (int): The number of steps skipped because the schedule queue was full.
+        samples (bytearray): The ring buffer of samples, see `telemetry.pack_sample`.
+        capacity (int): The samples the ring buffer holds.
+        recorded (int): The samples recorded since the start; the last one is at index
+            `(recorded - 1) % capacity` of the ring buffer.
+        x (float): The position along the x axis in metres, from the start.
+        y (float): The position along the y axis in metres.
+        theta (float): The heading in radians, in [-pi, pi].
+        linear (float): The linear speed in metres per second.
+        angular (float): The angular speed in radians per second.
+        pose (bytearray): The last pose, see `telemetry.pack_pose`.
 
+    Example:
+        drive = TwoWheelPID(period_us=5000)
+        urtps.add_subscribing_topics(drive)
+        ...
+        print(drive.steps, drive.mean_jitter_us(), drive.max_jitter_us)
     """
 
-    def __init__(self, name = 'twoWheelPID', dt=0.3):
+    def __init__(self, name = 'twoWheelPID', period_us=10000, timer_id=-1, samples=64,
+                 edge_m=0.0001, track_m=0.1):
         super().__init__(name, 'subscribing')
         # Define motor control pins
         self.motor1_pin2 = PWM(Pin(6, Pin.OUT))
@@ -47,9 +99,32 @@ class TwoWheelPID(Node):
         self.pi1 = PI(self.motor1_hall_1, self.motor1_hall_2)
         self.pi2 = PI(self.motor2_hall_1, self.motor2_hall_2)
 
-        self.last_time = 0
-        self.dt = dt
+        self.period_us = period_us
+        self.timer_id = timer_id
+        self.timer = None
+        self.started = False
+        self.steps = 0
+        self.jitter_us = 0
+        self.max_jitter_us = 0
+        self.missed = 0
+        self._jitter_sum = 0
+        self._last_step = 0
+        self._next_step = 0
+        self.samples = bytearray(samples * SAMPLE_SIZE)
+        self.capacity = samples
+        self.recorded = 0
+        self.edge_m = edge_m
+        self.track_m = track_m
+        self.x = 0.0
+        self.y = 0.0
+        self.theta = 0.0
+        self.linear = 0.0
+        self.angular = 0.0
+        self.pose = bytearray(POSE_SIZE)
+        # Bound once: the timer interrupt must not allocate.
+        self._control = self.control
 
+    @micropython.native
     def motor1_write(self, duty_cycle, direction):
         """
         Set the duty cycle and direction of motor 1.
@@ -66,6 +141,7 @@ class TwoWheelPID(Node):
             self.motor1_pin1.duty_u16(0)
             self.motor1_pin2.duty_u16(duty_cycle)
 
+    @micropython.native
     def motor2_write(self, duty_cycle, direction):
         """
         Set the duty cycle and direction of motor 2.
@@ -82,38 +158,305 @@ class TwoWheelPID(Node):
             self.motor2_pin1.duty_u16(0)
             self.motor2_pin2.duty_u16(duty_cycle)
 
+    def start(self):
+        """
+        Starts the control loop on its timer.
+        """
+        self.started = True
+        self._next_step = ticks_us()
+        if self.timer_id is not None:
+            self.timer = Timer(self.timer_id, mode=Timer.PERIODIC,
+                               freq=1000000 / self.period_us, callback=self._interrupt)
+
+    def stop(self):
+        """
+        Stops the control loop and the motors.
+        """
+        if self.timer is not None:
+            self.timer.deinit()
+            self.timer = None
+        self.motor1_write(0, True)
+        self.motor2_write(0, True)
+
+    def _interrupt(self, timer):
+        try:
+            micropython.schedule(self._control, None)
+        except RuntimeError:
+            # The schedule queue is full: the previous step has not run yet.
+            self.missed += 1
+
+    def control(self, arg=None):
+        """
+        Runs one step of the control loop: measures the speeds and writes the efforts.
+
+        Args:
+            arg: Unused, passed by `micropython.schedule`.
+        """
+        now = ticks_us()
+        if self.steps:
+            interval = ticks_diff(now, self._last_step)
+            jitter = interval - self.period_us
+            self.jitter_us = jitter
+            if jitter < 0:
+                jitter = -jitter
+            if jitter > self.max_jitter_us:
+                self.max_jitter_us = jitter
+            self._jitter_sum += jitter
+        else:
+            interval = self.period_us
+        self._last_step = now
+        self.steps += 1
+        self.pi1.update(interval)
+        self.pi2.update(interval)
+        motor1_speed = self.pi1.pi()
+        motor2_speed = self.pi2.pi()
+        self.motor1_write(int(abs(motor1_speed)), motor1_speed > 0)
+        self.motor2_write(int(abs(motor2_speed)), motor2_speed > 0)
+        if self.capacity:
+            pack_sample(self.samples, self.recorded % self.capacity * SAMPLE_SIZE, now,
+                        self.pi1.ref_speed, self.pi1.speed, motor1_speed,
+                        self.pi2.ref_speed, self.pi2.speed, motor2_speed)
+            self.recorded += 1
+        self._integrate(now)
+
+    def _integrate(self, now):
+        # Odometry from the edges of the last update, motor 1 being the right wheel.
+        right = self.pi1.encoder
+        left = self.pi2.encoder
+        edge_m = self.edge_m
+        distance = (right.edges + left.edges) * edge_m / 2
+        turn = (right.edges - left.edges) * edge_m / self.track_m
+        if distance:
+            heading = self.theta + turn / 2
+            self.x += distance * math.cos(heading)
+            self.y += distance * math.sin(heading)
+        theta = self.theta + turn
+        if theta > math.pi:
+            theta -= 2 * math.pi
+        elif theta < -math.pi:
+            theta += 2 * math.pi
+        self.theta = theta
+        self.linear = (right.speed + left.speed) * edge_m / 2
+        self.angular = (right.speed - left.speed) * edge_m / self.track_m
+        pack_pose(self.pose, now, self.x, self.y, theta, self.linear, self.angular)
+
+    def reset_pose(self, x=0.0, y=0.0, theta=0.0):
+        """
+        Sets the pose the odometry integrates from.
+
+        Args:
+            x (float, optional): The position along the x axis in metres. Defaults to 0.
+            y (float, optional): The position along the y axis in metres. Defaults to 0.
+            theta (float, optional): The heading in radians. Defaults to 0.
+        """
+        self.x = x
+        self.y = y
+        self.theta = theta
+
+    def set_gains(self, prop, integ):
+        """
+        Sets the gains of both controllers.
+
+        Args:
+            prop (float): The proportional gain.
+            integ (float): The integral gain.
+        """
+        for pi in (self.pi1, self.pi2):
+            pi.prop = prop
+            pi.integ = integ
+
+    def mean_jitter_us(self):
+        """
+        Returns the mean absolute jitter since `reset_stats`.
+
+        Returns:
+            float: The mean absolute deviation of the time between steps from the period.
+        """
+        if self.steps < 2:
+            return 0
+        return self._jitter_sum / (self.steps - 1)
+
+    def reset_stats(self):
+        """
+        Resets the step count and the jitter statistics.
+        """
+        self.steps = 0
+        self.jitter_us = 0
+        self.max_jitter_us = 0
+        self.missed = 0
+        self._jitter_sum = 0
+
     async def tick(self):
         """
-        Perform a control update.
+        Takes a command, and runs the control loop when due if it has no timer.
 
-        This method is called periodically to update the motor control based on the received message.
+        Starts the control loop at the first tick.
 
         """
-        cur_time = ticks_ms()
-        if self.get_message():
+        if not self.started:
+            self.start()
+        message = self.get_message()
+        if message:
+            if message.startswith("gains"):
+                _, prop, integ = message.split(",")
+                self.set_gains(float(prop), float(integ))
+            else:
+                x_linear, z_angular = message.split(",")
+                x_linear = float(x_linear)
+                z_angular = float(z_angular)
 
-            x_linear, z_angular = self.get_message().split(",")
-            x_linear = float(x_linear)
-            z_angular = float(z_angular)
+                self.pi1.set_ref_speed(x_linear + z_angular)
+                self.pi2.set_ref_speed(x_linear - z_angular)
+            self.set_message(None)
 
-            self.pi1.set_ref_speed(x_linear + z_angular)
-            self.pi2.set_ref_speed(x_linear - z_angular)
+        if self.timer_id is None and ticks_diff(ticks_us(), self._next_step) >= 0:
+            self._next_step = ticks_add(self._next_step, self.period_us)
+            self.control()
+
+
+class PIDTelemetry(EventPubNode):
+    """
+    Publishes the samples recorded by a `TwoWheelPID` in batches.
+
+    Every `period_ms` the samples recorded since the last batch are copied out of the
+    ring buffer of the controller into one binary message, see `telemetry.pack_header`,
+    so the samples of 100 steps per second go out as a few messages. A batch is only
+    packed once the previous one was sent. At most half the ring buffer is taken at a
+    time, so the control loop, which may run while the batch is copied, never writes
+    the samples being copied; older samples are dropped and counted.
+
+    Args:
+        drive (TwoWheelPID): The controller whose samples are published.
+        period_ms (int, optional): The time between batches in milliseconds.
+            Defaults to 100.
+        name (str, optional): The name of the node. Defaults to 'twoWheelPIDTelemetry'.
+
+    Attributes:
+        drive (TwoWheelPID): The controller whose samples are published.
+        period_ms (int): The time between batches in milliseconds.
+        sent (int): The index of the next sample to publish.
+        batches (int): The batches packed.
+        dropped (int): The samples overwritten before they were published.
+
+    Example:
+        drive = TwoWheelPID()
+        telemetry = PIDTelemetry(drive, period_ms=200)
+        urtps.add_topics([drive, telemetry])
+    """
+
+    def __init__(self, drive, period_ms=100, name='twoWheelPIDTelemetry') -> None:
+        super().__init__(name, 'publishing')
+        self.drive = drive
+        self.period_ms = period_ms
+        self.sent = 0
+        self.batches = 0
+        self.dropped = 0
+        self._samples = memoryview(drive.samples)
+        self._last_time = ticks_ms()
+
+    async def tick(self):
+        """
+        Packs the samples recorded since the last batch when a batch is due.
+
+        Returns:
+            bool: Whether a batch is waiting to be sent.
+        """
+        if self.event:
+            return True
+        time = ticks_ms()
+        if ticks_diff(time, self._last_time) < self.period_ms:
+            return False
+        self._last_time = time
+        drive = self.drive
+        end = drive.recorded
+        count = end - self.sent
+        if not count:
+            return False
+        limit = min(drive.capacity // 2, BATCH_MAX)
+        if count > limit:
+            self.dropped += count - limit
+            count = limit
+        first = end - count
+        message = bytearray(batch_size(count))
+        pack_header(message, first, ticks_us(), count)
+        # The samples may wrap around the end of the ring buffer.
+        start = first % drive.capacity
+        head = min(count, drive.capacity - start)
+        offset = batch_size(0)
+        message[offset:offset + head * SAMPLE_SIZE] = \
+            self._samples[start * SAMPLE_SIZE:(start + head) * SAMPLE_SIZE]
+        if head < count:
+            offset += head * SAMPLE_SIZE
+            message[offset:] = self._samples[:(count - head) * SAMPLE_SIZE]
+        self.sent = end
+        self.batches += 1
+        self.set_message(message)
+        return True
+
+
+class Odometry(EventPubNode):
+    """
+    Publishes the pose and speeds integrated by a `TwoWheelPID` at a fixed rate.
+
+    The controller packs its pose at every step; this node copies the packed pose, so
+    it never mixes two steps, and adds the ticks of the copy, from which the receiver
+    times the pose. A message is only packed once the previous one was sent, and only
+    when the controller has stepped since.
+
+    Args:
+        drive (TwoWheelPID): The controller whose pose is published.
+        period_ms (int, optional): The time between messages in milliseconds.
+            Defaults to 50.
+        name (str, optional): The name of the node. Defaults to 'odometry'.
+
+    Attributes:
+        drive (TwoWheelPID): The controller whose pose is published.
+        period_ms (int): The time between messages in milliseconds.
+
+    Example:
+        drive = TwoWheelPID(edge_m=0.00012, track_m=0.095)
+        odometry = Odometry(drive, period_ms=100)
+        urtps.add_topics([drive, odometry])
+    """
+
+    def __init__(self, drive, period_ms=50, name='odometry') -> None:
+        super().__init__(name, 'publishing')
+        self.drive = drive
+        self.period_ms = period_ms
+        self._steps = -1
+        self._last_time = ticks_ms()
+
+    async def tick(self):
+        """
+        Packs the last pose when a message is due.
+
+        Returns:
+            bool: Whether a message is waiting to be sent.
+        """
+        if self.event:
+            return True
+        time = ticks_ms()
+        if ticks_diff(time, self._last_time) < self.period_ms:
+            return False
+        self._last_time = time
+        steps = self.drive.steps
+        if steps == self._steps or not steps:
+            return False
+        self._steps = steps
+        message = bytearray(self.drive.pose)
+        stamp_pose(message, ticks_us())
+        self.set_message(message)
+        return True
 
-            print(self.pi1.ref_speed, self.pi2.ref_speed)
 
-        if cur_time - self.last_time > self.dt:
-            self.pi1.update()
-            self.pi2.update()
-            motor1_speed = self.pi1.pi()
-            motor2_speed = self.pi2.pi()
-            self.motor1_write(int(abs(motor1_speed)), motor1_speed > 0)
-            self.motor2_write(int(abs(motor2_speed)), motor2_speed > 0)
-        self.set_message(None)
-        
-    
 class PI:
     """
     Proportional-Integral (PI) controller class for controlling the speed of a two-wheel robot.
+
+    The speed is estimated by an `Encoder` on the hall sensors, from the times of their
+    edges. The integral of the error is taken over the time between updates, and only
+    while the output is not saturated or the error drives it back, so it does not wind
+    up while the motor is at full duty. The output is limited to the full duty.
     
     Args:
         hall1_pin (Pin): The pin connected to the first hall sensor.
@@ -122,63 +465,67 @@ class PI:
         integ (int, optional): The integral gain of the controller. Defaults to 1000.
     
     Attributes:
-        position_old (int): The previous position of the robot.
-        position (int): The current position of the robot.
-        time_old (int): The previous time at which the position was updated.
-        speed (float): The current speed of the robot.
+        encoder (Encoder): The encoder on the hall sensors.
+        speed (float): The current speed of the robot, in counts / 26 per millisecond.
+        acceleration (float): The current acceleration, in counts / 26 per millisecond
+            per second.
         ref_speed (float): The reference speed set for the robot.
         prop (int): The proportional gain of the controller.
         integ (int): The integral gain of the controller.
-        integ_sum (float): The sum of the integral errors.
+        integ_sum (float): The integral of the error over time, in seconds.
+        dt_s (float): The time of the last update in seconds.
         error (float): The current error between the reference speed and the actual speed.
         prev_error (float): The previous error between the reference speed and the actual speed.
     """
+
+    # The encoder edges per unit of speed, a speed of 1 being 26 edges per millisecond.
+    COUNTS = 26
+    # The largest output, the full duty of `TwoWheelPID.motor1_write`.
+    LIMIT = 65535
     
     def __init__(self, hall1_pin, hall2_pin, prop=10000, integ=1000) -> None:
-        self.position_old = 0
-        self.position = 0
-        self.time_old = 0
+        self.encoder = Encoder(hall1_pin, hall2_pin)
+        self.time_old = ticks_us()
         self.speed = 0
+        self.acceleration = 0
         self.ref_speed = 0
         self.prop = prop
         self.integ = integ
         self.integ_sum = 0
+        self.dt_s = 0
         self.error = 0
         self.prev_error = 0
-        
-        def interrupt_handler(hall1_val):
-            """
-            Interrupt handler function for updating the position of the robot based on the hall sensor readings.
-            
-            Args:
-                hall1_val (int): The value of the first hall sensor.
-            """
-            if hall1_val == 1:
-                if hall2_pin.value() == 0:
-                    self.position += 1
-                else:
-                    self.position -= 1
-            else:
-                if hall2_pin.value() == 1:
-                    self.position += 1
-                else:
-                    self.position -= 1
-                    
-        hall1_pin.irq(interrupt_handler, Pin.IRQ_RISING | Pin.IRQ_FALLING)
-        hall2_pin.irq(interrupt_handler, Pin.IRQ_RISING | Pin.IRQ_FALLING)
-        
-        
-    def update(self):
+
+    @property
+    def position(self):
+        """
+        int: The edges counted by the encoder.
+        """
+        return self.encoder.position
+
+    def update(self, elapsed_us=None):
         """
-        Update the speed of the robot based on the current position and time.
+        Update the speed of the robot from the encoder.
+
+        Args:
+            elapsed_us (int, optional): The time since the last update in microseconds,
+                e.g. the period of the control loop. Defaults to the time measured since
+                the last update.
         
         Returns:
-            float: The current speed of the robot.
+            float: The current speed of the robot, unchanged if no time has passed.
         """
-        time = ticks_ms()
-        self.speed = (self.position - self.position_old) / 26 / (time - self.time_old)
-        self.position_old = self.position
+        time = ticks_us()
+        if elapsed_us is None:
+            elapsed_us = ticks_diff(time, self.time_old)
         self.time_old = time
+        if elapsed_us <= 0:
+            return self.speed
+        self.dt_s = elapsed_us / 1000000
+        encoder = self.encoder
+        encoder.update(elapsed_us)
+        self.speed = encoder.speed / self.COUNTS / 1000
+        self.acceleration = encoder.acceleration / self.COUNTS / 1000
         
         return self.speed
     
@@ -190,7 +537,6 @@ class PI:
             ref_speed (float): The reference speed to be set.
         """
         self.ref_speed = ref_speed
-        self.integ_sum = 0
     
     def pi(self):
         """
@@ -200,9 +546,16 @@ class PI:
             float: The control signal calculated by the PI controller.
         """
         self.prev_error = self.error
-        self.error = self.ref_speed - self.speed
-        
-        if self.error * self.prev_error < 0:
-            self.integ_sum = 0
-        
-        return self.prop * self.error + self.integ * self.integ_sum
\ No newline at end of file
+        error = self.error = self.ref_speed - self.speed
+
+        integ_sum = self.integ_sum + error * self.dt_s
+        output = self.prop * error + self.integ * integ_sum
+        limit = self.LIMIT
+        # Saturated, integrates only if the error drives the output back.
+        if -limit <= output <= limit or (output > 0) != (error > 0):
+            self.integ_sum = integ_sum
+        if output > limit:
+            return limit
+        if output < -limit:
+            return -limit
+        return output
\ No newline at end of file
@@ -0,0 +1,286 @@
+from ..urtps.node import BINARY
+from ..utils import micropython
+
+# The kind of a binary NeoPixel message, the byte after the `BINARY` mark.
+FRAME = 0x01
+KEYFRAME = 0x02
+DELTA = 0x03
+EFFECT = 0x04
+
+HEADER_SIZE = 2
+# Keyframes and deltas carry the sequence number of the keyframe after the kind.
+SEQUENCE_SIZE = 3
+SEQUENCE_MOD = 256
+
+# A delta is a list of runs: the first pixel as uint16, then the number of pixels. A
+# copy run is followed by the bytes of its pixels, a fill run, flagged in the count, by
+# the bytes of one pixel repeated over the run.
+RUN_HEADER = 3
+FILL = 0x80
+RUN_MAX = 0x7F
+
+# The effects rendered by `render_effect`.
+EFFECT_FILL = 0
+EFFECT_GRADIENT = 1
+EFFECT_BLINK = 2
+EFFECT_BREATHE = 3
+EFFECT_CHASE = 4
+EFFECT_PROGRESS = 5
+# The size of an effect message: the header, the effect, two RGB colours, the period in
+# ms as uint16 and a parameter, e.g. the length of a chase or the level of a progress bar.
+EFFECT_SIZE = 12
+
+
+def pack_frame(data):
+    """
+    Builds a frame message: the bytes of the whole strip, in the byte order of the strip.
+
+    Args:
+        data (bytes): The pixel bytes, e.g. GRB for each pixel.
+
+    Returns:
+        bytes: The message.
+    """
+    return BINARY + bytes((FRAME,)) + data
+
+
+def pack_keyframe(sequence, data):
+    """
+    Builds a keyframe message, a frame that later deltas refer to by its sequence number.
+
+    Args:
+        sequence (int): The sequence number of the keyframe, modulo `SEQUENCE_MOD`.
+        data (bytes): The pixel bytes of the whole strip.
+
+    Returns:
+        bytes: The message.
+    """
+    return BINARY + bytes((KEYFRAME, sequence % SEQUENCE_MOD)) + data
+
+
+def pack_delta(sequence, data, runs, bpp=3):
+    """
+    Builds a delta message holding the given runs of pixels of a frame.
+
+    Runs of one colour are sent as fill runs. Runs longer than `RUN_MAX` pixels are
+    split.
+
+    Args:
+        sequence (int): The sequence number of the keyframe the delta applies to.
+        data (bytes): The pixel bytes of the whole strip.
+        runs (list): (first pixel, number of pixels) of each run.
+        bpp (int, optional): The bytes per pixel. Defaults to 3.
+
+    Returns:
+        bytes: The message.
+    """
+    message = bytearray(BINARY)
+    message.append(DELTA)
+    message.append(sequence % SEQUENCE_MOD)
+    for first, count in runs:
+        while count:
+            size = min(count, RUN_MAX)
+            start = first * bpp
+            end = start + size * bpp
+            pixel = data[start:start + bpp]
+            message.append(first & 0xFF)
+            message.append(first >> 8)
+            if size > 1 and data[start:end] == pixel * size:
+                message.append(FILL | size)
+                message += pixel
+            else:
+                message.append(size)
+                message += data[start:end]
+            first += size
+            count -= size
+    return bytes(message)
+
+
+def message_kind(message):
+    """
+    Returns the kind of a binary NeoPixel message.
+
+    Args:
+        message (bytes): The message.
+
+    Returns:
+        int: The kind, e.g. `FRAME`, or -1 if the message is too short.
+    """
+    if len(message) < HEADER_SIZE:
+        return -1
+    return message[1]
+
+
+def message_sequence(message):
+    """
+    Returns the keyframe sequence number of a keyframe or delta message.
+
+    Args:
+        message (bytes): The message.
+
+    Returns:
+        int: The sequence number, or -1 if the message is too short.
+    """
+    if len(message) < SEQUENCE_SIZE:
+        return -1
+    return message[2]
+
+
+def apply_delta(message, buf, bpp=3):
+    """
+    Writes the runs of a delta message into a pixel buffer in place.
+
+    Runs reaching beyond the buffer are cut off.
+
+    Args:
+        message (bytes): The delta message.
+        buf (bytearray): The pixel buffer, e.g. `neopixel.NeoPixel.buf`.
+        bpp (int, optional): The bytes per pixel. Defaults to 3.
+
+    Returns:
+        int: The number of pixels written.
+    """
+    view = memoryview(message)
+    size = len(buf)
+    end = len(message)
+    i = SEQUENCE_SIZE
+    written = 0
+    while i + RUN_HEADER <= end:
+        start = (message[i] | message[i + 1] << 8) * bpp
+        count = message[i + 2]
+        i += RUN_HEADER
+        if count & FILL:
+            if i + bpp > end:
+                break
+            count &= RUN_MAX
+            for offset in range(start, min(start + count * bpp, size), bpp):
+                for j in range(bpp):
+                    buf[offset + j] = message[i + j]
+            i += bpp
+        else:
+            length = max(0, min(count * bpp, size - start, end - i))
+            buf[start:start + length] = view[i:i + length]
+            i += count * bpp
+        written += count
+    return written
+
+
+def pack_effect(effect, color, color2=(0, 0, 0), period_ms=1000, param=0):
+    """
+    Builds an effect message, rendered by the subscriber on its own until the next
+    message.
+
+    Args:
+        effect (int): The effect, e.g. `EFFECT_CHASE`.
+        color (tuple): The RGB colour of the effect.
+        color2 (tuple, optional): The second RGB colour: the end of a gradient, the
+            background of the other effects. Defaults to black.
+        period_ms (int, optional): The period of animated effects in ms, up to 65535.
+            Defaults to 1000.
+        param (int, optional): The number of lit pixels of a chase, or the level of a
+            progress bar from 0 to 255. Defaults to 0.
+
+    Returns:
+        bytes: The message.
+    """
+    period_ms = max(1, min(0xFFFF, int(period_ms)))
+    return BINARY + bytes((EFFECT, effect,
+                           color[0], color[1], color[2], color2[0], color2[1], color2[2],
+                           period_ms & 0xFF, period_ms >> 8, param))
+
+
+def unpack_effect(message):
+    """
+    Reads an effect message.
+
+    Args:
+        message (bytes): The message, see `pack_effect`.
+
+    Returns:
+        tuple: (effect, color, color2, period_ms, param), or None if the message is too
+            short.
+    """
+    if len(message) < EFFECT_SIZE:
+        return None
+    return (message[2], (message[3], message[4], message[5]),
+            (message[6], message[7], message[8]), message[9] | message[10] << 8,
+            message[11])
+
+
+def is_animated(effect):
+    """
+    Returns whether an effect changes over time.
+
+    Args:
+        effect (int): The effect.
+
+    Returns:
+        bool: False for the fill, gradient and progress effects, which are rendered once.
+    """
+    return effect == EFFECT_BLINK or effect == EFFECT_BREATHE or effect == EFFECT_CHASE
+
+
+@micropython.native
+def _put(buf, offset, order, r, g, b):
+    buf[offset + order[0]] = r
+    buf[offset + order[1]] = g
+    buf[offset + order[2]] = b
+
+
+@micropython.native
+def render_effect(effect, buf, order, bpp, elapsed_ms):
+    """
+    Renders an effect into a pixel buffer, with integer arithmetic only.
+
+    Args:
+        effect (tuple): The effect as returned by `unpack_effect`.
+        buf (bytearray): The pixel buffer, e.g. `neopixel.NeoPixel.buf`.
+        order (tuple): The offsets of red, green and blue in a pixel.
+        bpp (int): The bytes per pixel.
+        elapsed_ms (int): The time since the effect started.
+    """
+    kind, color, color2, period, param = effect
+    r, g, b = color
+    r2, g2, b2 = color2
+    n = len(buf) // bpp
+    phase = elapsed_ms % period
+    if kind == EFFECT_FILL:
+        for i in range(n):
+            _put(buf, i * bpp, order, r, g, b)
+    elif kind == EFFECT_GRADIENT:
+        last = n - 1 if n > 1 else 1
+        for i in range(n):
+            j = last - i
+            _put(buf, i * bpp, order, (r * j + r2 * i) // last, (g * j + g2 * i) // last,
+                 (b * j + b2 * i) // last)
+    elif kind == EFFECT_BLINK:
+        if phase * 2 >= period:
+            r, g, b = r2, g2, b2
+        for i in range(n):
+            _put(buf, i * bpp, order, r, g, b)
+    elif kind == EFFECT_BREATHE:
+        # A triangle wave from color2 to color and back over the period.
+        level = phase * 512 // period
+        if level > 255:
+            level = 511 - level
+        r = (r * level + r2 * (255 - level)) // 255
+        g = (g * level + g2 * (255 - level)) // 255
+        b = (b * level + b2 * (255 - level)) // 255
+        for i in range(n):
+            _put(buf, i * bpp, order, r, g, b)
+    elif kind == EFFECT_CHASE:
+        # `param` pixels running once along the strip per period.
+        head = phase * n // period
+        length = param if param else 1
+        for i in range(n):
+            if (head - i) % n < length:
+                _put(buf, i * bpp, order, r, g, b)
+            else:
+                _put(buf, i * bpp, order, r2, g2, b2)
+    elif kind == EFFECT_PROGRESS:
+        lit = (param * n + 127) // 255
+        for i in range(n):
+            if i < lit:
+                _put(buf, i * bpp, order, r, g, b)
+            else:
+                _put(buf, i * bpp, order, r2, g2, b2)
@@ -5,6 +5,6 @@ if is_running_on_pico():
 
 from .holonomic import Holonomic
 from .twoWheel import TwoWheel
-from .twoWheelPID import TwoWheelPID
+from .twoWheelPID import TwoWheelPID, PIDTelemetry, Odometry
 from .button import Button
 from .neopixel import NeoPixel
\ No newline at end of file
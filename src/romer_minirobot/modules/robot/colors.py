@@ -0,0 +1,92 @@
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy is required for colour arrays: pip install numpy") from None
+    return numpy
+
+
+_optional = []
+
+
+def _optional_numpy():
+    # NumPy if it is installed, None otherwise, for code that runs without it too.
+    if not _optional:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _optional.append(numpy)
+    return _optional[0]
+
+
+def hsv_to_rgb(hsv):
+    """
+    Converts HSV colours to RGB.
+
+    Args:
+        hsv (array_like): The hue, saturation and value of each colour, shape (..., 3),
+            each from 0 to 1. Hues wrap around.
+
+    Returns:
+        numpy.ndarray: The RGB colours from 0 to 255 as floats, shape (..., 3).
+
+    Example:
+        rainbow = hsv_to_rgb(np.stack([np.linspace(0, 1, 60), np.ones(60), np.ones(60)], -1))
+    """
+    np = _numpy()
+    hsv = np.asarray(hsv, dtype=float)
+    h = (hsv[..., 0] % 1.0) * 6.0
+    s = np.clip(hsv[..., 1], 0.0, 1.0)
+    v = np.clip(hsv[..., 2], 0.0, 1.0) * 255.0
+    sector = np.floor(h).astype(int) % 6
+    f = h - np.floor(h)
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    # The (r, g, b) of each of the six sectors of the hue circle.
+    r = np.choose(sector, (v, q, p, p, t, v))
+    g = np.choose(sector, (t, v, v, q, p, p))
+    b = np.choose(sector, (p, p, t, v, v, q))
+    return np.stack((r, g, b), axis=-1)
+
+
+def rgb_to_hsv(rgb):
+    """
+    Converts RGB colours to HSV.
+
+    Args:
+        rgb (array_like): The RGB colours from 0 to 255, shape (..., 3).
+
+    Returns:
+        numpy.ndarray: The hue, saturation and value of each colour from 0 to 1, shape
+            (..., 3).
+    """
+    np = _numpy()
+    rgb = np.asarray(rgb, dtype=float) / 255.0
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    v = rgb.max(axis=-1)
+    c = v - rgb.min(axis=-1)
+    safe = np.where(c > 0, c, 1.0)
+    h = np.where(v == r, ((g - b) / safe) % 6.0,
+                 np.where(v == g, (b - r) / safe + 2.0, (r - g) / safe + 4.0))
+    h = np.where(c > 0, h / 6.0, 0.0)
+    s = np.where(v > 0, c / np.where(v > 0, v, 1.0), 0.0)
+    return np.stack((h, s, v), axis=-1)
+
+
+def gamma_table(gamma, brightness=1.0):
+    """
+    Builds a translation table applying a gamma curve and a brightness to channel values.
+
+    Args:
+        gamma (float): The gamma, e.g. 2.2 for perceptually even steps; 1 is linear.
+        brightness (float, optional): The brightness from 0 to 1. Defaults to 1.
+
+    Returns:
+        bytes: The 256 output values, for `bytes.translate`.
+    """
+    brightness = max(0.0, min(1.0, brightness))
+    if gamma == 1.0:
+        return bytes(int(value * brightness) for value in range(256))
+    return bytes(int(255 * (value / 255) ** gamma * brightness + 0.5) for value in range(256))
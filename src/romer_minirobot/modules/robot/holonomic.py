@@ -1,4 +1,5 @@
-from ...urtps import EventPubNode
+from ...urtps import EventPubNode, CONTROL
+from ..mixing import mix_holonomic, to_fixed, to_limit, pack_duties
 
 class Holonomic(EventPubNode):
     """
@@ -6,19 +7,49 @@ class Holonomic(EventPubNode):
 
     This class provides methods to set the movement message and move the robot in a holonomic manner.
 
+    With `precompute` set, commands are scaled, clamped and mixed here exactly as
+    `pico.Holonomic` would, and the Pico receives the duty cycles of its motors as a
+    binary message that it writes straight to the PWM.
+
     Args:
         EventPubNode: The base class for publishing events.
+        name (str, optional): The name of the topic. Defaults to 'holonomic'.
+        precompute (bool, optional): Send duty cycles instead of commands. Defaults to False.
+        scale (float, optional): The command of full duty in precompute mode, as the
+            `scale` of `pico.Holonomic`, from 0.0001 to 6.5535. Defaults to 1.0.
 
     Attributes:
-        None
+        precompute (bool): Whether duty cycles are sent instead of commands.
+        limit (int): The scale in units of 1/10000.
+        duties (list): The duty cycles of the last command in precompute mode.
 
     Example:
         holonomic_robot = Holonomic()
         holonomic_robot.move(1, 0, 0)  # Moves the robot forward with a linear velocity of 1 in the x-axis.
     """
 
-    def __init__(self, name = 'holonomic'):
+    traffic_class = CONTROL
+
+    def __init__(self, name = 'holonomic', precompute=False, scale=1.0):
         super().__init__(name, 'publishing')
+        self.precompute = precompute
+        self.limit = to_limit(scale)
+        self.duties = [0, 0, 0, 0]
+
+    def set_scale(self, scale):
+        """
+        Sets the scale used to mix commands in precompute mode.
+
+        The scale is sent with every drive message and adopted by the Pico, so commands
+        sent as text by other clients are mixed with it as well.
+
+        Args:
+            scale (float): The command of full duty.
+
+        Raises:
+            ValueError: If the scale is not from 0.0001 to 6.5535.
+        """
+        self.limit = to_limit(scale)
 
     def set_message(self, x_linear, y_linear, z_angular):
         """
@@ -30,11 +61,16 @@ class Holonomic(EventPubNode):
             z_angular (float): The angular velocity around the z-axis.
 
         Returns:
-            str: The formatted movement message.
+            str: The formatted movement message, or the binary message of the duty cycles
+                in precompute mode.
 
         Example:
             set_message(1, 0, 0)  # Returns '1,0,0' as the movement message.
         """
+        if self.precompute:
+            mix_holonomic(to_fixed(x_linear), to_fixed(y_linear), to_fixed(z_angular),
+                          self.limit, self.duties)
+            return super().set_message(pack_duties(self.duties, self.limit))
         return super().set_message(f'{x_linear},{y_linear},{z_angular}')
     
     def move(self, x_linear, y_linear, z_angular):
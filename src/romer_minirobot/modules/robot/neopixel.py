@@ -1,36 +1,238 @@
-from ...urtps import EventPubNode
+from ...urtps import EventPubNode, BULK
+from ...utils import now_us
+from ..pixels import (pack_frame, pack_keyframe, pack_delta, pack_effect, SEQUENCE_SIZE,
+                      KEYFRAME, RUN_HEADER, EFFECT_FILL, EFFECT_GRADIENT, EFFECT_BLINK, EFFECT_BREATHE,
+                      EFFECT_CHASE, EFFECT_PROGRESS)
+from .colors import _numpy, _optional_numpy, gamma_table, hsv_to_rgb
 
 class NeoPixel(EventPubNode):
-    
+
     """
     Represents a NeoPixel object that controls a strip of individually addressable RGB LEDs.
 
+    The colours are kept in `buffer`, a contiguous bytearray in the byte order of the strip.
+    `write` applies the brightness to the whole buffer at once and sends it as a binary
+    message, which `pico.NeoPixel` copies into the buffer of its strip as it is.
+
+    With `delta` set, the pixels changed since the last write are tracked and only the
+    pixels that differ from the last keyframe are sent, as runs. Every delta refers to
+    its keyframe and holds every pixel changed since, so a lost delta is made up for by
+    the next one, and a subscriber that missed the keyframe ignores deltas until the
+    next keyframe. A keyframe, the whole strip, is sent every `keyframe_period` seconds,
+    even while nothing changes, and whenever a delta would be larger. A write while a
+    keyframe is still waiting to be published replaces it with a keyframe of the same
+    sequence number, as a delta would refer to a keyframe no subscriber has.
+
+    Effects such as `blink` or `chase` are instead rendered by `pico.NeoPixel` itself,
+    from one message of 12 bytes, until the next write or effect. They leave `buffer`
+    unchanged.
+
+    Whole ranges of pixels are set from NumPy arrays with `set_pixels`, `fill_gradient`
+    and `blend`, written into `buffer` without a Python call per pixel. The gamma and the
+    brightness are applied by one translation table as the frame is sent; `set_levels`
+    adds a brightness per pixel. These need NumPy, the rest of the class does not.
+
     Args:
         num_pixels (int): The number of pixels in the NeoPixel strip.
         brightness (float, optional): The brightness of the NeoPixel strip. Defaults to 1.0.
+        order (str, optional): The byte order of the strip, 'GRB' for WS2812 strips as
+            driven by MicroPython's `neopixel` module, or 'RGB'. Defaults to 'GRB'.
+        delta (bool, optional): Send deltas between keyframes. Defaults to True.
+        keyframe_period (float, optional): Seconds between keyframes. Defaults to 1.
+        gamma (float, optional): The gamma applied to every channel when sent, e.g. 2.2.
+            Defaults to 1, linear.
 
     Attributes:
         num_pixels (int): The number of pixels in the NeoPixel strip.
-        pixels (list): A list of RGB tuples representing the color of each pixel.
+        buffer (bytearray): The colours of the pixels at full brightness, 3 bytes per pixel.
         brightness (float): The brightness of the NeoPixel strip.
+        gamma (float): The gamma applied to every channel.
+        sequence (int): The sequence number of the last keyframe, -1 before the first.
+        keyframes (int): The number of keyframes sent.
+        deltas (int): The number of deltas sent.
 
+    Example:
+        strip = NeoPixel(60, brightness=0.5)
+        strip.fill_with((0, 0, 255))
+        strip.write()  # a keyframe
+        strip[5] = (255, 0, 0)
+        strip.write()  # a delta of one pixel
+        strip.chase((255, 64, 0), length=4, period=2.0)  # one message for the animation
+        strip.fill_gradient([(255, 0, 0), (0, 0, 255)])
+        strip.write()
     """
 
-    def __init__(self, num_pixels, brightness=1.0, name = 'neopixel'):
+    traffic_class = BULK
+
+    def __init__(self, num_pixels, brightness=1.0, name = 'neopixel', order='GRB', delta=True,
+                 keyframe_period=1.0, gamma=1.0):
         super().__init__(name, 'publishing')
+        if sorted(order) != ['B', 'G', 'R']:
+            raise ValueError('Invalid byte order')
         self.num_pixels = num_pixels
-        self.pixels = [(0, 0, 0)] * num_pixels
+        self.order = order
+        self.offsets = (order.index('R'), order.index('G'), order.index('B'))
+        self.buffer = bytearray(num_pixels * 3)
         self.brightness = brightness
+        self.gamma = gamma
+        self._levels = None
+        self._table = None
+        self._set_table()
+        self.delta = delta
+        self.keyframe_period = keyframe_period
+        self.sequence = -1
+        self.keyframes = 0
+        self.deltas = 0
+        self._keyframe = None
+        self._keyframe_time = None
+        # Pixels that differed from the keyframe in a delta, and the range holding them.
+        self._touched = bytearray(num_pixels)
+        self._touched_range = None
+        # The range of pixels set since the last write.
+        self._dirty = None
+
+    def _set_table(self):
+        # Scales every channel value with one bytes.translate call.
+        self._table = gamma_table(self.gamma, self.brightness)
+
+    def _output(self):
+        # The frame as sent: gamma, brightness and the levels of the pixels applied.
+        data = self.buffer.translate(self._table)
+        if self._levels is not None:
+            np = _numpy()
+            scaled = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3) * self._levels
+            data = bytearray(scaled.astype(np.uint8).tobytes())
+        return data
+
+    def _view(self, start=0, end=None):
+        # The pixels of `buffer` from `start` to `end` as a writable (n, 3) uint8 array.
+        np = _numpy()
+        if end is None:
+            end = self.num_pixels
+        return np.frombuffer(self.buffer, dtype=np.uint8).reshape(-1, 3)[start:end]
+
+    def _mark(self, first, end):
+        if self._dirty is None:
+            self._dirty = (first, end)
+        else:
+            self._dirty = (min(first, self._dirty[0]), max(end, self._dirty[1]))
 
-    def _flatten(self):
+    def _encode(self):
         """
-        Flattens the pixels list into a string representation.
+        Encodes the frame with the brightness applied.
 
         Returns:
-            str: A string representation of the flattened pixels list.
+            bytes: The binary frame message, a keyframe or a delta.
+        """
+        data = self._output()
+        dirty = self._dirty
+        self._dirty = None
+        if not self.delta:
+            return pack_frame(data)
+        if self._keyframe_unsent():
+            return self._encode_keyframe(data, replace=True)
+        if self._keyframe is None or self._keyframe_due():
+            return self._encode_keyframe(data)
+        runs = self._runs(data, dirty)
+        size = SEQUENCE_SIZE + sum(RUN_HEADER + count * 3 for _, count in runs)
+        if size >= SEQUENCE_SIZE + len(data):
+            return self._encode_keyframe(data)
+        self.deltas += 1
+        return pack_delta(self.sequence, data, runs)
+
+    def _keyframe_due(self):
+        return now_us() - self._keyframe_time >= self.keyframe_period * 1000000
+
+    def _keyframe_unsent(self):
+        # Whether the message waiting to be published is a keyframe.
+        message = self.message
+        return self.event and message is not None and message[1] == KEYFRAME
+
+    def _encode_keyframe(self, data, replace=False):
+        # A replaced keyframe was never published, so its sequence number is reused.
+        if not replace:
+            self.sequence = (self.sequence + 1) % 256
+            self.keyframes += 1
+        self._keyframe = bytes(data)
+        self._keyframe_time = now_us()
+        self._touched[:] = bytes(self.num_pixels)
+        self._touched_range = None
+        return pack_keyframe(self.sequence, data)
+
+    def _runs(self, data, dirty):
+        """
+        Returns the runs of pixels that differ from the keyframe or differed from it in
+        an earlier delta.
+
+        Args:
+            data (bytearray): The pixel bytes with the brightness applied.
+            dirty (tuple): The range of pixels set since the last write, or None.
 
+        Returns:
+            list: (first pixel, number of pixels) of each run. Runs one pixel apart are
+                merged, since a run header costs as much as a pixel.
         """
-        return str([item for sublist in self.pixels for item in sublist])[1:-1]
+        if dirty is not None:
+            self._touch(data, dirty[0], dirty[1])
+        if self._touched_range is None:
+            return []
+        touched = self._touched
+        runs = []
+        first, end = self._touched_range
+        start = None
+        for pixel in range(first, end):
+            if not touched[pixel]:
+                continue
+            if start is not None and pixel - last <= 2:
+                last = pixel
+                continue
+            if start is not None:
+                runs.append((start, last + 1 - start))
+            start = last = pixel
+        runs.append((start, last + 1 - start))
+        return runs
+
+    def _touch(self, data, first, end):
+        # Halves the range until its slices equal the keyframe, so only the pixels
+        # that differ are compared one by one, or compares long ranges with NumPy if it
+        # is installed.
+        keyframe = self._keyframe
+        touched = self._touched
+        np = _optional_numpy()
+        lo = hi = None
+        ranges = [(first, end)]
+        while ranges:
+            first, end = ranges.pop()
+            if data[first * 3:end * 3] == keyframe[first * 3:end * 3]:
+                continue
+            if end - first > 64 and np is not None:
+                changed = np.frombuffer(data, dtype=np.uint8)[first * 3:end * 3] != (
+                    np.frombuffer(keyframe, dtype=np.uint8)[first * 3:end * 3])
+                pixels = np.flatnonzero(changed.reshape(-1, 3).any(axis=1)) + first
+                touched_view = np.frombuffer(touched, dtype=np.uint8)
+                touched_view[pixels] = 1
+                lo = int(pixels[0]) if lo is None else min(lo, int(pixels[0]))
+                hi = int(pixels[-1]) + 1 if hi is None else max(hi, int(pixels[-1]) + 1)
+                continue
+            if end - first > 16:
+                middle = (first + end) // 2
+                ranges.append((middle, end))
+                ranges.append((first, middle))
+                continue
+            for pixel in range(first, end):
+                offset = pixel * 3
+                if data[offset:offset + 3] != keyframe[offset:offset + 3]:
+                    touched[pixel] = 1
+                    if lo is None or pixel < lo:
+                        lo = pixel
+                    if hi is None or pixel >= hi:
+                        hi = pixel + 1
+        if lo is None:
+            return
+        if self._touched_range is not None:
+            lo = min(lo, self._touched_range[0])
+            hi = max(hi, self._touched_range[1])
+        self._touched_range = (lo, hi)
 
     def set_brightness(self, brightness):
         """
@@ -40,11 +242,13 @@ class NeoPixel(EventPubNode):
             brightness (float): The brightness value to set.
 
         Returns:
-            str: The flattened pixels list as a string.
+            bytes: The frame message.
 
         """
         self.brightness = brightness
-        return super().set_message(self._flatten())
+        self._set_table()
+        self._mark(0, self.num_pixels)
+        return super().set_message(self._encode())
 
     def __getitem__(self, index):
         """
@@ -54,10 +258,12 @@ class NeoPixel(EventPubNode):
             index (int): The index of the pixel.
 
         Returns:
-            tuple: The RGB color of the pixel.
+            tuple: The RGB color of the pixel, without the brightness applied.
 
         """
-        return self.pixels[index]
+        offset = index * 3
+        r, g, b = self.offsets
+        return (self.buffer[offset + r], self.buffer[offset + g], self.buffer[offset + b])
 
     def __setitem__(self, index, rgb):
         """
@@ -65,14 +271,19 @@ class NeoPixel(EventPubNode):
 
         Args:
             index (int): The index of the pixel.
-            rgb (tuple): The RGB color to set.
+            rgb (tuple): The RGB color to set, each channel clamped to 0-255.
 
         """
-        self.pixels[index] = (
-            int(rgb[0] * self.brightness),
-            int(rgb[1] * self.brightness),
-            int(rgb[2] * self.brightness)
-        )
+        if index < 0:
+            index += self.num_pixels
+        if not 0 <= index < self.num_pixels:
+            raise IndexError('Pixel index out of range')
+        self._mark(index, index + 1)
+        offset = index * 3
+        r, g, b = self.offsets
+        self.buffer[offset + r] = max(0, min(255, int(rgb[0])))
+        self.buffer[offset + g] = max(0, min(255, int(rgb[1])))
+        self.buffer[offset + b] = max(0, min(255, int(rgb[2])))
 
     def fill_with(self, color):
         """
@@ -82,16 +293,196 @@ class NeoPixel(EventPubNode):
             color (tuple): The RGB color to fill the strip with.
 
         """
-        for i in range(self.num_pixels):
-            self.__setitem__(i, color)
+        if not self.num_pixels:
+            return
+        self.__setitem__(0, color)
+        self.buffer[3:] = self.buffer[:3] * (self.num_pixels - 1)
+        self._mark(0, self.num_pixels)
 
     def write(self):
         """
         Writes the current state of the NeoPixel strip.
 
         Returns:
-            str: The flattened pixels list as a string.
+            bytes: The frame message.
+
+        """
+        return super().set_message(self._encode())
+
+    async def tick(self):
+        """
+        Sends a keyframe of the current state when one is due.
+        """
+        if (self.delta and self._keyframe is not None and not self.event
+                and self._keyframe_due()):
+            super().set_message(self._encode_keyframe(self._output()))
+        return self.event
+
+    def effect(self, effect, color, color2=(0, 0, 0), period=1.0, param=0):
+        """
+        Has the strip render an effect on its own, see `pixels.render_effect`.
+
+        Args:
+            effect (int): The effect, e.g. `pixels.EFFECT_CHASE`.
+            color (tuple): The RGB colour of the effect.
+            color2 (tuple, optional): The end of a gradient, or the background of the other
+                effects. Defaults to black.
+            period (float, optional): The period of animated effects in seconds, up to
+                65.5. Defaults to 1.
+            param (int, optional): The number of lit pixels of a chase, or the level of a
+                progress bar from 0 to 255. Defaults to 0.
+
+        Returns:
+            None
+        """
+        table = self._table
+        color = tuple(table[max(0, min(255, int(c)))] for c in color)
+        color2 = tuple(table[max(0, min(255, int(c)))] for c in color2)
+        # The strip no longer shows the last keyframe: the next write sends a new one.
+        self._keyframe = None
+        return super().set_message(pack_effect(effect, color, color2, period * 1000, param))
+
+    def fill(self, color):
+        """
+        Fills the strip with a colour, see `effect`.
+        """
+        return self.effect(EFFECT_FILL, color)
+
+    def gradient(self, start, end):
+        """
+        Fills the strip with a linear gradient from `start` to `end`, see `effect`.
+        """
+        return self.effect(EFFECT_GRADIENT, start, end)
+
+    def blink(self, color, period=1.0, background=(0, 0, 0)):
+        """
+        Blinks the strip, `color` for the first half of each period, see `effect`.
+        """
+        return self.effect(EFFECT_BLINK, color, background, period)
+
+    def breathe(self, color, period=2.0, background=(0, 0, 0)):
+        """
+        Fades the strip from `background` to `color` and back every period, see `effect`.
+        """
+        return self.effect(EFFECT_BREATHE, color, background, period)
+
+    def chase(self, color, length=3, period=1.0, background=(0, 0, 0)):
+        """
+        Runs `length` pixels along the strip once per period, see `effect`.
+        """
+        return self.effect(EFFECT_CHASE, color, background, period, max(1, min(255, length)))
+
+    def progress(self, level, color, background=(0, 0, 0)):
+        """
+        Lights the share `level`, from 0 to 1, of the strip as a progress bar, see `effect`.
+        """
+        level = max(0.0, min(1.0, level))
+        return self.effect(EFFECT_PROGRESS, color, background, param=round(level * 255))
+
+    def get_pixels(self):
+        """
+        Returns the colours of all pixels.
+
+        Returns:
+            numpy.ndarray: The RGB colours without the brightness applied, shape
+                (num_pixels, 3), uint8. A copy.
+        """
+        return self._view()[:, list(self.offsets)]
+
+    def set_pixels(self, colors, start=0):
+        """
+        Sets the colours of consecutive pixels from an array.
 
+        Args:
+            colors (array_like): The RGB colours, shape (n, 3), each channel rounded and
+                clamped to 0-255. A single colour is repeated over the rest of the strip.
+            start (int, optional): The first pixel. Defaults to 0.
+        """
+        np = _numpy()
+        colors = np.asarray(colors, dtype=float)
+        if colors.ndim == 1:
+            colors = np.broadcast_to(colors, (self.num_pixels - start, 3))
+        end = min(self.num_pixels, start + len(colors))
+        if end <= start:
+            return
+        self._view(start, end)[:, list(self.offsets)] = (
+            np.clip(np.rint(colors[:end - start]), 0, 255).astype(np.uint8))
+        self._mark(start, end)
+
+    def fill_gradient(self, colors, start=0, end=None, hsv=False):
+        """
+        Fills pixels with a gradient through evenly spaced colour stops.
+
+        Args:
+            colors (array_like): Two or more RGB colours from 0 to 255, or HSV colours from
+                0 to 1 if `hsv` is set, shape (stops, 3).
+            start (int, optional): The first pixel. Defaults to 0.
+            end (int, optional): The pixel after the last one. Defaults to the end of the
+                strip.
+            hsv (bool, optional): Interpolate in HSV, e.g. through the hues of a rainbow.
+                Defaults to False.
+        """
+        np = _numpy()
+        if end is None:
+            end = self.num_pixels
+        count = end - start
+        if count <= 0:
+            return
+        stops = np.asarray(colors, dtype=float)
+        position = np.linspace(0.0, len(stops) - 1, count)
+        index = np.arange(len(stops))
+        gradient = np.stack([np.interp(position, index, stops[:, c]) for c in range(3)], -1)
+        if hsv:
+            gradient = hsv_to_rgb(gradient)
+        self.set_pixels(gradient, start)
+
+    def blend(self, colors, alpha, start=0):
+        """
+        Blends colours over the current ones.
+
+        Args:
+            colors (array_like): The RGB colours, shape (n, 3), or one colour for all
+                pixels from `start`.
+            alpha (float or array_like): The weight of `colors` from 0 to 1, one for all
+                pixels or one per pixel, shape (n,).
+            start (int, optional): The first pixel. Defaults to 0.
+        """
+        np = _numpy()
+        colors = np.asarray(colors, dtype=float)
+        if colors.ndim == 1:
+            colors = np.broadcast_to(colors, (self.num_pixels - start, 3))
+        end = min(self.num_pixels, start + len(colors))
+        if end <= start:
+            return
+        alpha = np.clip(np.asarray(alpha, dtype=float), 0.0, 1.0)
+        if alpha.ndim:
+            alpha = alpha[:end - start, None]
+        current = self._view(start, end)[:, list(self.offsets)]
+        self.set_pixels(current + (colors[:end - start] - current) * alpha, start)
+
+    def set_levels(self, levels):
+        """
+        Sets a brightness per pixel, applied on top of `brightness` when sent.
+
+        Args:
+            levels (array_like): The brightness of each pixel from 0 to 1, shape
+                (num_pixels,), or None to remove the levels.
+        """
+        if levels is None:
+            self._levels = None
+        else:
+            np = _numpy()
+            levels = np.clip(np.asarray(levels, dtype=float), 0.0, 1.0)
+            self._levels = np.broadcast_to(levels, (self.num_pixels,))[:, None]
+        self._mark(0, self.num_pixels)
+
+    def set_gamma(self, gamma):
+        """
+        Sets the gamma applied to every channel when sent.
+
+        Args:
+            gamma (float): The gamma, e.g. 2.2; 1 is linear.
         """
-        return super().set_message(self._flatten())
-        
+        self.gamma = gamma
+        self._set_table()
+        self._mark(0, self.num_pixels)
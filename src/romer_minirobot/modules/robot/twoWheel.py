@@ -1,4 +1,5 @@
-from ...urtps import EventPubNode
+from ...urtps import EventPubNode, CONTROL
+from ..mixing import mix_two_wheel, to_fixed, to_limit, pack_duties
 
 class TwoWheel(EventPubNode):
     """
@@ -6,19 +7,52 @@ class TwoWheel(EventPubNode):
 
     This class provides methods to control the movement of the robot.
 
+    With `precompute` set, commands are scaled, clamped and mixed here exactly as
+    `pico.TwoWheel` would, and the Pico receives the duty cycles of its motors as a
+    binary message that it writes straight to the PWM.
+
     Args:
         EventPubNode: The base class for event publishing nodes.
+        name (str, optional): The name of the topic. Defaults to 'twoWheel'.
+        precompute (bool, optional): Send duty cycles instead of commands. Defaults to False.
+        scale (float, optional): The command of full duty in precompute mode, as the
+            `scale` of `pico.TwoWheel`, from 0.0001 to 6.5535. Defaults to 1.0.
 
     Attributes:
-        None
+        precompute (bool): Whether duty cycles are sent instead of commands.
+        limit (int): The scale in units of 1/10000.
+        duties (list): The duty cycles of the last command in precompute mode.
 
     Example:
         tw = TwoWheel()
         tw.move(0.5, 0.2)
+
+        tw = TwoWheel(precompute=True, scale=0.8)
+        tw.move(0.5, 0.2)  # the Pico writes the duty cycles 57343 and 24576
     """
 
-    def __init__(self,name = 'twoWheel'):
+    traffic_class = CONTROL
+
+    def __init__(self,name = 'twoWheel', precompute=False, scale=1.0):
         super().__init__(name, 'publishing')
+        self.precompute = precompute
+        self.limit = to_limit(scale)
+        self.duties = [0, 0]
+
+    def set_scale(self, scale):
+        """
+        Sets the scale used to mix commands in precompute mode.
+
+        The scale is sent with every drive message and adopted by the Pico, so commands
+        sent as text by other clients are mixed with it as well.
+
+        Args:
+            scale (float): The command of full duty.
+
+        Raises:
+            ValueError: If the scale is not from 0.0001 to 6.5535.
+        """
+        self.limit = to_limit(scale)
 
     def set_message(self, x_linear, z_angular):
         """
@@ -29,12 +63,16 @@ class TwoWheel(EventPubNode):
             z_angular (float): The angular velocity in the z-axis.
 
         Returns:
-            str: The formatted message containing the velocities.
+            str: The formatted message containing the velocities, or the binary message
+                of the duty cycles in precompute mode.
 
         Example:
             message = set_message(0.5, 0.2)
             print(message)  # Output: "0.5,0.2"
         """
+        if self.precompute:
+            mix_two_wheel(to_fixed(x_linear), to_fixed(z_angular), self.limit, self.duties)
+            return super().set_message(pack_duties(self.duties, self.limit))
         return super().set_message(f'{x_linear},{z_angular}')
     
     def move(self, x_linear, z_angular):
@@ -1,4 +1,17 @@
-from ...urtps import EventPubNode
+from ...urtps import Node, EventPubNode, CONTROL, BINARY
+from ...utils import now_us, ticks_diff
+from ...utils.clock import TICKS_PERIOD
+from ..telemetry import (HEADER_SIZE, SPEED_SCALE, EFFORT_SCALE, POSE_SIZE, unpack_header,
+                         batch_size, unpack_pose)
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy is required for PID telemetry: pip install numpy") from None
+    return numpy
+
 
 class TwoWheelPID(EventPubNode):
     """
@@ -14,6 +27,8 @@ class TwoWheelPID(EventPubNode):
     ```
     """
 
+    traffic_class = CONTROL
+
     def __init__(self):
         super().__init__('twoWheelPID', 'publishing')
 
@@ -41,4 +56,230 @@ class TwoWheelPID(EventPubNode):
         Returns:
             str: The formatted message containing the desired velocities.
         """
-        return self.set_message(x_linear, z_angular)
\ No newline at end of file
+        return self.set_message(x_linear, z_angular)
+
+    def set_gains(self, prop, integ):
+        """
+        Set the gains of the PI controllers of both wheels, e.g. as found by
+        `tools.PIDTuner`.
+
+        The gains are sent as a command, so they replace a move not yet sent.
+
+        Args:
+            prop (float): The proportional gain.
+            integ (float): The integral gain.
+
+        Returns:
+            str: The formatted message containing the gains.
+        """
+        return super().set_message(f'gains,{prop},{integ}')
+
+
+class PIDTelemetry(Node):
+    """
+    Reassembles the samples of a `pico.TwoWheelPID` published in batches by
+    `pico.PIDTelemetry` into NumPy arrays.
+
+    Each batch is decoded at once with `numpy.frombuffer` into a ring of arrays holding
+    the last `capacity` samples. The samples are timed in the clock of this participant:
+    a batch carries the ticks of each control step and of its packing, and the packing is
+    the send time the batch is stamped with. Samples missing between batches are counted
+    as lost, and batches arriving late are dropped. A batch is taken for a restart of the
+    robot, and the samples are followed from it on, when it starts again at the first
+    sample, ends more than one batch before the samples received, or is packed before
+    the last batch while bringing new samples, or after it while bringing none.
+
+    Args:
+        name (str, optional): The name of the node. Defaults to 'twoWheelPIDTelemetry'.
+        capacity (int, optional): The samples kept. Defaults to 60000, 10 minutes at
+            100 Hz.
+
+    Attributes:
+        capacity (int): The samples kept.
+        received (int): The samples received.
+        lost (int): The samples missing between the batches received.
+        batches (int): The batches received.
+        restarts (int): The restarts of the robot noticed.
+
+    Example:
+        telemetry = PIDTelemetry()
+        r = MiniRobot({'drive': TwoWheelPID(), 'telemetry': telemetry}, ...)
+        ...
+        samples = telemetry.samples()
+        print(samples['time_us'][-1], samples['error'][-1])
+    """
+
+    def __init__(self, name='twoWheelPIDTelemetry', capacity=60000):
+        super().__init__(name, 'subscribing')
+        np = _numpy()
+        self.capacity = capacity
+        self.received = 0
+        self.lost = 0
+        self.batches = 0
+        self.restarts = 0
+        self._next = None
+        self._ticks = None
+        self._dtype = np.dtype([('ticks', '<u4'), ('values', '<i2', (6,))])
+        self._index = np.zeros(capacity, dtype=np.int64)
+        self._time_us = np.zeros(capacity, dtype=np.int64)
+        self._values = np.zeros((capacity, 6), dtype=np.int16)
+
+    def set_message(self, message):
+        """
+        Decodes a batch of samples into the arrays.
+
+        Args:
+            message (bytes): The batch, see `telemetry.pack_header`.
+        """
+        if not isinstance(message, (bytes, bytearray)) or not message.startswith(BINARY):
+            return
+        np = _numpy()
+        first, ticks, count = unpack_header(message)
+        if len(message) < batch_size(count):
+            return
+        records = np.frombuffer(message, dtype=self._dtype, count=count, offset=HEADER_SIZE)
+        if self._next is not None and self._restarted(first, ticks, count):
+            # The robot restarted, and its samples are counted from 0 again.
+            self.restarts += 1
+            self._next = None
+        if self._next is not None:
+            skip = self._next - first
+            if skip >= count:
+                return
+            if skip > 0:
+                records = records[skip:]
+                first += skip
+                count -= skip
+            else:
+                self.lost -= skip
+        self._next = first + count
+        self._ticks = ticks
+        self.batches += 1
+
+        stamp = self.stamp if self.stamp is not None else now_us()
+        # The ticks of the samples are before those of the packing.
+        age = (ticks - records['ticks'].astype(np.int64)) % TICKS_PERIOD
+        slots = (self.received + np.arange(count)) % self.capacity
+        self._index[slots] = first + np.arange(count)
+        self._time_us[slots] = stamp - age
+        self._values[slots] = records['values']
+        self.received += count
+
+    def _restarted(self, first, ticks, count):
+        if first == 0 or self._next - (first + count) > count:
+            return True
+        # A late batch was packed before the last one, a batch with new samples after it;
+        # the other way round, the ticks of the robot started over.
+        late = first + count <= self._next
+        return late != (ticks_diff(ticks, self._ticks) <= 0)
+
+    async def tick(self):
+        return self.received
+
+    def samples(self):
+        """
+        Returns the samples kept, oldest first.
+
+        Returns:
+            dict: The `index` of each sample among all those recorded and its `time_us`
+                in the clock of this participant, as int64 arrays; the `ref`, `speed`,
+                `error` and `effort` of each sample as float arrays of one column per
+                wheel, speeds in the units of `move` and efforts in duty cycles.
+        """
+        np = _numpy()
+        kept = min(self.received, self.capacity)
+        order = (self.received - kept + np.arange(kept)) % self.capacity
+        values = self._values[order].astype(np.float64)
+        ref = values[:, [0, 3]] / SPEED_SCALE
+        speed = values[:, [1, 4]] / SPEED_SCALE
+        return {
+            'index': self._index[order],
+            'time_us': self._time_us[order],
+            'ref': ref,
+            'speed': speed,
+            'error': ref - speed,
+            'effort': values[:, [2, 5]] * EFFORT_SCALE,
+        }
+
+
+class Odometry(Node):
+    """
+    Receives the pose and speeds integrated on the robot by `pico.TwoWheelPID` and
+    published by `pico.Odometry`.
+
+    The pose is integrated on the robot at the control rate, so a lost message only
+    delays the next pose instead of losing distance. Each pose is timed in the clock of
+    this participant: the message carries the ticks of the control step and of its
+    packing, and the packing is the send time the message is stamped with.
+
+    Args:
+        name (str, optional): The name of the node. Defaults to 'odometry'.
+
+    Attributes:
+        time_us (int): The time of the control step of the last pose, in the clock of
+            this participant. None until a pose is received.
+        x (float): The position along the x axis in metres, from the start of the robot.
+        y (float): The position along the y axis in metres.
+        theta (float): The heading in radians.
+        linear (float): The linear speed in metres per second.
+        angular (float): The angular speed in radians per second.
+        updates (int): The poses received.
+
+    Example:
+        odometry = Odometry()
+        r = MiniRobot({'drive': TwoWheelPID(), 'odometry': odometry}, ...)
+        ...
+        time_us, x, y, theta = odometry.get()
+    """
+
+    def __init__(self, name='odometry'):
+        super().__init__(name, 'subscribing')
+        self.time_us = None
+        self.x = 0.0
+        self.y = 0.0
+        self.theta = 0.0
+        self.linear = 0.0
+        self.angular = 0.0
+        self.updates = 0
+
+    def set_message(self, message):
+        """
+        Decodes a pose message.
+
+        Args:
+            message (bytes): The pose, see `telemetry.pack_pose`.
+        """
+        if not isinstance(message, (bytes, bytearray)) or len(message) < POSE_SIZE:
+            return
+        ticks, packed, x, y, theta, linear, angular = unpack_pose(message)
+        stamp = self.stamp if self.stamp is not None else now_us()
+        self.time_us = stamp - (packed - ticks) % TICKS_PERIOD
+        self.x = x
+        self.y = y
+        self.theta = theta
+        self.linear = linear
+        self.angular = angular
+        self.updates += 1
+
+    async def tick(self):
+        return self.updates
+
+    def get(self):
+        """
+        Returns the last pose.
+
+        Returns:
+            tuple: The time of the pose in microseconds, in the clock of this participant,
+                x and y in metres and the heading in radians.
+        """
+        return self.time_us, self.x, self.y, self.theta
+
+    def velocity(self):
+        """
+        Returns the last speeds.
+
+        Returns:
+            tuple: The time of the speeds in microseconds, the linear speed in metres per
+                second and the angular speed in radians per second.
+        """
+        return self.time_us, self.linear, self.angular
\ No newline at end of file
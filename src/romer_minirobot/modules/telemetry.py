@@ -0,0 +1,141 @@
+import struct
+
+from ..urtps.node import BINARY
+
+# A sample of `pico.TwoWheelPID`, recorded at each control step: the ticks_us of the
+# step as uint32, then the reference, the measured speed and the effort of each wheel as
+# int16. The error is the reference minus the speed, as the controller computed it.
+SAMPLE = '<I6h'
+SAMPLE_SIZE = 16
+# A batch of samples: the `BINARY` mark, the index of its first sample and the ticks_us
+# it was packed at as uint32, and the number of samples, followed by the samples.
+BATCH_HEADER = '<IIB'
+HEADER_SIZE = 10
+BATCH_MAX = 255
+# References and speeds are sent in units of 1 / SPEED_SCALE, efforts halved, as the
+# duties of `mixing.pack_duties`.
+SPEED_SCALE = 10000
+EFFORT_SCALE = 2
+# The pose of `pico.TwoWheelPID`: the `BINARY` mark, the ticks_us of the control step it
+# was integrated at and of the packing as uint32, the position in metres and the heading
+# in radians as float32, and the linear speed in mm/s and the angular speed in mrad/s as
+# int16.
+POSE = '<IIfffhh'
+POSE_SIZE = 25
+
+
+def _int16(value):
+    value = int(value)
+    if value > 32767:
+        return 32767
+    if value < -32767:
+        return -32767
+    return value
+
+
+def pack_sample(buf, offset, ticks, ref1, speed1, effort1, ref2, speed2, effort2):
+    """
+    Writes a sample of the controllers of both wheels into a buffer.
+
+    Args:
+        buf (bytearray): The buffer, e.g. the ring buffer of `pico.TwoWheelPID`.
+        offset (int): The offset of the sample in the buffer.
+        ticks (int): The `ticks_us` of the control step.
+        ref1 (float): The reference speed of the first wheel.
+        speed1 (float): The measured speed of the first wheel.
+        effort1 (float): The effort of the first wheel, the signed duty cycle.
+        ref2 (float): The reference speed of the second wheel.
+        speed2 (float): The measured speed of the second wheel.
+        effort2 (float): The effort of the second wheel.
+    """
+    struct.pack_into(SAMPLE, buf, offset, ticks,
+                     _int16(ref1 * SPEED_SCALE), _int16(speed1 * SPEED_SCALE),
+                     _int16(effort1 / EFFORT_SCALE),
+                     _int16(ref2 * SPEED_SCALE), _int16(speed2 * SPEED_SCALE),
+                     _int16(effort2 / EFFORT_SCALE))
+
+
+def pack_header(buf, first, ticks, count):
+    """
+    Writes the header of a batch at the start of a buffer of `batch_size(count)` bytes.
+
+    Args:
+        buf (bytearray): The message.
+        first (int): The index of the first sample, counting every sample recorded.
+        ticks (int): The `ticks_us` the batch is packed at.
+        count (int): The number of samples, up to `BATCH_MAX`.
+    """
+    buf[0] = BINARY[0]
+    struct.pack_into(BATCH_HEADER, buf, 1, first & 0xFFFFFFFF, ticks, count)
+
+
+def unpack_header(message):
+    """
+    Reads the header of a batch.
+
+    Args:
+        message (bytes): The batch.
+
+    Returns:
+        tuple: The index of the first sample, the `ticks_us` the batch was packed at and
+            the number of samples.
+    """
+    return struct.unpack_from(BATCH_HEADER, message, 1)
+
+
+def batch_size(count):
+    """
+    Returns the size of a batch.
+
+    Args:
+        count (int): The number of samples.
+
+    Returns:
+        int: The size in bytes.
+    """
+    return HEADER_SIZE + count * SAMPLE_SIZE
+
+
+def pack_pose(buf, ticks, x, y, theta, linear, angular):
+    """
+    Writes a pose into a buffer of `POSE_SIZE` bytes, leaving the packing ticks at zero.
+
+    Args:
+        buf (bytearray): The buffer, e.g. `pico.TwoWheelPID.pose`.
+        ticks (int): The `ticks_us` of the control step the pose was integrated at.
+        x (float): The position along the x axis in metres.
+        y (float): The position along the y axis in metres.
+        theta (float): The heading in radians.
+        linear (float): The linear speed in metres per second.
+        angular (float): The angular speed in radians per second.
+    """
+    buf[0] = BINARY[0]
+    struct.pack_into(POSE, buf, 1, ticks, 0, x, y, theta,
+                     _int16(linear * 1000), _int16(angular * 1000))
+
+
+def stamp_pose(buf, ticks):
+    """
+    Writes the ticks a pose message is packed at.
+
+    Args:
+        buf (bytearray): The pose message.
+        ticks (int): The `ticks_us` of the packing.
+    """
+    struct.pack_into('<I', buf, 5, ticks)
+
+
+def unpack_pose(message):
+    """
+    Reads a pose message.
+
+    Args:
+        message (bytes): The message built by `pack_pose` and `stamp_pose`.
+
+    Returns:
+        tuple: The ticks of the control step and of the packing, x and y in metres, the
+            heading in radians, the linear speed in metres per second and the angular
+            speed in radians per second.
+    """
+    ticks, packed, x, y, theta, linear, angular = struct.unpack_from(POSE, message, 1)
+    return ticks, packed, x, y, theta, linear / 1000, angular / 1000
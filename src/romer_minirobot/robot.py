@@ -5,12 +5,12 @@ from .utils import Logger
 
 class MiniRobot:
     
-    def __init__(self, hardware_spec: dict, multicast_group, multicast_port, debug = 'DEBUG') -> None:
+    def __init__(self, hardware_spec: dict, multicast_group, multicast_port, debug = 'DEBUG', transport=None) -> None:
         # Initialize the logger
         self.logger = Logger("MiniRobot", debug)
         
         # Initialize the Message Passing Interface
-        self.mpi = uRTPS(multicast_group, multicast_port)
+        self.mpi = uRTPS(multicast_group, multicast_port, debug, transport=transport)
         
         # Initialize the hardware
         for key, value in hardware_spec.items():
@@ -25,6 +25,47 @@ class MiniRobot:
         self.logger.debug('MiniRobot started Message Passing Interface.')
         self.logger.debug('MiniRobot started.')
 
+    def link_state(self):
+        """
+        Returns the state of the link to the robot.
+
+        The robot is identified by the peer publishing the topics of the hardware spec, or
+        by the most recently heard peer if the hardware spec has only topics the robot
+        subscribes to.
+
+        Returns:
+            str: 'ok', 'degraded' or 'lost', or None if the robot has not been heard yet.
+        """
+        peer = self._robot_peer()
+        if peer is None:
+            return None
+        return self.mpi.link_monitor.state(peer)
+
+    def link_stats(self):
+        """
+        Returns loss, jitter, round-trip time and age of the link to the robot.
+
+        Returns:
+            dict: The `PeerLink.stats` of the robot, or None if it has not been heard yet.
+        """
+        peer = self._robot_peer()
+        if peer is None:
+            return None
+        return self.mpi.link_monitor.stats()[peer]
+
+    def _robot_peer(self):
+        # A robot with only publishing hardware (TwoWheel, NeoPixel) publishes no topic
+        # we subscribe to, but it still sends heartbeats: fall back to the most recently
+        # heard peer.
+        monitor = self.mpi.link_monitor
+        for topic in list(self.mpi.subscribing_topics) + list(self.mpi.publishing_topics):
+            peer = monitor.peer_for_topic(topic)
+            if peer:
+                return peer
+        if not monitor.peers:
+            return None
+        return max(monitor.peers.values(), key=lambda link: link.last_seen).peer
+
     def stop(self):
         # Stop the Message Passing Interface
         self.mpi.stop()
@@ -0,0 +1,11 @@
+from ..utils import is_running_on_pico
+
+if is_running_on_pico():
+    raise ImportError("This module not available on Raspberry Pi Pico.")
+
+from . import hal
+from .network import VirtualNetwork, VirtualSocket
+from .runner import Simulation, VirtualClock, VirtualEventLoop
+from .fleet import Fleet
+from .motor import DCMotor
+from .loadgen import LoadGenerator, LatencyProbe, Telemetry
\ No newline at end of file
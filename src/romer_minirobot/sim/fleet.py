@@ -0,0 +1,282 @@
+import math
+
+from ..modules.mixing import duty_message_size, unpack_duty
+from ..urtps import Node, EventPubNode
+from ..utils import now_us
+
+TWO_WHEEL = 'twoWheel'
+HOLONOMIC = 'holonomic'
+
+# The duty cycle of each motor as a function of the (x, y, z) command, as mixed by
+# pico.TwoWheel.tick and pico.Holonomic.tick.
+MIXING = {
+    TWO_WHEEL: ((1, 0, 1), (1, 0, -1)),
+    HOLONOMIC: ((1, -1, 1), (1, 1, -1), (1, 1, 1), (1, -1, -1)),
+}
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy is required for the fleet simulator: pip install numpy") from None
+    return numpy
+
+
+class Fleet:
+    """
+    Kinematics of N simulated robots, integrated together on NumPy arrays.
+
+    Commands are mixed into motor duty cycles exactly as `pico.TwoWheel.tick` and
+    `pico.Holonomic.tick` do, including the clamping of the command to `scale`, the
+    truncation to integer duties and the 16-bit range of the PWM hardware. Each wheel
+    follows its duty with a first-order lag of time constant `tau` up to `max_speed` at
+    full duty, and the poses are integrated from the wheel speeds at a fixed step.
+
+    Two-wheel robots have motor 1 on the right and motor 2 on the left wheel, `track`
+    apart. Holonomic robots have mecanum wheels, motors 1 to 4 at rear right, rear
+    left, front right and front left, `track` being the sum of the half wheelbase and
+    the half track.
+
+    `add_to` connects the fleet to a uRTPS participant: every robot subscribes to its
+    drive topic and publishes its pose 'x,y,theta' on its pose topic at `sensor_rate`.
+
+    Args:
+        count (int): The number of robots.
+        drive (str, optional): 'twoWheel' or 'holonomic'. Defaults to 'twoWheel'.
+        dt (float, optional): The integration step in seconds. Defaults to 0.01.
+        scale (float, optional): The `scale` of the Pico drive nodes. Defaults to 1.0.
+        max_speed (float, optional): The wheel speed at full duty, in m/s. Defaults to 0.5.
+        track (float, optional): The distance between the wheels in m. Defaults to 0.15.
+        tau (float, optional): The time constant of the motors in s. Defaults to 0.1.
+        spacing (float, optional): The distance between robots in the initial grid, in m.
+            Defaults to 1.
+        seed (int, optional): The seed of the sensor noise.
+
+    Attributes:
+        pose (numpy.ndarray): The (x, y, theta) of each robot, shape (count, 3).
+        command (numpy.ndarray): The last (x, y, z) command of each robot.
+        duty (numpy.ndarray): The signed duty cycle of each motor, as written to the PWM.
+        wheel (numpy.ndarray): The speed of each wheel as a fraction of `max_speed`.
+        time (float): The simulated time in seconds.
+
+    Example:
+        fleet = Fleet(200, seed=1)
+        fleet.add_to(urtps, drive_topic='robot{i}/twoWheel', pose_topic='robot{i}/pose')
+        urtps.start()
+    """
+
+    def __init__(self, count, drive=TWO_WHEEL, dt=0.01, scale=1.0, max_speed=0.5,
+                 track=0.15, tau=0.1, spacing=1.0, seed=None) -> None:
+        np = _numpy()
+        if drive not in MIXING:
+            raise ValueError('Invalid drive')
+        self.count = count
+        self.drive = drive
+        self.dt = dt
+        self.scale = scale
+        self.max_speed = max_speed
+        self.track = track
+        self.tau = tau
+        self.mixing = np.array(MIXING[drive], dtype=float)
+        # Body velocities (forward, sideways, angular) from the wheel speeds.
+        unmix = np.linalg.pinv(self.mixing) * max_speed
+        unmix[2] *= 2 / track if drive == TWO_WHEEL else 1 / track
+        self.unmix = unmix
+        motors = len(self.mixing)
+
+        side = math.ceil(math.sqrt(count))
+        index = np.arange(count)
+        self.pose = np.zeros((count, 3))
+        self.pose[:, 0] = index % side * spacing
+        self.pose[:, 1] = index // side * spacing
+        self.command = np.zeros((count, 3))
+        self.duty = np.zeros((count, motors), dtype=np.int64)
+        self.wheel = np.zeros((count, motors))
+        self.random = np.random.default_rng(seed)
+        self.time = 0.0
+        self.last_update = None
+        self.topics = []
+
+    def set_command(self, i, x_linear, y_linear, z_angular):
+        """
+        Sets the drive command of a robot, as received by its Pico.
+
+        Args:
+            i (int): The index of the robot.
+            x_linear (float): The forward command.
+            y_linear (float): The sideways command, ignored by two-wheel robots.
+            z_angular (float): The turning command.
+        """
+        scale = self.scale
+        x = max(-scale, min(scale, x_linear))
+        y = max(-scale, min(scale, y_linear)) if self.drive == HOLONOMIC else 0
+        # pico.Holonomic clamps the turning command to 1 rather than to scale.
+        z_limit = 1 if self.drive == HOLONOMIC else scale
+        z = max(-z_limit, min(z_limit, z_angular))
+        self.command[i] = x, y, z
+        duties = (int(x / scale * 65535), int(y / scale * 65535), int(z / scale * 65535))
+        self.duty[i] = [sum(m * d for m, d in zip(row, duties)) for row in MIXING[self.drive]]
+
+    def set_commands(self, commands):
+        """
+        Sets the drive commands of all robots at once.
+
+        Args:
+            commands (numpy.ndarray): The (x, y, z) command of each robot, shape (count, 3).
+        """
+        np = _numpy()
+        scale = self.scale
+        commands = np.asarray(commands, dtype=float)
+        command = np.clip(commands, -scale, scale)
+        if self.drive == HOLONOMIC:
+            command[:, 2] = np.clip(commands[:, 2], -1, 1)
+        else:
+            command[:, 1] = 0
+        self.command[:] = command
+        duties = (command / scale * 65535).astype(np.int64)
+        self.duty[:] = duties @ self.mixing.T.astype(np.int64)
+
+    def step(self, steps=1):
+        """
+        Advances the motors and poses of all robots.
+
+        Args:
+            steps (int, optional): The number of integration steps. Defaults to 1.
+        """
+        np = _numpy()
+        dt = self.dt
+        # The PWM hardware clamps the duty cycle to 16 bits.
+        target = np.clip(self.duty, -65535, 65535) / 65535
+        alpha = 1 - math.exp(-dt / self.tau)
+        pose = self.pose
+        for _ in range(steps):
+            self.wheel += (target - self.wheel) * alpha
+            velocity = self.wheel @ self.unmix.T
+            heading = pose[:, 2] + velocity[:, 2] * (dt / 2)
+            cos, sin = np.cos(heading), np.sin(heading)
+            pose[:, 0] += (velocity[:, 0] * cos - velocity[:, 1] * sin) * dt
+            pose[:, 1] += (velocity[:, 0] * sin + velocity[:, 1] * cos) * dt
+            pose[:, 2] += velocity[:, 2] * dt
+        np.remainder(pose[:, 2] + math.pi, 2 * math.pi, out=pose[:, 2])
+        pose[:, 2] -= math.pi
+        self.time += steps * dt
+
+    def update(self):
+        """
+        Integrates the steps due since the last update on the clock of
+        `romer_minirobot.utils`, so the fleet keeps pace with real or virtual time.
+
+        Returns:
+            int: The number of steps taken.
+        """
+        time = now_us()
+        if self.last_update is None:
+            self.last_update = time
+            return 0
+        steps = int((time - self.last_update) / (self.dt * 1000000))
+        if steps:
+            self.step(steps)
+            self.last_update += int(steps * self.dt * 1000000)
+        return steps
+
+    def sensors(self, noise=0.0):
+        """
+        Returns the simulated odometry of all robots.
+
+        Args:
+            noise (float, optional): The standard deviation of the Gaussian noise added
+                to each coordinate. Defaults to 0.
+
+        Returns:
+            numpy.ndarray: The measured (x, y, theta) of each robot.
+        """
+        if not noise:
+            return self.pose.copy()
+        return self.pose + self.random.normal(0, noise, self.pose.shape)
+
+    def add_to(self, participant, drive_topic=None, pose_topic='pose{i}', sensor_rate=10,
+               noise=0.0):
+        """
+        Adds the drive and pose topics of every robot to a uRTPS participant.
+
+        Args:
+            participant (BaseRTPS): The participant simulating the robots' Picos.
+            drive_topic (str, optional): The drive topic of robot i, formatted with `i`.
+                Defaults to the drive name followed by the index, e.g. 'twoWheel3'.
+            pose_topic (str, optional): The pose topic of robot i. Defaults to 'pose{i}'.
+            sensor_rate (float, optional): Pose messages per second and robot.
+                Defaults to 10.
+            noise (float, optional): The standard deviation of the pose noise.
+                Defaults to 0.
+        """
+        drive_topic = drive_topic or self.drive + '{i}'
+        topics = [FleetClock(self, sensor_rate, noise)]
+        for i in range(self.count):
+            topics.append(DriveInput(self, i, drive_topic.format(i=i)))
+            topics.append(PoseOutput(pose_topic.format(i=i)))
+        topics[0].outputs = topics[2::2]
+        participant.add_topics(topics)
+        self.topics = topics
+
+
+class DriveInput(Node):
+    """
+    The drive topic of one simulated robot; commands are written into the fleet arrays.
+    Duty cycles precomputed by the PC are written as they are.
+    """
+
+    def __init__(self, fleet, index, name) -> None:
+        super().__init__(name, 'subscribing')
+        self.fleet = fleet
+        self.index = index
+        self.holonomic = fleet.drive == HOLONOMIC
+
+    def set_message(self, message):
+        self.message = message
+        if isinstance(message, bytes):
+            motors = len(self.fleet.mixing)
+            if len(message) == duty_message_size(motors):
+                self.fleet.duty[self.index] = [unpack_duty(message, m) for m in range(motors)]
+            return
+        values = message.split(',')
+        if self.holonomic:
+            x, y, z = float(values[0]), float(values[1]), float(values[2])
+        else:
+            x, y, z = float(values[0]), 0.0, float(values[1])
+        self.fleet.set_command(self.index, x, y, z)
+
+    async def tick(self):
+        pass
+
+
+class PoseOutput(EventPubNode):
+    """
+    The pose topic of one simulated robot.
+    """
+
+    def __init__(self, name) -> None:
+        super().__init__(name, 'publishing')
+
+
+class FleetClock(Node):
+    """
+    Advances a fleet on every tick and sets the pose messages at the sensor rate.
+    """
+
+    def __init__(self, fleet, sensor_rate, noise) -> None:
+        super().__init__(f'_fleet{id(fleet)}', 'subscribing')
+        self.fleet = fleet
+        self.period_us = 1000000 / sensor_rate
+        self.noise = noise
+        self.outputs = []
+        self.last_sensor = None
+
+    async def tick(self):
+        self.fleet.update()
+        time = now_us()
+        if self.last_sensor is not None and time - self.last_sensor < self.period_us:
+            return
+        self.last_sensor = time
+        for output, (x, y, theta) in zip(self.outputs, self.fleet.sensors(self.noise).tolist()):
+            output.set_message(f'{x:.4f},{y:.4f},{theta:.4f}')
@@ -0,0 +1,210 @@
+import sys
+from collections import deque
+
+from ...utils import clock
+from ...utils.clock import TICKS_PERIOD
+
+_MODULES = ('machine', 'utime', 'network', 'neopixel', 'micropython')
+
+
+class Board:
+    """
+    The virtual hardware of one emulated Pico.
+
+    `install` registers emulated `machine`, `utime`, `network`, `neopixel` and
+    `micropython` modules in `sys.modules`, after which `modules.pico` and `uRTPSPi`
+    import and run unmodified on CPython.
+
+    Pins, PWM slices, ADC channels, timers and NeoPixel strips created while the board is
+    current register themselves here. Several boards can exist in one process, e.g.
+    one per emulated robot; `use` selects the board new hardware is attached to.
+
+    Args:
+        capture (int, optional): The number of PWM duty changes and NeoPixel frames kept
+            per output, 0 to keep only the latest. Defaults to 256.
+        ip_address (str, optional): The address reported by the emulated Wi-Fi.
+            Defaults to '127.0.0.1'.
+
+    Example:
+        from romer_minirobot.sim import hal
+        board = hal.install()
+
+        from romer_minirobot.modules import pico
+        drive = pico.TwoWheel()
+        drive.set_message('0.5,0')
+        asyncio.run(drive.tick())
+        print(board.duty(7), board.duty(20))
+
+    Attributes:
+        pins (dict): The `machine.Pin` state of each pin, by pin id.
+        pwms (dict): The `machine.PWM` of each pin, by pin id.
+        adcs (dict): The scripted value source of each ADC channel, by pin id.
+        neopixels (list): The `neopixel.NeoPixel` strips.
+        timers (list): The `machine.Timer` timers.
+        wifi_connected (bool): Whether `network.WLAN.connect` succeeds.
+        start_us (int): The time source value at which the board was created.
+    """
+
+    def __init__(self, capture=256, ip_address='127.0.0.1') -> None:
+        self.capture = capture
+        self.ip_address = ip_address
+        self.pins = {}
+        self.pwms = {}
+        self.adcs = {}
+        self.neopixels = []
+        self.timers = []
+        self.wifi_connected = True
+        self.start_us = clock_us()
+
+    def history(self):
+        return deque(maxlen=self.capture or 1)
+
+    def time_us(self):
+        """
+        Returns the time since the board was created, as seen by `utime.ticks_us`.
+
+        Returns:
+            int: The elapsed time in microseconds, not wrapped.
+        """
+        return clock_us() - self.start_us
+
+    def set_input(self, pin, level):
+        """
+        Drives an input pin from outside, firing its IRQ handler on a matching edge.
+
+        Args:
+            pin (int): The pin id.
+            level (int): The new level, 0 or 1.
+        """
+        self.pins[pin].drive(level)
+
+    def script_adc(self, pin, source):
+        """
+        Sets the values returned by `ADC.read_u16` for a pin.
+
+        Args:
+            pin (int): The pin id or ADC channel.
+            source (int|callable|iterable): A constant, a function of the board time in
+                microseconds, or a sequence of readings; the last reading of a sequence
+                is repeated once it is exhausted.
+        """
+        if not isinstance(source, int) and not callable(source):
+            source = _Sequence(source)
+        self.adcs[pin] = source
+
+    def read_adc(self, pin):
+        source = self.adcs.get(pin, 0)
+        if isinstance(source, int):
+            return source
+        if isinstance(source, _Sequence):
+            return source.next()
+        return int(source(self.time_us()))
+
+    def duty(self, pin):
+        """
+        Returns the duty cycle last written to the PWM of a pin.
+
+        Args:
+            pin (int): The pin id.
+
+        Returns:
+            int: The duty cycle as written, before the 16-bit clamp of the hardware.
+        """
+        return self.pwms[pin].requested
+
+    def use(self):
+        """
+        Makes this board the one new hardware is attached to.
+
+        Returns:
+            Board: This board.
+        """
+        global current
+        current = self
+        return self
+
+    def __enter__(self):
+        self.previous = current
+        return self.use()
+
+    def __exit__(self, *exc):
+        self.previous.use()
+
+
+class _Sequence:
+    def __init__(self, values):
+        self.values = iter(values)
+        self.last = 0
+
+    def next(self):
+        for value in self.values:
+            self.last = value
+            break
+        return self.last
+
+
+def current_board():
+    """
+    Returns the board new hardware is attached to.
+
+    Returns:
+        Board: The current board.
+    """
+    return current
+
+
+def clock_us():
+    """
+    Returns the time of the emulated hardware.
+
+    Returns:
+        int: The current value of the time source, in microseconds.
+    """
+    return clock.now_us()
+
+
+def set_time_source(source):
+    """
+    Replaces the clock of the emulated `utime` module.
+
+    This is the clock of `romer_minirobot.utils.clock`, so the emulated firmware and
+    the host side of a simulation share one time.
+
+    Args:
+        source (callable): Returns the current time in microseconds; None restores the
+            wall clock. Boards keep the start time they were created with, so the source
+            should be replaced before they are created, and `utime.reset_ticks` called.
+    """
+    clock.set_time_source(source)
+
+
+def install(board=None):
+    """
+    Registers the emulated hardware modules in `sys.modules`.
+
+    Args:
+        board (Board, optional): The board to attach new hardware to. Defaults to a new
+            board.
+
+    Returns:
+        Board: The current board.
+    """
+    from . import machine, utime, network, neopixel, micropython
+    for module in (machine, utime, network, neopixel, micropython):
+        sys.modules[module.__name__.rsplit('.', 1)[1]] = module
+    return (board or Board()).use()
+
+
+def uninstall():
+    """
+    Removes the emulated hardware modules from `sys.modules`.
+
+    Modules that were imported while they were installed keep their references.
+    """
+    for name in _MODULES:
+        module = sys.modules.get(name)
+        if getattr(module, 'EMULATED', False):
+            del sys.modules[name]
+
+
+current = Board()
@@ -0,0 +1,261 @@
+import asyncio
+
+from . import current_board, clock_us
+
+EMULATED = True
+
+
+def freq(hz=None):
+    return 125000000
+
+
+def unique_id():
+    return id(current_board()).to_bytes(8, 'little')
+
+
+def idle():
+    pass
+
+
+def reset():
+    raise SystemExit('machine.reset()')
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state=0):
+    pass
+
+
+class Pin:
+    """
+    An emulated GPIO pin.
+
+    Outputs keep the level written to them. Inputs read the level driven from outside
+    with `Board.set_input`, or the level of their pull resistor when undriven; driving
+    an input fires the IRQ handler when the edge matches its trigger.
+    """
+
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    ALT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __new__(cls, id, *args, **kwargs):
+        board = current_board()
+        pin = board.pins.get(id)
+        if pin is None:
+            pin = board.pins[id] = super().__new__(cls)
+            pin.id = id
+            pin.mode = Pin.IN
+            pin.pull = None
+            pin.level = 0
+            pin.driven = None
+            pin.handler = None
+            pin.trigger = 0
+            pin.irq_count = 0
+        return pin
+
+    def __init__(self, id, mode=-1, pull=-1, value=None, **kwargs) -> None:
+        self.init(mode, pull, value)
+
+    def init(self, mode=-1, pull=-1, value=None, **kwargs):
+        if mode != -1:
+            self.mode = mode
+        if pull != -1:
+            self.pull = pull
+        if value is not None:
+            self.level = 1 if value else 0
+
+    def value(self, x=None):
+        if x is not None:
+            self.level = 1 if x else 0
+            return None
+        if self.mode == Pin.IN:
+            if self.driven is not None:
+                return self.driven
+            return 1 if self.pull == Pin.PULL_UP else 0
+        return self.level
+
+    def __call__(self, x=None):
+        return self.value(x)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    high = on
+    low = off
+
+    def toggle(self):
+        self.value(1 - self.level)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        self.handler = handler
+        self.trigger = trigger
+        return self
+
+    def drive(self, level):
+        """
+        Drives the pin from outside and fires the IRQ handler on a matching edge.
+
+        Args:
+            level (int): The new level, 0 or 1.
+        """
+        old = self.value()
+        self.driven = 1 if level else 0
+        if self.handler is None or old == self.driven:
+            return
+        edge = Pin.IRQ_RISING if self.driven else Pin.IRQ_FALLING
+        if self.trigger & edge:
+            self.irq_count += 1
+            self.handler(self)
+
+    def __repr__(self):
+        return f'Pin({self.id})'
+
+
+class PWM:
+    """
+    An emulated PWM output capturing every duty cycle written to it.
+
+    Attributes:
+        requested (int): The last value passed to `duty_u16`, which may lie outside the
+            16-bit range the hardware accepts.
+        history (deque): (time in microseconds, duty) of recent writes.
+        writes (int): The number of `duty_u16` writes.
+        overrange (int): The number of writes outside 0..65535.
+    """
+
+    def __new__(cls, pin, *args, **kwargs):
+        board = current_board()
+        pwm = board.pwms.get(pin.id)
+        if pwm is None:
+            pwm = board.pwms[pin.id] = super().__new__(cls)
+            pwm.pin = pin
+            pwm.frequency = 0
+            pwm.requested = 0
+            pwm.history = board.history()
+            pwm.writes = 0
+            pwm.overrange = 0
+        return pwm
+
+    def __init__(self, pin, freq=None, duty_u16=None, **kwargs) -> None:
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def freq(self, value=None):
+        if value is None:
+            return self.frequency
+        self.frequency = value
+        return None
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return max(0, min(65535, self.requested))
+        self.requested = value
+        self.writes += 1
+        if not 0 <= value <= 65535:
+            self.overrange += 1
+        self.history.append((clock_us(), value))
+        return None
+
+    def deinit(self):
+        self.requested = 0
+
+    def __repr__(self):
+        return f'PWM({self.pin.id}, freq={self.frequency}, duty_u16={self.requested})'
+
+
+class ADC:
+    """
+    An emulated ADC channel returning the readings scripted with `Board.script_adc`.
+    """
+
+    CORE_TEMP = 4
+
+    def __init__(self, pin) -> None:
+        self.board = current_board()
+        self.channel = pin.id if isinstance(pin, Pin) else pin
+
+    def read_u16(self):
+        return self.board.read_adc(self.channel)
+
+
+class Timer:
+    """
+    An emulated hardware timer, firing on the asyncio event loop.
+
+    A timer initialised while an event loop runs calls its callback from the loop at
+    each period, in virtual time on a `sim.VirtualEventLoop`; the callback runs late by
+    as much as the loop is held up, as a scheduled callback would on a Pico. Outside an
+    event loop the timer only fires when `fire` is called.
+
+    Attributes:
+        period_us (int): The period in microseconds.
+        fired (int): The number of times the callback was called.
+    """
+
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs) -> None:
+        self.id = id
+        self.callback = None
+        self.period_us = 0
+        self.mode = Timer.PERIODIC
+        self.fired = 0
+        self._handle = None
+        current_board().timers.append(self)
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, freq=-1, period=-1, callback=None, tick_hz=1000, hard=None):
+        self.deinit()
+        self.mode = mode
+        self.callback = callback
+        if freq > 0:
+            self.period_us = round(1000000 / freq)
+        else:
+            self.period_us = period * 1000000 // tick_hz
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        if self._loop is not None:
+            self._deadline = self._loop.time() + self.period_us / 1000000
+            self._handle = self._loop.call_at(self._deadline, self._expire)
+
+    def _expire(self):
+        if self.mode == Timer.PERIODIC:
+            self._deadline += self.period_us / 1000000
+            self._handle = self._loop.call_at(self._deadline, self._expire)
+        else:
+            self._handle = None
+        self.fire()
+
+    def fire(self):
+        """
+        Calls the callback, as the timer does when it expires.
+        """
+        self.fired += 1
+        if self.callback is not None:
+            self.callback(self)
+
+    def deinit(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def __repr__(self):
+        return f'Timer({self.id}, period={self.period_us} us)'
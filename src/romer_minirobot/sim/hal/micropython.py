@@ -0,0 +1,37 @@
+EMULATED = True
+
+
+def const(value):
+    return value
+
+
+def native(func):
+    return func
+
+
+def viper(func):
+    return func
+
+
+def schedule(func, arg):
+    func(arg)
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def opt_level(level=None):
+    return 0
+
+
+def mem_info(verbose=None):
+    pass
+
+
+def heap_lock():
+    return 0
+
+
+def heap_unlock():
+    return 0
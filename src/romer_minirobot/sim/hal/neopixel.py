@@ -0,0 +1,49 @@
+from . import current_board, clock_us
+
+EMULATED = True
+
+
+class NeoPixel:
+    """
+    An emulated WS2812 strip with the buffer layout of MicroPython's `neopixel` module.
+
+    Pixels are stored in `buf` in GRB(W) order. Every `write` captures a copy of the
+    buffer in `frames`.
+
+    Attributes:
+        buf (bytearray): The raw pixel data.
+        frames (deque): (time in microseconds, bytes of buf) of recent writes.
+        writes (int): The number of writes.
+    """
+
+    ORDER = (1, 0, 2, 3)
+
+    def __init__(self, pin, n, bpp=3, timing=1) -> None:
+        board = current_board()
+        self.pin = pin
+        self.n = n
+        self.bpp = bpp
+        self.buf = bytearray(n * bpp)
+        self.frames = board.history()
+        self.writes = 0
+        board.neopixels.append(self)
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, index, value):
+        offset = index * self.bpp
+        for i in range(self.bpp):
+            self.buf[offset + self.ORDER[i]] = value[i]
+
+    def __getitem__(self, index):
+        offset = index * self.bpp
+        return tuple(self.buf[offset + self.ORDER[i]] for i in range(self.bpp))
+
+    def fill(self, value):
+        for i in range(self.n):
+            self[i] = value
+
+    def write(self):
+        self.writes += 1
+        self.frames.append((clock_us(), bytes(self.buf)))
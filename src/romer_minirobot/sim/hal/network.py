@@ -0,0 +1,56 @@
+from . import current_board
+
+EMULATED = True
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_GOT_IP = 3
+STAT_CONNECT_FAIL = -1
+
+
+class WLAN:
+    """
+    An emulated Wi-Fi interface. `connect` succeeds at once unless the board has
+    `wifi_connected` set to False, and `ifconfig` reports the address of the board.
+    """
+
+    def __init__(self, interface=STA_IF) -> None:
+        self.board = current_board()
+        self.interface = interface
+        self.enabled = False
+        self.connected = False
+        self.ssid = None
+
+    def active(self, is_active=None):
+        if is_active is None:
+            return self.enabled
+        self.enabled = bool(is_active)
+        return None
+
+    def connect(self, ssid=None, key=None, **kwargs):
+        self.ssid = ssid
+        self.connected = self.enabled and self.board.wifi_connected
+
+    def disconnect(self):
+        self.connected = False
+
+    def isconnected(self):
+        return self.connected
+
+    def status(self, param=None):
+        if param == 'rssi':
+            return -50
+        if self.connected:
+            return STAT_GOT_IP
+        return STAT_CONNECT_FAIL if self.ssid else STAT_IDLE
+
+    def ifconfig(self, config=None):
+        return (self.board.ip_address, '255.255.255.0', '127.0.0.1', '127.0.0.1')
+
+    def config(self, *args, **kwargs):
+        if args and args[0] == 'mac':
+            return bytes(6)
+        return None
@@ -0,0 +1,61 @@
+import time as _time
+
+from ...utils.clock import ticks_add, ticks_diff, TICKS_PERIOD
+from . import clock_us
+
+EMULATED = True
+
+_TICKS_MAX = TICKS_PERIOD - 1
+_boot_us = clock_us()
+
+
+def _uptime_us():
+    return clock_us() - _boot_us
+
+
+def ticks_us():
+    return _uptime_us() & _TICKS_MAX
+
+
+def ticks_ms():
+    return (_uptime_us() // 1000) & _TICKS_MAX
+
+
+def ticks_cpu():
+    return ticks_us()
+
+
+def sleep(seconds):
+    _time.sleep(seconds)
+
+
+def sleep_ms(ms):
+    _time.sleep(ms / 1000)
+
+
+def sleep_us(us):
+    _time.sleep(us / 1000000)
+
+
+def time():
+    return int(_time.time())
+
+
+def time_ns():
+    return _time.time_ns()
+
+
+def localtime(secs=None):
+    return _time.localtime(secs)[:8]
+
+
+def gmtime(secs=None):
+    return _time.gmtime(secs)[:8]
+
+
+def reset_ticks():
+    """
+    Restarts the ticks counters at zero, as after a reboot of the board.
+    """
+    global _boot_us
+    _boot_us = clock_us()
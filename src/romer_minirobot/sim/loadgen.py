@@ -0,0 +1,460 @@
+import asyncio
+import multiprocessing
+import socket
+from errno import EAGAIN
+
+from ..urtps import Node, Transport
+from ..urtps.clocksync import SYNC_TOPIC
+from ..urtps.linkmonitor import HEARTBEAT_TOPIC, PeerLink
+from ..urtps.sendqueue import TOS
+from ..urtps.transport import IP_TOS
+from ..utils import now_us
+
+# Messages per second and Pico of each kind of topic; the LED rate is the rate at which
+# the PC side writes the strip.
+DEFAULT_MIX = {'button': 1.0, 'battery': 1.0, 'telemetry': 20.0, 'neopixel': 5.0}
+PUBLISHED = ('button', 'battery', 'telemetry')
+
+BUTTON_PIN = 12
+BATTERY_PIN = 26
+NEOPIXEL_PIN = 16
+NEOPIXEL_PIXELS = 8
+
+# The peer ids of emulated Picos, so that generator processes ignore each other.
+PEER_PREFIX = 'p'
+
+
+class Telemetry(Node):
+    """
+    Publishes a message of fixed size at a fixed rate, standing in for the telemetry of a
+    controller. The message starts with a counter and the time it was set.
+
+    Args:
+        rate (float): Messages per second.
+        size (int, optional): The length of the message in bytes. Defaults to 64.
+        name (str, optional): The name of the topic. Defaults to 'telemetry'.
+    """
+
+    def __init__(self, rate, size=64, name='telemetry') -> None:
+        super().__init__(name, 'publishing')
+        self.period_us = 1000000 / rate
+        self.size = size
+        self.count = 0
+        self.last_time = None
+
+    async def tick(self):
+        self.set_message(None)
+        time = now_us()
+        if self.last_time is not None and time - self.last_time < self.period_us:
+            return
+        self.last_time = time
+        self.count += 1
+        message = f'{self.count},{time},'
+        self.set_message(message + '0' * max(0, self.size - len(message)))
+
+
+class LatencyProbe(Node):
+    """
+    A subscribing topic that keeps the latency of every message it receives.
+
+    `BaseRTPS` sets `latency` after each message; messages received before the clock of
+    the sender is synchronized are counted without a latency.
+
+    Args:
+        name (str): The name of the topic.
+
+    Attributes:
+        received (int): The number of messages received.
+        samples (list): The latencies of the received messages, in microseconds.
+    """
+
+    def __init__(self, name) -> None:
+        self.received = 0
+        self.samples = []
+        super().__init__(name, 'subscribing')
+
+    @property
+    def latency(self):
+        return self.samples[-1] if self.samples else None
+
+    @latency.setter
+    def latency(self, value):
+        if value is not None:
+            self.samples.append(value)
+
+    def set_message(self, message):
+        self.message = message
+        self.received += 1
+
+    def reset(self):
+        """
+        Discards the samples, e.g. after a warm-up.
+        """
+        self.received = 0
+        self.samples = []
+
+    async def tick(self):
+        pass
+
+
+class _SharedSocket:
+    """
+    The multicast socket of all emulated Picos of a process.
+
+    Every frame is received and decoded once and handed only to the Picos subscribing to
+    its topic; a Pico would drop the other frames after decoding them. Reserved topics
+    go to every Pico. Frames of emulated Picos are not delivered at all, so the cost of
+    the generator grows with the number of Picos and not with its square.
+
+    Since a Pico only sees part of the sequence numbers of the PC side, the loss of the
+    frames from the PC side is tracked here, by one `PeerLink` per sender.
+    """
+
+    def __init__(self, depth) -> None:
+        self.depth = depth
+        self.sock = None
+        self.address = None
+        self.tos = None
+        self.transports = []
+        self.routes = {}
+        self.links = {}
+
+    def attach(self, transport, participant):
+        if self.sock is None:
+            self.sock = participant._create_multicast_socket(
+                participant.multicast_group, participant.multicast_port)
+            self.address = (participant.multicast_group, participant.multicast_port)
+        self.transports.append(transport)
+        for name in participant.subscribing_topics:
+            self.routes.setdefault(name, []).append(transport)
+
+    def detach(self, transport):
+        if transport in self.transports:
+            self.transports.remove(transport)
+            for transports in self.routes.values():
+                if transport in transports:
+                    transports.remove(transport)
+        if not self.transports and self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def send(self, frame, traffic_class):
+        if traffic_class is not None and traffic_class != self.tos:
+            try:
+                self.sock.setsockopt(socket.IPPROTO_IP, IP_TOS, TOS[traffic_class])
+            except OSError:
+                pass
+            self.tos = traffic_class
+        self.sock.sendto(frame, self.address)
+
+    def poll(self):
+        while self.sock:
+            try:
+                data, address = self.sock.recvfrom(1024)
+            except OSError as e:
+                if e.args[0] == EAGAIN:
+                    return
+                raise
+            decoded = Node.decode(data)
+            if len(decoded) != 5 or decoded[1].startswith(PEER_PREFIX):
+                continue
+            link = self.links.get(decoded[1])
+            if link is None:
+                link = self.links[decoded[1]] = PeerLink(decoded[1])
+            link.update(int(decoded[2]), int(decoded[3]), now_us())
+            if decoded[0] in (SYNC_TOPIC, HEARTBEAT_TOPIC):
+                transports = self.transports
+            else:
+                transports = self.routes.get(decoded[0], ())
+            for transport in transports:
+                transport.deliver(decoded, address)
+
+
+class _PicoTransport(Transport):
+    """
+    The transport of one emulated Pico, on the socket shared by the Picos of its process.
+    """
+
+    def __init__(self, shared) -> None:
+        self.shared = shared
+        self.inbox = []
+        self.dropped = 0
+        self.traffic_class = None
+
+    def open(self, participant):
+        if not participant._connect_wifi(participant.wifi_ssid, participant.wifi_password):
+            return False
+        self.shared.attach(self, participant)
+        return True
+
+    def set_traffic_class(self, traffic_class):
+        self.traffic_class = traffic_class
+
+    def send(self, topic, payload, header):
+        self.shared.send(topic.frame(payload, *header), self.traffic_class)
+
+    def deliver(self, decoded, address):
+        if len(self.inbox) >= self.shared.depth:
+            self.inbox.pop(0)
+            self.dropped += 1
+        self.inbox.append((decoded, address))
+
+    def receive(self):
+        if not self.inbox:
+            self.shared.poll()
+            if not self.inbox:
+                return None
+        return self.inbox.pop(0)
+
+    def close(self):
+        self.shared.detach(self)
+
+
+def _generate(first, count, mix, multicast_group, multicast_port, telemetry_size, stop,
+              results):
+    """
+    Runs emulated Picos first to first + count - 1 in this process until `stop` is set,
+    then puts the statistics of the frames they received from the PC side in `results`.
+    """
+    from . import hal
+    hal.install()
+    from ..modules import pico
+    from ..urtps.urtpspi import uRTPSPi
+
+    shared = _SharedSocket(depth=256)
+    boards = []
+    participants = []
+    for i in range(first, first + count):
+        board = hal.Board(capture=0, ip_address=f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}')
+        board.use()
+        urtps = uRTPSPi('ssid', 'password', multicast_group, multicast_port, 'ERROR')
+        urtps.peer_id = urtps.clock_sync.peer_id = f'{PEER_PREFIX}{i:05d}'
+        urtps.transport = _PicoTransport(shared)
+        if mix.get('button'):
+            urtps.add_publishing_topics(pico.Button(BUTTON_PIN, 'pull_up', True, name=f'button{i}'))
+        if mix.get('battery'):
+            board.script_adc(BATTERY_PIN, 40000)
+            urtps.add_publishing_topics(
+                pico.Battery(BATTERY_PIN, 1000 / mix['battery'], name=f'battery{i}'))
+        if mix.get('telemetry'):
+            urtps.add_publishing_topics(Telemetry(mix['telemetry'], telemetry_size, f'telemetry{i}'))
+        if mix.get('neopixel'):
+            urtps.add_subscribing_topics(
+                pico.NeoPixel(NEOPIXEL_PIN, NEOPIXEL_PIXELS, name=f'neopixel{i}'))
+        boards.append(board)
+        participants.append(urtps)
+
+    asyncio.run(_run(participants, boards, mix.get('button'), stop))
+
+    results.put({
+        'received': sum(link.received for link in shared.links.values()),
+        'lost': sum(link.lost for link in shared.links.values()),
+        'dropped': sum(urtps.transport.dropped for urtps in participants),
+    })
+
+
+async def _run(participants, boards, button_rate, stop):
+    tasks = [asyncio.create_task(urtps._main()) for urtps in participants]
+    # Button changes are spread evenly over the boards.
+    period = 1 / (button_rate * len(boards)) if button_rate else 0.1
+    levels = [1] * len(boards)
+    i = 0
+    while not stop.is_set():
+        await asyncio.sleep(period)
+        if button_rate:
+            index = i % len(boards)
+            levels[index] ^= 1
+            boards[index].set_input(BUTTON_PIN, levels[index])
+            i += 1
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+class LoadGenerator:
+    """
+    Emulates a fleet of Picos on this host to load the PC side of uRTPS.
+
+    `count` Picos run the firmware modules of `modules.pico` on emulated hardware, each
+    with its own board, peer id and topics: a button that changes state, a battery
+    reading, a telemetry stream and an LED strip fed by the PC side, at the rates of
+    `mix`. Topic names end with the index of the Pico, e.g. 'button7'. The Picos are
+    spread over `processes` processes, each running them in one asyncio loop on one
+    multicast socket, so a single process emulates hundreds of Picos.
+
+    The PC side under test is an ordinary participant, typically a `MiniRobot`, with the
+    nodes of `topics` added. `report` returns the loss and one-way latency of the frames
+    it received from the Picos, and `stop` the loss of the frames the Picos received
+    from it. The generator competes with the PC side for the CPU; on a single core the
+    latency it reports is an upper bound.
+
+    Args:
+        count (int): The number of emulated Picos.
+        mix (dict, optional): Messages per second and Pico of 'button' (state changes,
+            each published 5 times by `pico.Button`), 'battery', 'telemetry' and
+            'neopixel' (strip writes by the PC side); 0 or a missing entry disables the
+            topic. Defaults to `DEFAULT_MIX`.
+        processes (int, optional): The number of generator processes. Defaults to 1.
+        multicast_group (str, optional): The multicast group. Defaults to '224.0.0.253'.
+        multicast_port (int, optional): The multicast port. Defaults to 5007.
+        telemetry_size (int, optional): The length of a telemetry message in bytes.
+            Defaults to 64.
+
+    Attributes:
+        probes (list): The `LatencyProbe` of every topic published by the Picos.
+        leds (list): The `robot.NeoPixel` of every Pico.
+
+    Example:
+        load = LoadGenerator(100, processes=2)
+        r = MiniRobot(load.topics(), MULTICAST_GROUP, MULTICAST_TOPIC_PORT, 'ERROR')
+        load.start()
+        time.sleep(3)
+        load.reset(r.mpi)
+        time.sleep(10)
+        print(load.report(r.mpi), load.stop())
+    """
+
+    def __init__(self, count, mix=None, processes=1, multicast_group='224.0.0.253',
+                 multicast_port=5007, telemetry_size=64) -> None:
+        self.count = count
+        self.mix = DEFAULT_MIX if mix is None else mix
+        self.processes = max(1, min(processes, count))
+        self.multicast_group = multicast_group
+        self.multicast_port = multicast_port
+        self.telemetry_size = telemetry_size
+        self.probes = []
+        self.leds = []
+        self.workers = []
+        self.stop_event = None
+        self.results = None
+        self.baseline = {}
+
+    def topics(self):
+        """
+        Creates the PC-side nodes of all Picos.
+
+        Returns:
+            dict: The nodes by topic name, e.g. as the hardware spec of a `MiniRobot`.
+        """
+        from ..modules import robot
+        self.probes = [LatencyProbe(f'{kind}{i}') for i in range(self.count)
+                       for kind in PUBLISHED if self.mix.get(kind)]
+        self.leds = []
+        if self.mix.get('neopixel'):
+            self.leds = [robot.NeoPixel(NEOPIXEL_PIXELS, name=f'neopixel{i}')
+                         for i in range(self.count)]
+        return {node.name: node for node in self.probes + self.leds}
+
+    def write_leds(self, color):
+        """
+        Writes a colour to the strips of all Picos; call it at the 'neopixel' rate.
+
+        Args:
+            color (tuple): The (r, g, b) colour.
+        """
+        for led in self.leds:
+            led.fill_with(color)
+            led.write()
+
+    def start(self):
+        """
+        Starts the generator processes.
+        """
+        context = multiprocessing.get_context('spawn')
+        self.stop_event = context.Event()
+        self.results = context.Queue()
+        first = 0
+        for p in range(self.processes):
+            count = self.count // self.processes + (p < self.count % self.processes)
+            worker = context.Process(
+                target=_generate, daemon=True,
+                args=(first, count, self.mix, self.multicast_group, self.multicast_port,
+                      self.telemetry_size, self.stop_event, self.results))
+            worker.start()
+            self.workers.append(worker)
+            first += count
+
+    def reset(self, participant):
+        """
+        Starts a new measurement, discarding what was received so far.
+
+        Args:
+            participant (BaseRTPS): The PC-side participant.
+        """
+        for probe in self.probes:
+            probe.reset()
+        self.baseline = {peer: (link.received, link.lost)
+                         for peer, link in participant.link_monitor.peers.items()}
+
+    def report(self, participant):
+        """
+        Returns the statistics of the frames the PC side received from the Picos.
+
+        Args:
+            participant (BaseRTPS): The PC-side participant.
+
+        Returns:
+            dict: 'picos' heard, frames 'received' and 'lost', the 'loss_rate', and the
+                mean, median, 99th percentile and maximum one-way latency in ms.
+        """
+        received = lost = picos = 0
+        for peer, link in participant.link_monitor.peers.items():
+            if not peer.startswith(PEER_PREFIX):
+                continue
+            base_received, base_lost = self.baseline.get(peer, (0, 0))
+            received += link.received - base_received
+            lost += link.lost - base_lost
+            picos += 1
+        samples = sorted(sample for probe in self.probes for sample in probe.samples)
+        report = {
+            'picos': picos,
+            'received': received,
+            'lost': lost,
+            'loss_rate': lost / (received + lost) if received + lost else 0.0,
+        }
+        if samples:
+            report['latency_mean_ms'] = sum(samples) / len(samples) / 1000
+            report['latency_p50_ms'] = _percentile(samples, 0.5) / 1000
+            report['latency_p99_ms'] = _percentile(samples, 0.99) / 1000
+            report['latency_max_ms'] = samples[-1] / 1000
+        return report
+
+    def stop(self, timeout=10):
+        """
+        Stops the generator processes.
+
+        Args:
+            timeout (float, optional): Seconds to wait for each process. Defaults to 10.
+
+        Returns:
+            dict: The frames the Picos 'received' from the PC side and 'lost', and the
+                frames 'dropped' because a Pico did not keep up.
+        """
+        if not self.workers:
+            return None
+        self.stop_event.set()
+        stats = {'received': 0, 'lost': 0, 'dropped': 0}
+        for _ in self.workers:
+            try:
+                result = self.results.get(timeout=timeout)
+            except Exception:
+                continue
+            for key in stats:
+                stats[key] += result[key]
+        for worker in self.workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+        return stats
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,142 @@
+import math
+
+# The levels of the two hall sensors at each position modulo 4, the first sensor leading
+# when the motor turns forward.
+QUADRATURE = ((0, 0), (1, 0), (1, 1), (0, 1))
+
+
+def advance(motors, us, step_us=100):
+    """
+    Runs motors on one clock and advances it.
+
+    The edges of all the motors are driven in the order they occur, e.g. for both
+    wheels of `pico.TwoWheelPID`.
+
+    Args:
+        motors (list): The `DCMotor`s, sharing a clock.
+        us (int): The time to run, in microseconds.
+        step_us (int, optional): The integration step. Defaults to 100.
+    """
+    clock = motors[0].clock
+    for motor in motors:
+        motor._follow_duty()
+    end = clock.time_us + us
+    while clock.time_us < end:
+        start_us = clock.time_us
+        dt_us = min(step_us, end - start_us)
+        edges = []
+        for motor in motors:
+            motor._step(start_us, dt_us, edges)
+        edges.sort(key=lambda edge: edge[0])
+        for at, motor, count in edges:
+            if at > clock.time_us:
+                clock.advance(at - clock.time_us)
+            motor._drive(count)
+        clock.advance(start_us + dt_us - clock.time_us)
+
+
+class DCMotor:
+    """
+    A DC motor with a quadrature encoder, driven by the PWM of an emulated Pico.
+
+    The motor reads the duty cycles written to its two PWM pins on the board, as
+    `pico.TwoWheelPID.motor1_write` writes them, and follows the effective duty with a
+    first-order lag of time constant `tau` up to `max_speed` at full duty. Duties below
+    `deadband` do not overcome friction. Every encoder edge is driven on the hall sensor
+    pins at the time it occurs, advancing the virtual clock to it, so the interrupt
+    handlers of the firmware timestamp it as on a real motor.
+
+    Args:
+        board (hal.Board): The emulated board.
+        clock (VirtualClock): The clock of the emulated hardware, see
+            `hal.set_time_source`.
+        pins (tuple, optional): The forward PWM pin, the backward PWM pin and the two
+            hall sensor pins. Defaults to those of motor 1 of `pico.TwoWheelPID`.
+        max_speed (float, optional): The speed at full duty, in encoder edges per
+            second. Defaults to 26000.
+        tau (float, optional): The time constant in seconds. Defaults to 0.05.
+        deadband (float, optional): The fraction of full duty below which the motor does
+            not turn. Defaults to 0.05.
+
+    Attributes:
+        speed (float): The speed in encoder edges per second.
+        position (float): The position in encoder edges.
+        edges (int): The edges driven on the hall sensors.
+
+    Example:
+        clock = VirtualClock()
+        hal.set_time_source(clock)
+        board = hal.install(hal.Board())
+        drive = pico.TwoWheelPID(timer_id=None)
+        motor = DCMotor(board, clock)
+        for _ in range(100):
+            drive.control()
+            motor.advance(10000)
+    """
+
+    def __init__(self, board, clock, pins=(7, 6, 4, 5), max_speed=26000.0, tau=0.05,
+                 deadband=0.05) -> None:
+        self.board = board
+        self.clock = clock
+        self.forward, self.backward, self.hall1, self.hall2 = pins
+        self.max_speed = max_speed
+        self.tau = tau
+        self.deadband = deadband
+        self.speed = 0.0
+        self.position = 0.0
+        self.edges = 0
+        self._count = 0
+        self._target = 0.0
+        board.set_input(self.hall1, 0)
+        board.set_input(self.hall2, 0)
+
+    def duty(self):
+        """
+        Returns the duty cycle the motor is driven with.
+
+        Returns:
+            float: The duty as a fraction of full duty, negative backwards.
+        """
+        board = self.board
+        forward = board.pwms[self.forward].duty_u16() if self.forward in board.pwms else 0
+        backward = board.pwms[self.backward].duty_u16() if self.backward in board.pwms else 0
+        return (forward - backward) / 65535
+
+    def advance(self, us, step_us=100):
+        """
+        Runs the motor and advances the clock. Motors sharing a clock run together with
+        `advance`.
+
+        Args:
+            us (int): The time to run, in microseconds.
+            step_us (int, optional): The integration step. Defaults to 100.
+        """
+        advance((self,), us, step_us)
+
+    def _follow_duty(self):
+        duty = self.duty()
+        drive = 0.0 if abs(duty) < self.deadband else duty
+        self._target = drive * self.max_speed
+
+    def _step(self, start_us, dt_us, edges):
+        # Integrates a step and lists the edges crossed at their interpolated times.
+        alpha = 1.0 - math.exp(-dt_us / 1000000 / self.tau)
+        start_speed = self.speed
+        self.speed += (self._target - self.speed) * alpha
+        start = self.position
+        self.position += (start_speed + self.speed) / 2 * dt_us / 1000000
+        end = math.floor(self.position)
+        span = self.position - start
+        count = self._count
+        while count != end:
+            count += 1 if end > count else -1
+            edge = count if end > start else count + 1
+            fraction = (edge - start) / span if span else 1.0
+            edges.append((start_us + max(0, min(dt_us, round(fraction * dt_us))), self, count))
+        self._count = count
+
+    def _drive(self, count):
+        level1, level2 = QUADRATURE[count % 4]
+        self.board.set_input(self.hall1, level1)
+        self.board.set_input(self.hall2, level2)
+        self.edges += 1
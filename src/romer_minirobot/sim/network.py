@@ -0,0 +1,159 @@
+import heapq
+import random
+from errno import EAGAIN, EBADF
+from itertools import count
+
+from ..utils import now_us
+
+
+class VirtualSocket:
+    """
+    An in-memory UDP socket joined to one multicast group of a `VirtualNetwork`.
+
+    It implements the part of the socket interface used by `BaseRTPS`: `sendto`,
+    non-blocking `recvfrom`, `setsockopt`, `setblocking` and `close`. Received datagrams
+    become readable at their arrival time on the clock of `romer_minirobot.utils`.
+
+    Attributes:
+        address (tuple): The (ip address, port) of the socket.
+        group (str): The multicast group the socket has joined.
+        options (dict): The values set with `setsockopt`, by (level, option).
+        inbox (list): A heap of (arrival time, order, data, source address).
+    """
+
+    def __init__(self, network, address, group) -> None:
+        self.network = network
+        self.address = address
+        self.group = group
+        self.options = {}
+        self.inbox = []
+        self.closed = False
+
+    def sendto(self, data, address):
+        if self.closed:
+            raise OSError(EBADF, 'Socket is closed')
+        self.network.send(self, bytes(data), address)
+        return len(data)
+
+    def recvfrom(self, size):
+        if self.closed:
+            raise OSError(EBADF, 'Socket is closed')
+        if self.inbox and self.inbox[0][0] <= now_us():
+            _, _, data, source = heapq.heappop(self.inbox)
+            return data[:size], source
+        raise OSError(EAGAIN, 'No datagram available')
+
+    def setsockopt(self, level, option, value):
+        self.options[(level, option)] = value
+
+    def setblocking(self, flag):
+        pass
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.network.sockets.remove(self)
+
+
+class VirtualNetwork:
+    """
+    An in-memory multicast network for running uRTPS participants in one process.
+
+    Every datagram sent to a group and port is delivered to every socket joined to it,
+    including the sender as with multicast loopback, after `latency` plus a uniformly
+    distributed `jitter` seconds, and dropped with probability `loss` independently for
+    each receiver. The parameters may be changed while a simulation runs.
+
+    Args:
+        latency (float, optional): The one-way delay in seconds. Defaults to 0.002.
+        jitter (float, optional): The maximum additional random delay in seconds.
+            Defaults to 0.
+        loss (float, optional): The probability that a datagram is dropped. Defaults to 0.
+        seed (int, optional): The seed of the random generator, for repeatable runs.
+
+    Attributes:
+        sockets (list): The open `VirtualSocket` objects.
+        sent (int): The number of datagrams sent.
+        delivered (int): The number of datagrams queued to a receiver.
+        dropped (int): The number of datagrams dropped.
+
+    Example:
+        network = VirtualNetwork(latency=0.005, loss=0.1, seed=1)
+        network.attach(urtps)
+    """
+
+    def __init__(self, latency=0.002, jitter=0.0, loss=0.0, seed=None) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.sockets = []
+        self.sent = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.order = count()
+
+    def socket(self, multicast_group, multicast_port):
+        """
+        Creates a socket joined to a multicast group.
+
+        It has the signature of `BaseRTPS._create_multicast_socket`.
+
+        Args:
+            multicast_group (str): The multicast group address.
+            multicast_port (int): The port number.
+
+        Returns:
+            VirtualSocket: The new socket.
+        """
+        address = (f'10.0.0.{len(self.sockets) + 2}', multicast_port)
+        sock = VirtualSocket(self, address, multicast_group)
+        self.sockets.append(sock)
+        return sock
+
+    def attach(self, participant):
+        """
+        Makes a uRTPS participant create its socket on this network when it connects.
+
+        Args:
+            participant (BaseRTPS): The participant, before it is started.
+
+        Returns:
+            BaseRTPS: The participant.
+        """
+        participant._create_multicast_socket = self.socket
+        return participant
+
+    def send(self, source, data, address):
+        """
+        Queues a datagram to every socket joined to its group and port.
+
+        Args:
+            source (VirtualSocket): The sending socket.
+            data (bytes): The datagram.
+            address (tuple): The (multicast group, port) it is sent to.
+        """
+        self.sent += 1
+        time = now_us()
+        group, port = address
+        for sock in self.sockets:
+            if sock.group != group or sock.address[1] != port:
+                continue
+            if self.loss and self.random.random() < self.loss:
+                self.dropped += 1
+                continue
+            delay = self.latency
+            if self.jitter:
+                delay += self.random.uniform(0, self.jitter)
+            heapq.heappush(sock.inbox, (time + int(delay * 1000000), next(self.order),
+                                        data, source.address))
+            self.delivered += 1
+
+    def stats(self):
+        """
+        Returns the datagram counters of the network.
+
+        Returns:
+            dict: sent, delivered and dropped datagrams.
+        """
+        return {'sent': self.sent, 'delivered': self.delivered, 'dropped': self.dropped}
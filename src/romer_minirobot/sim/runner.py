@@ -0,0 +1,219 @@
+import asyncio
+import math
+import selectors
+
+from ..utils import clock
+from . import hal
+from .hal import utime as hal_utime
+from .network import VirtualNetwork
+
+
+class VirtualClock:
+    """
+    A clock that only moves when it is advanced.
+
+    Args:
+        start_us (int, optional): The initial time in microseconds. Defaults to 0.
+
+    Attributes:
+        time_us (int): The current time in microseconds.
+    """
+
+    def __init__(self, start_us=0) -> None:
+        self.time_us = start_us
+
+    def __call__(self):
+        return self.time_us
+
+    def advance(self, us):
+        """
+        Moves the clock forward.
+
+        Args:
+            us (int): The number of microseconds to advance.
+        """
+        self.time_us += us
+
+
+class _VirtualSelector(selectors.BaseSelector):
+    """
+    A selector that advances the virtual clock instead of waiting for I/O.
+
+    The event loop asks for the time until its next timer. If callbacks are ready the
+    timeout is 0 and the clock advances by one scheduling step; otherwise it jumps
+    straight to the timer.
+    """
+
+    def __init__(self, clock, step_us) -> None:
+        self.clock = clock
+        self.step_us = step_us
+        self.keys = {}
+
+    def register(self, fileobj, events, data=None):
+        fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        key = self.keys[fileobj] = selectors.SelectorKey(fileobj, fd, events, data)
+        return key
+
+    def unregister(self, fileobj):
+        return self.keys.pop(fileobj)
+
+    def select(self, timeout=None):
+        if timeout is None or timeout <= 0:
+            self.clock.advance(self.step_us)
+        else:
+            self.clock.advance(max(self.step_us, math.ceil(timeout * 1000000)))
+        return []
+
+    def get_map(self):
+        return self.keys
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """
+    An asyncio event loop running on a `VirtualClock`.
+
+    Every pass over the ready callbacks costs `step_us` of virtual time, so tasks that
+    poll with `asyncio.sleep(0)` see time pass as on a busy microcontroller, while
+    sleeping tasks make the clock jump to their wake-up time. No real time is waited.
+
+    Args:
+        clock (VirtualClock): The clock of the loop.
+        step_us (int, optional): The virtual duration of one scheduling pass in
+            microseconds. Defaults to 1000.
+    """
+
+    def __init__(self, clock, step_us=1000) -> None:
+        super().__init__(_VirtualSelector(clock, step_us))
+        self.clock = clock
+
+    def time(self):
+        return self.clock.time_us / 1000000
+
+
+class Simulation:
+    """
+    A discrete-event runner for uRTPS participants, nodes and an in-memory network.
+
+    Creating a simulation switches the clock of `romer_minirobot.utils`, which every node
+    and uRTPS loop reads, and of the emulated Pico hardware to a `VirtualClock`. The
+    participants run on a `VirtualEventLoop` and exchange datagrams over a
+    `VirtualNetwork`, so a scenario runs as fast as the CPU allows and gives the same
+    result on every run with the same seed.
+
+    Emulated boards should be created after the simulation, so that they start at its
+    clock. `start_us` = `TICKS_PERIOD` * 1000 minus a few seconds makes `ticks_ms` and
+    `ticks_us` wrap around early in the run.
+
+    Args:
+        step_us (int, optional): The virtual duration of one scheduling pass in
+            microseconds. Defaults to 1000.
+        start_us (int, optional): The initial time of the clock. Defaults to 0.
+        network (VirtualNetwork, optional): The network of the participants. Defaults to
+            a new network with the default parameters.
+
+    Attributes:
+        clock (VirtualClock): The virtual clock.
+        loop (VirtualEventLoop): The event loop running the participants.
+        network (VirtualNetwork): The network of the participants.
+        tasks (list): The tasks started with `add` and `add_task`.
+
+    Example:
+        sim = Simulation(network=VirtualNetwork(latency=0.005, seed=1))
+        pc = sim.add(uRTPS(debug='ERROR'))
+        sim.call_at(60, print, 'one minute')
+        sim.run(600)
+        sim.close()
+    """
+
+    def __init__(self, step_us=1000, start_us=0, network=None) -> None:
+        self.clock = VirtualClock(start_us)
+        self.network = network or VirtualNetwork()
+        self.loop = VirtualEventLoop(self.clock, step_us)
+        self.start_us = start_us
+        self.tasks = []
+        hal.set_time_source(self.clock)
+        hal_utime.reset_ticks()
+        hal.current_board().start_us = start_us
+
+    @property
+    def time(self):
+        """
+        float: The simulated time since the start, in seconds.
+        """
+        return (self.clock.time_us - self.start_us) / 1000000
+
+    def add(self, participant):
+        """
+        Connects a uRTPS participant to the network and starts it.
+
+        Args:
+            participant (BaseRTPS): The participant, with its topics added.
+
+        Returns:
+            BaseRTPS: The participant.
+        """
+        self.network.attach(participant)
+        self.add_task(participant._main())
+        return participant
+
+    def add_task(self, coro):
+        """
+        Runs a coroutine on the virtual event loop.
+
+        Args:
+            coro (coroutine): The coroutine, e.g. a scenario that sleeps with
+                `asyncio.sleep` between its steps.
+
+        Returns:
+            asyncio.Task: The task.
+        """
+        task = self.loop.create_task(coro)
+        self.tasks.append(task)
+        return task
+
+    def call_at(self, time, callback, *args):
+        """
+        Calls a function at a simulated time.
+
+        Args:
+            time (float): The time since the start, in seconds.
+            callback (callable): The function to call.
+            *args: The arguments of the function.
+
+        Returns:
+            asyncio.TimerHandle: The handle to cancel the call.
+        """
+        return self.loop.call_at(self.start_us / 1000000 + time, callback, *args)
+
+    def run(self, duration):
+        """
+        Advances the simulation.
+
+        Args:
+            duration (float): The simulated time to run, in seconds.
+
+        Raises:
+            Exception: The exception of a task that failed.
+        """
+        self.loop.run_until_complete(asyncio.sleep(duration))
+        for task in self.tasks:
+            if task.done() and not task.cancelled() and task.exception():
+                raise task.exception()
+
+    def close(self):
+        """
+        Cancels the tasks, closes the loop and restores the wall clock.
+        """
+        for task in self.tasks:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*self.tasks, return_exceptions=True))
+        self.loop.close()
+        hal.set_time_source(None)
+        hal_utime.reset_ticks()
+        hal.current_board().start_us = clock.now_us()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,8 @@
+from ..utils import is_running_on_pico
+
+if is_running_on_pico():
+    raise ImportError("This module not available on Raspberry Pi Pico.")
+
+from .trafficlog import TrafficLogWriter, TrafficLogReader
+
+from .pidtune import PIDTuner, step_metrics
\ No newline at end of file
@@ -0,0 +1,191 @@
+import math
+
+from ..sim import hal, DCMotor
+from ..sim.runner import VirtualClock
+
+
+def step_metrics(times, values, target, settle=0.02):
+    """
+    Measures a step response from zero to a target.
+
+    Args:
+        times (list): The times of the samples in seconds, from the step.
+        values (list): The response at each time.
+        target (float): The value stepped to, not zero.
+        settle (float, optional): The band around the target the response settles in,
+            as a fraction of the target. Defaults to 0.02.
+
+    Returns:
+        dict: The `rise_time` from 10% to 90% of the target and the `settling_time`
+            after which the response stays in the band, in seconds, None if it does not
+            get there; the `overshoot` as a fraction of the target; and the
+            `steady_state_error`, the mean error over the last tenth of the samples as a
+            fraction of the target.
+    """
+    sign = 1 if target > 0 else -1
+    low = high = None
+    for time, value in zip(times, values):
+        if low is None and value * sign >= 0.1 * abs(target):
+            low = time
+        if value * sign >= 0.9 * abs(target):
+            high = time
+            break
+    rise_time = high - low if low is not None and high is not None else None
+
+    overshoot = max(0.0, max(value * sign for value in values) / abs(target) - 1)
+
+    settling_time = 0.0
+    for time, value in zip(times, values):
+        if abs(value - target) > settle * abs(target):
+            settling_time = None
+        elif settling_time is None:
+            settling_time = time
+    tail = values[-max(1, len(values) // 10):]
+    steady_state_error = (target - sum(tail) / len(tail)) / target
+    return {
+        'rise_time': rise_time,
+        'overshoot': overshoot,
+        'settling_time': settling_time,
+        'steady_state_error': steady_state_error,
+    }
+
+
+class PIDTuner:
+    """
+    Tunes the gains of `pico.TwoWheelPID` against a model of its motors.
+
+    Each response runs the firmware itself on emulated hardware and virtual time: a new
+    `pico.TwoWheelPID` without timer, its control loop stepped every period, and a
+    `sim.DCMotor` on the pins of the first wheel, whose encoder edges reach the firmware
+    through the interrupts of the hall sensors. The speed reference is stepped from rest
+    and the speed of the motor recorded at each step.
+
+    `tune` searches the gains on a logarithmic scale with a pattern search, minimising
+    the integral of the time-weighted absolute error plus a penalty on the overshoot.
+
+    The emulated hardware is installed, and the time source is the virtual clock while a
+    response runs, then the wall clock again.
+
+    Args:
+        ref_speed (float, optional): The speed stepped to, 1 being 26 edges per
+            millisecond. Defaults to 0.5.
+        duration (float, optional): The time of a response in seconds. Defaults to 1.
+        period_us (int, optional): The period of the control loop. Defaults to 10000.
+        overshoot_weight (float, optional): The cost of an overshoot of the whole
+            target, relative to that of the error. Defaults to 1.
+        **motor: The parameters of the `sim.DCMotor`.
+
+    Attributes:
+        evaluations (int): The responses run.
+
+    Example:
+        tuner = PIDTuner(ref_speed=0.5, tau=0.08)
+        prop, integ = tuner.tune()
+        print(step_metrics(*tuner.response(prop, integ), 0.5))
+        robot.TwoWheelPID().set_gains(prop, integ)
+    """
+
+    def __init__(self, ref_speed=0.5, duration=1.0, period_us=10000, overshoot_weight=1.0,
+                 **motor) -> None:
+        self.ref_speed = ref_speed
+        self.duration = duration
+        self.period_us = period_us
+        self.overshoot_weight = overshoot_weight
+        self.motor = motor
+        self.evaluations = 0
+
+    def response(self, prop, integ):
+        """
+        Runs a step response with the given gains.
+
+        Args:
+            prop (float): The proportional gain.
+            integ (float): The integral gain.
+
+        Returns:
+            tuple: The times of the steps in seconds, and the speed of the motor at each,
+                in the units of the reference.
+        """
+        hal.install(hal.current_board())
+        # Imported once the emulated machine module is installed.
+        from ..modules.pico.twoWheelPID import TwoWheelPID, PI
+
+        clock = VirtualClock()
+        hal.set_time_source(clock)
+        hal.utime.reset_ticks()
+        try:
+            with hal.Board() as board:
+                drive = TwoWheelPID(period_us=self.period_us, timer_id=None)
+                motor = DCMotor(board, clock, **self.motor)
+                drive.set_gains(prop, integ)
+                drive.pi1.set_ref_speed(self.ref_speed)
+                scale = PI.COUNTS * 1000
+                times, speeds = [], []
+                for step in range(int(self.duration * 1000000) // self.period_us):
+                    drive.control()
+                    motor.advance(self.period_us)
+                    times.append((step + 1) * self.period_us / 1000000)
+                    speeds.append(motor.speed / scale)
+                drive.stop()
+        finally:
+            hal.set_time_source(None)
+            hal.utime.reset_ticks()
+        self.evaluations += 1
+        return times, speeds
+
+    def cost(self, prop, integ):
+        """
+        Returns the cost of a step response with the given gains.
+
+        Args:
+            prop (float): The proportional gain.
+            integ (float): The integral gain.
+
+        Returns:
+            float: The integral of the time times the absolute error, as a fraction of
+                the reference, plus the weighted overshoot.
+        """
+        times, speeds = self.response(prop, integ)
+        target = self.ref_speed
+        dt = self.period_us / 1000000
+        itae = sum(time * abs(target - speed) for time, speed in zip(times, speeds)) * dt
+        overshoot = max(0.0, max(speed / target for speed in speeds) - 1)
+        return itae / abs(target) + self.overshoot_weight * overshoot * self.duration ** 2 / 2
+
+    def tune(self, prop=10000, integ=1000, step=4.0, tolerance=1.05, max_evaluations=100):
+        """
+        Searches the gains that minimise the cost.
+
+        From the starting gains, each gain is multiplied and divided by the step in turn,
+        keeping any change that lowers the cost; when none does, the step is reduced to
+        its square root, until it is below the tolerance.
+
+        Args:
+            prop (float, optional): The starting proportional gain. Defaults to 10000.
+            integ (float, optional): The starting integral gain. Defaults to 1000.
+            step (float, optional): The starting factor of a move. Defaults to 4.
+            tolerance (float, optional): The factor at which the search stops.
+                Defaults to 1.05.
+            max_evaluations (int, optional): The most responses to run. Defaults to 100.
+
+        Returns:
+            tuple: The proportional and integral gains found.
+        """
+        gains = [math.log(prop), math.log(integ)]
+        best = self.cost(prop, integ)
+        evaluations = 1
+        move = math.log(step)
+        while move > math.log(tolerance) and evaluations < max_evaluations:
+            improved = False
+            for i in range(2):
+                for direction in (1, -1):
+                    trial = list(gains)
+                    trial[i] += direction * move
+                    cost = self.cost(math.exp(trial[0]), math.exp(trial[1]))
+                    evaluations += 1
+                    if cost < best:
+                        best, gains, improved = cost, trial, True
+                        break
+            if not improved:
+                move /= 2
+        return math.exp(gains[0]), math.exp(gains[1])
@@ -0,0 +1,396 @@
+import mmap
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from time import time
+
+MAGIC = b'RMTL'
+VERSION = 1
+
+# magic, version, flags, footer offset (0 until the writer is closed)
+HEADER = struct.Struct('<4sHHQ')
+# stamp, topic id, payload length
+RECORD = struct.Struct('<dHI')
+# number of topics, number of time index entries
+FOOTER = struct.Struct('<II')
+# number of samples, topic id, name length
+TOPIC = struct.Struct('<IHH')
+
+TOPIC_DEFINITION = 0xFFFF
+
+
+def _padding(offset):
+    return -offset % 8
+
+
+class TrafficLogWriter:
+    """
+    Records uRTPS traffic into an indexed binary log.
+
+    Every sample is appended as a fixed header (timestamp, topic id, length) followed by
+    the raw payload. Topic names are declared in-stream the first time they are seen, so a
+    log that was never closed can still be read back. On `close` a footer is appended
+    holding a sparse time index (one entry every `index_interval` records) and, for every
+    topic, the offsets and timestamps of its samples.
+
+    Args:
+        path (str): The path of the log file to create.
+        index_interval (int, optional): Number of records between time index entries.
+            Defaults to 256.
+
+    Attributes:
+        path (str): The path of the log file.
+        index_interval (int): Number of records between time index entries.
+        count (int): The number of samples written so far.
+
+    Example:
+        with TrafficLogWriter('run.rmtl') as log:
+            urtps.set_recorder(log)
+            urtps.start()
+    """
+
+    def __init__(self, path, index_interval=256) -> None:
+        self.path = path
+        self.index_interval = index_interval
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        self.offset = HEADER.size
+        self.count = 0
+        self.last_stamp = 0.0
+        self.topic_ids = {}
+        self.topic_offsets = []
+        self.topic_stamps = []
+        self.index_stamps = array('d')
+        self.index_offsets = array('Q')
+        self._lock = threading.Lock()
+
+    def _append(self, stamp, topic_id, payload):
+        self.file.write(RECORD.pack(stamp, topic_id, len(payload)))
+        self.file.write(payload)
+        offset = self.offset
+        self.offset += RECORD.size + len(payload)
+        return offset
+
+    def _topic_id(self, topic):
+        topic_id = self.topic_ids.get(topic)
+        if topic_id is None:
+            topic_id = len(self.topic_ids)
+            if topic_id >= TOPIC_DEFINITION:
+                raise ValueError('Too many topics in one traffic log.')
+            self.topic_ids[topic] = topic_id
+            self.topic_offsets.append(array('Q'))
+            self.topic_stamps.append(array('d'))
+            self._append(self.last_stamp, TOPIC_DEFINITION,
+                         struct.pack('<H', topic_id) + topic.encode())
+        return topic_id
+
+    def write(self, topic, payload, stamp=None):
+        """
+        Appends a sample to the log.
+
+        Timestamps are expected to be non-decreasing; a stamp older than the previous one
+        is clamped to it so the time index stays sorted.
+
+        Args:
+            topic (str): The name of the topic.
+            payload (str|bytes): The message of the sample.
+            stamp (float, optional): The time of the sample in seconds. Defaults to the
+                current time.
+        """
+        if isinstance(payload, str):
+            payload = payload.encode()
+        if stamp is None:
+            stamp = time()
+        with self._lock:
+            stamp = max(stamp, self.last_stamp)
+            self.last_stamp = stamp
+            topic_id = self._topic_id(topic)
+            offset = self._append(stamp, topic_id, payload)
+            if self.count % self.index_interval == 0:
+                self.index_stamps.append(stamp)
+                self.index_offsets.append(offset)
+            self.topic_offsets[topic_id].append(offset)
+            self.topic_stamps[topic_id].append(stamp)
+            self.count += 1
+
+    def close(self):
+        """
+        Writes the index footer and closes the log file.
+        """
+        with self._lock:
+            if self.file.closed:
+                return
+            self.file.write(bytes(_padding(self.offset)))
+            footer = self.offset + _padding(self.offset)
+            self.file.write(FOOTER.pack(len(self.topic_ids), len(self.index_stamps)))
+            self.file.write(self.index_stamps.tobytes())
+            self.file.write(self.index_offsets.tobytes())
+            for topic, topic_id in self.topic_ids.items():
+                name = topic.encode()
+                self.file.write(TOPIC.pack(len(self.topic_stamps[topic_id]), topic_id, len(name)))
+                self.file.write(name + bytes(_padding(len(name))))
+                self.file.write(self.topic_offsets[topic_id].tobytes())
+                self.file.write(self.topic_stamps[topic_id].tobytes())
+            self.file.seek(0)
+            self.file.write(HEADER.pack(MAGIC, VERSION, 0, footer))
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrafficLogReader:
+    """
+    Memory-maps a traffic log written by `TrafficLogWriter` for random access.
+
+    The index in the footer is used in place: timestamps and offsets are exposed as
+    views into the mapping, so opening a log costs the same regardless of its length.
+    Seeking to a timestamp is a binary search over the sparse time index followed by a
+    scan of at most `index_interval` records, and iterating a topic only touches the
+    records of that topic. A log whose writer was never closed has no footer; its index
+    is then rebuilt with one pass over the records.
+
+    Payloads are returned as memoryviews into the mapping. They, and the arrays returned
+    by `timestamps` and `to_numpy`, must be released before the reader is closed.
+
+    Args:
+        path (str): The path of the log file.
+
+    Attributes:
+        path (str): The path of the log file.
+        topics (list): The names of the topics in the log.
+
+    Example:
+        with TrafficLogReader('run.rmtl') as log:
+            for stamp, payload in log.iter_topic('battery', start=log.start_time + 60):
+                print(stamp, bytes(payload))
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        magic, version, _, footer = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a version {VERSION} traffic log.')
+        self.topic_names = {}
+        self.topic_offsets = {}
+        self.topic_stamps = {}
+        if footer:
+            self.end = footer
+            self._load_index(footer)
+        else:
+            self.end = len(self.map)
+            self._rebuild_index()
+        self.topic_ids = {name: topic_id for topic_id, name in self.topic_names.items()}
+
+    def _cast(self, offset, count, fmt):
+        return self.view[offset:offset + 8 * count].cast(fmt)
+
+    def _load_index(self, offset):
+        n_topics, n_index = FOOTER.unpack_from(self.map, offset)
+        offset += FOOTER.size
+        self.index_stamps = self._cast(offset, n_index, 'd')
+        offset += 8 * n_index
+        self.index_offsets = self._cast(offset, n_index, 'Q')
+        offset += 8 * n_index
+        for _ in range(n_topics):
+            count, topic_id, name_len = TOPIC.unpack_from(self.map, offset)
+            offset += TOPIC.size
+            self.topic_names[topic_id] = bytes(self.map[offset:offset + name_len]).decode()
+            offset += name_len + _padding(name_len)
+            self.topic_offsets[topic_id] = self._cast(offset, count, 'Q')
+            offset += 8 * count
+            self.topic_stamps[topic_id] = self._cast(offset, count, 'd')
+            offset += 8 * count
+
+    def _rebuild_index(self):
+        self.index_stamps = array('d')
+        self.index_offsets = array('Q')
+        count = 0
+        offset = HEADER.size
+        while offset + RECORD.size <= self.end:
+            stamp, topic_id, length = RECORD.unpack_from(self.map, offset)
+            if offset + RECORD.size + length > self.end:
+                break
+            if topic_id == TOPIC_DEFINITION:
+                start = offset + RECORD.size
+                (defined_id,) = struct.unpack_from('<H', self.map, start)
+                self.topic_names[defined_id] = bytes(self.map[start + 2:start + length]).decode()
+                self.topic_offsets[defined_id] = array('Q')
+                self.topic_stamps[defined_id] = array('d')
+            else:
+                if count % 256 == 0:
+                    self.index_stamps.append(stamp)
+                    self.index_offsets.append(offset)
+                self.topic_offsets[topic_id].append(offset)
+                self.topic_stamps[topic_id].append(stamp)
+                count += 1
+            offset += RECORD.size + length
+        self.end = offset
+
+    @property
+    def topics(self):
+        return list(self.topic_ids)
+
+    @property
+    def start_time(self):
+        return self.index_stamps[0] if len(self.index_stamps) else None
+
+    @property
+    def end_time(self):
+        stamps = [s[-1] for s in self.topic_stamps.values() if len(s)]
+        return max(stamps) if stamps else None
+
+    def __len__(self):
+        return sum(len(s) for s in self.topic_stamps.values())
+
+    def seek(self, stamp):
+        """
+        Finds the first record at or after the given time.
+
+        Args:
+            stamp (float): The time to seek to, in seconds.
+
+        Returns:
+            int: The file offset of the record, or the end of the records if none is later.
+        """
+        i = bisect_left(self.index_stamps, stamp)
+        offset = self.index_offsets[i - 1] if i else HEADER.size
+        while offset + RECORD.size <= self.end:
+            record_stamp, topic_id, length = RECORD.unpack_from(self.map, offset)
+            if record_stamp >= stamp and topic_id != TOPIC_DEFINITION:
+                break
+            offset += RECORD.size + length
+        return offset
+
+    def read(self, start=None, end=None):
+        """
+        Iterates over all samples in time order.
+
+        Args:
+            start (float, optional): Skip samples before this time.
+            end (float, optional): Stop at the first sample at or after this time.
+
+        Yields:
+            tuple: (stamp, topic, payload) where payload is a memoryview.
+        """
+        offset = self.seek(start) if start is not None else HEADER.size
+        while offset + RECORD.size <= self.end:
+            stamp, topic_id, length = RECORD.unpack_from(self.map, offset)
+            if end is not None and stamp >= end:
+                return
+            offset += RECORD.size
+            if topic_id != TOPIC_DEFINITION:
+                yield stamp, self.topic_names[topic_id], self.view[offset:offset + length]
+            offset += length
+
+    def _range(self, topic, start, end):
+        try:
+            topic_id = self.topic_ids[topic]
+        except KeyError:
+            raise KeyError(f'No topic named {topic} in {self.path}.') from None
+        stamps = self.topic_stamps[topic_id]
+        first = bisect_left(stamps, start) if start is not None else 0
+        last = bisect_left(stamps, end) if end is not None else len(stamps)
+        return topic_id, first, last
+
+    def iter_topic(self, topic, start=None, end=None):
+        """
+        Iterates over the samples of one topic without visiting other records.
+
+        Args:
+            topic (str): The name of the topic.
+            start (float, optional): Skip samples before this time.
+            end (float, optional): Stop at the first sample at or after this time.
+
+        Yields:
+            tuple: (stamp, payload) where payload is a memoryview.
+        """
+        topic_id, first, last = self._range(topic, start, end)
+        offsets = self.topic_offsets[topic_id]
+        stamps = self.topic_stamps[topic_id]
+        for i in range(first, last):
+            offset = offsets[i]
+            _, _, length = RECORD.unpack_from(self.map, offset)
+            offset += RECORD.size
+            yield stamps[i], self.view[offset:offset + length]
+
+    def timestamps(self, topic, start=None, end=None):
+        """
+        Returns the timestamps of a topic as a NumPy array.
+
+        For a closed log the array is a view into the mapped index; no data is copied.
+
+        Args:
+            topic (str): The name of the topic.
+            start (float, optional): Skip samples before this time.
+            end (float, optional): Drop samples at or after this time.
+
+        Returns:
+            numpy.ndarray: The float64 timestamps in seconds.
+        """
+        np = _numpy()
+        topic_id, first, last = self._range(topic, start, end)
+        return np.frombuffer(self.topic_stamps[topic_id], dtype=np.float64)[first:last]
+
+    def to_numpy(self, topic, dtype=float, binary=False, start=None, end=None):
+        """
+        Exports the samples of a topic as NumPy arrays.
+
+        Text payloads such as '0.5,0.2' are parsed into one row per sample. With
+        `binary=True` each payload is interpreted as packed values of `dtype`. The
+        timestamps are a view into the mapping; the values are always a new array.
+
+        Args:
+            topic (str): The name of the topic.
+            dtype (numpy.dtype, optional): The type of the values. Defaults to float.
+            binary (bool, optional): Whether payloads are packed binary. Defaults to False.
+            start (float, optional): Skip samples before this time.
+            end (float, optional): Drop samples at or after this time.
+
+        Returns:
+            tuple: (stamps, values) as NumPy arrays.
+        """
+        np = _numpy()
+        stamps = self.timestamps(topic, start, end)
+        payloads = [payload for _, payload in self.iter_topic(topic, start, end)]
+        if binary:
+            rows = [np.frombuffer(payload, dtype=dtype) for payload in payloads]
+            values = np.stack(rows) if rows else np.empty((0, 0), dtype=dtype)
+        else:
+            rows = [bytes(payload).decode().split(',') for payload in payloads]
+            values = np.array(rows, dtype=dtype)
+            if values.ndim == 2 and values.shape[1] == 1:
+                values = values[:, 0]
+        return stamps, values
+
+    def close(self):
+        """
+        Releases the mapping and closes the log file.
+        """
+        self.topic_offsets = self.topic_stamps = {}
+        self.index_stamps = self.index_offsets = array('d')
+        self.view.release()
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy is required for array export: pip install numpy") from None
+    return numpy
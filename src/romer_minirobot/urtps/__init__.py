@@ -8,4 +8,12 @@ if is_running_on_pico():
 else:
     from .urtps import uRTPS
 
-from .node import Node, EventPubNode, EventSubNode, BlockingNode, BaseNode
\ No newline at end of file
+from .node import Node, EventPubNode, EventSubNode, BlockingNode, BaseNode, BINARY
+from .clocksync import ClockSync, PeerClock
+from .linkmonitor import Heartbeat, LinkMonitor, PeerLink
+from .ratecontrol import AIMD, RateControl, TopicRate
+from .sendqueue import SendQueue, CONTROL, TELEMETRY, BULK
+from .transport import Transport, MulticastTransport, InProcessTransport
+
+if not is_running_on_pico():
+    from .shmtransport import SharedMemoryTransport
\ No newline at end of file
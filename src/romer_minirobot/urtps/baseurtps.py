@@ -1,9 +1,20 @@
+import os
 import socket
 import struct
 import asyncio
-from errno import EAGAIN
-from ..utils import Logger
+from binascii import hexlify
+from errno import EAGAIN, ENOBUFS, ENOMEM
+from ..utils import Logger, now_us, micropython
 from .node import Node
+from .clocksync import ClockSync, SYNC_TOPIC
+from .linkmonitor import Heartbeat, LinkMonitor, HEARTBEAT_TOPIC, SEQUENCE_MOD
+from .ratecontrol import RateControl
+from .sendqueue import SendQueue
+from .transport import MulticastTransport
+
+# The most frames dispatched in one pass of the subscription task before it yields, so
+# a flood of frames does not starve the other tasks.
+RECEIVE_BURST = 64
 
 
 class BaseRTPS:
@@ -27,15 +38,29 @@ class BaseRTPS:
         ip_address (str): The IP address of the local machine.
         publishing_topics (Dict): A dictionary of topics to publish to.
         subscribing_topics (Dict): A dictionary of topics to subscribe to.
+        recorder (TrafficLogWriter): Records the sent and received traffic, if set.
+        peer_id (str): A random id sent with every frame to identify this participant.
+        clock_sync (ClockSync): Estimates the clock offset of the other participants.
+        heartbeat (Heartbeat): Publishes a periodic heartbeat on the '_hb' topic.
+        link_monitor (LinkMonitor): Tracks loss, jitter and liveness of the other participants.
+        sequence (int): The sequence number of the last frame sent.
+        rate_control (RateControl): Adapts the send rate of declared topics to congestion.
+        send_queue (SendQueue): Orders outgoing frames by the traffic class of their topic.
+        mark_tos (bool): Whether packets are marked with the IP_TOS of their traffic class.
+        transport (Transport): Carries the frames to the other participants.
 
     Methods:
-        __init__(multicast_group, multicast_port, debug='DEBUG'):
+        __init__(multicast_group, multicast_port, debug='DEBUG', transport=None):
             Initialize the uRTPS base class.
         set_topics(publishing_topics, subscribing_topics):
             Set the publishing and subscribing topics for the uRTPS interface.
+        set_recorder(recorder):
+            Record the sent and received traffic.
+        set_rate(topic, min_rate, max_rate, critical):
+            Declare the rate bounds of a publishing topic.
     """
 
-    def __init__(self, multicast_group: str, multicast_port: int, debug='DEBUG') -> None:
+    def __init__(self, multicast_group: str, multicast_port: int, debug='DEBUG', transport=None) -> None:
         """
         Initialize the uRTPS base class.
 
@@ -47,6 +72,8 @@ class BaseRTPS:
             debug (str, optional): The debug level. Defaults to 'DEBUG'.
                 Specifies the level of debug information to be printed.
                 Valid values are 'DEBUG', 'INFO', 'WARNING', 'ERROR', and 'CRITICAL'.
+            transport (Transport, optional): Carries the frames to the other participants.
+                Defaults to a `MulticastTransport` on the socket created by `connect`.
 
         Returns:
             None
@@ -64,6 +91,19 @@ class BaseRTPS:
         self.ip_address = None
         self.publishing_topics = {}
         self.subscribing_topics = {}
+        self.recorder = None
+        self.peer_id = hexlify(os.urandom(3)).decode()
+        self.clock_sync = ClockSync(self.peer_id)
+        self.link_monitor = LinkMonitor(self.clock_sync)
+        self.heartbeat = Heartbeat(link_monitor=self.link_monitor)
+        self.rate_control = RateControl()
+        self.send_queue = SendQueue()
+        self.mark_tos = True
+        self.tos_class = None
+        self.sequence = 0
+        # Frames with a header that is not this protocol's, e.g. of another application.
+        self.bad_frames = 0
+        self.transport = transport or MulticastTransport()
 
     def set_topics(self, publishing_topics, subscribing_topics):
         """
@@ -75,6 +115,36 @@ class BaseRTPS:
         """
         self.publishing_topics = publishing_topics
         self.subscribing_topics = subscribing_topics
+
+    def set_recorder(self, recorder):
+        """
+        Set a recorder for the traffic of the URTPS interface.
+
+        Every received message and every published message is passed to
+        `recorder.write(topic, message)`.
+
+        Args:
+            recorder (TrafficLogWriter): The recorder, or None to stop recording.
+        """
+        self.recorder = recorder
+
+    def set_rate(self, topic, min_rate=1.0, max_rate=None, critical=False):
+        """
+        Declare the rate bounds of a publishing topic.
+
+        The topic is then sent at most `max_rate` times per second, and slowed down to no
+        less than `min_rate` when the peers report loss. Critical topics stay at
+        `max_rate`.
+
+        Args:
+            topic (str): The name of the topic.
+            min_rate (float, optional): The lowest rate in messages per second. Defaults to 1.
+            max_rate (float, optional): The highest rate in messages per second, None for
+                unlimited. Defaults to None.
+            critical (bool, optional): Keep the topic at `max_rate` regardless of
+                congestion. Defaults to False.
+        """
+        self.rate_control.set_rate(topic, min_rate, max_rate, critical)
     
     def add_topics(self, topics: Node|list|tuple):
         """
@@ -162,38 +232,152 @@ class BaseRTPS:
 
     async def _handle_subscribe(self):
         """
-        Handles subscriptions by continuously receiving data from the socket and updating subscribing topics.
+        Handles subscriptions by continuously receiving frames from the transport and updating subscribing topics.
 
-        This method runs in an infinite loop and continuously receives data from the socket. It decodes the received data
-        and updates the subscribing topics based on the decoded message.
-
-        Raises:
-            OSError: If there is an error receiving data from the socket.
+        This method runs in an infinite loop and continuously polls the transport for decoded frames
+        and updates the subscribing topics based on the decoded message. Each pass dispatches
+        the frames waiting, up to `RECEIVE_BURST`, so frames do not pile up in the transport
+        while the other tasks run.
 
         """
         self.logger.debug('Started handling subscriptions.')
+        # Formatting every frame for the log costs more than dispatching it.
+        debug = self.logger.loglevel == Logger._DEBUG
         
         while True:
             await asyncio.sleep(0)
             try:
-                data, address = self.sock.recvfrom(1024)
-                self.logger.debug(f"Received {len(data)} bytes from {address}: {data.decode()}")
-                decoded = Node.decode(data) 
-                if self.subscribing_topics.get(decoded[0]):
-                    self.subscribing_topics[decoded[0]].set_message(decoded[-1])
+                for _ in range(RECEIVE_BURST):
+                    received = self.transport.receive()
+                    if received is None:
+                        break
+                    received_time = now_us()
+                    if debug:
+                        self.logger.debug(f"Received from {received[1]}: {received[0]}")
+                    self._dispatch(received[0], received_time)
+            except OSError as e:
+                self.logger.error(f"Error receiving data: {e}")
+
+    @micropython.native
+    def _dispatch(self, decoded, received_time):
+        """
+        Passes a decoded frame to the subscribing topic it is addressed to.
+
+        Frames sent by this participant are dropped, as are frames with a sequence number
+        or stamp that is not a number, which are counted in `bad_frames`. Every other
+        frame is accounted for by the link monitor, and '_sync' and '_hb' frames are consumed here. The topic is
+        stamped with the send time of the frame converted to the local clock, or with the
+        receive time while the sender is not synchronized, before the message is set, so
+        `set_message` can use the stamp of the message it takes.
+
+        Args:
+            decoded (list): The decoded frame, see `Node.decode`.
+            received_time (int): The time the frame was received, in microseconds.
+        """
+        peer = sent_time = None
+        if len(decoded) == 5:
+            peer = decoded[1]
+            if peer == self.peer_id:
+                return
+            try:
+                sequence = int(decoded[2])
+                stamp = int(decoded[3])
+            except ValueError:
+                self.bad_frames += 1
+                return
+            self.link_monitor.received(peer, sequence, stamp, received_time, decoded[0])
+            if decoded[0] == SYNC_TOPIC:
+                self.clock_sync.handle(peer, stamp, received_time, decoded[-1])
+                return
+            if decoded[0] == HEARTBEAT_TOPIC:
+                loss = self.link_monitor.heartbeat(peer, decoded[-1]).get(self.peer_id)
+                if loss is not None:
+                    self.rate_control.feedback(peer, loss)
+                return
+            sent_time = self.clock_sync.to_local(peer, stamp)
+
+        if self.recorder:
+            self.recorder.write(decoded[0], decoded[-1])
+        topic = self.subscribing_topics.get(decoded[0])
+        if topic:
+            if sent_time is None:
+                topic.stamp = received_time
+                topic.latency = None
+            else:
+                topic.stamp = sent_time
+                topic.latency = received_time - sent_time
+            topic.set_message(decoded[-1])
+
+    def _set_tos(self, traffic_class):
+        """
+        Marks the following packets with the IP_TOS of a traffic class.
+
+        Args:
+            traffic_class (str): The traffic class of the next frame.
+        """
+        self.tos_class = traffic_class
+        if self.mark_tos:
+            self.transport.set_traffic_class(traffic_class)
+
+    def _send_queued(self):
+        """
+        Sends the queued frames in the order chosen by the send queue.
+
+        Each frame gets its sequence number and send stamp just before it is sent, so
+        frames dropped from the queue do not count as lost. When the socket runs out of
+        buffers the remaining frames stay queued for the next round.
+        """
+        while True:
+            entry = self.send_queue.peek()
+            if entry is None:
+                return
+            traffic_class, topic, payload = entry
+            if traffic_class != self.tos_class:
+                self._set_tos(traffic_class)
+            sequence = (self.sequence + 1) % SEQUENCE_MOD
+            header = (self.peer_id, str(sequence), str(now_us()))
+            try:
+                self.transport.send(topic, payload, header)
             except OSError as e:
-                if e.args[0] == EAGAIN:
-                    continue
-                else:
-                    self.logger.error(f"Error receiving data: {e}")
+                if e.args[0] in (EAGAIN, ENOBUFS, ENOMEM):
+                    return
+                raise
+            self.sequence = sequence
+            self.send_queue.pop(traffic_class)
+            if self.logger.loglevel == Logger._DEBUG:
+                self.logger.debug(f"Message sent to {self.multicast_group}:{self.multicast_port}: {topic.name}|{'|'.join(header)}|{payload}")
+
+    def _publish(self, time):
+        """
+        Queues the messages of the publishing topics that are due and sends the queue.
+
+        Args:
+            time (int): The current time in microseconds.
+        """
+        for topic in self.publishing_topics.values():
+            if not self.rate_control.ready(topic.name, time):
+                continue
+            message = topic.get_message()
+            if message is None:
+                continue
+            self.rate_control.sent(topic.name, time)
+            payload = self.transport.encode(topic, message)
+            if self.recorder:
+                self.recorder.write(topic.name, payload)
+            self.send_queue.put(topic, payload)
+            # Drain a full queue early, so a pass over many topics only drops
+            # frames when the transport pushes back.
+            if len(self.send_queue) >= self.send_queue.depth:
+                self._send_queued()
+        self._send_queued()
 
     async def _handle_publishing_sequential(self):
         """
         Handles sequential publishing of messages to the multicast group.
 
-        This method continuously loops over the publishing topics and sends their encoded messages
-        to the specified multicast group and port. It uses a non-blocking sleep to allow other tasks
-        to run in between iterations.
+        This method continuously loops over the publishing topics, queues their encoded messages
+        by traffic class and sends the queue to the specified multicast group and port. It uses a
+        non-blocking sleep to allow other tasks to run in between iterations.
 
         Raises:
             Exception: If an error occurs during the publishing process.
@@ -201,16 +385,12 @@ class BaseRTPS:
         """
         try:
             while True:
-                for topic in self.publishing_topics.values():
-                    if not topic.get_message():
-                        continue
-                    self.sock.sendto(topic.encode(), (self.multicast_group, self.multicast_port))
-                    self.logger.debug(f"Message sent to {self.multicast_group}:{self.multicast_port}: {topic.encode()}")
+                self._publish(now_us())
                 await asyncio.sleep(0)
         except Exception as e:
             self.logger.error(f"Error: {e}")
         finally:
-            self.sock.close()
+            self.transport.close()
 
     async def _update_sub_topics(self):
         """
@@ -242,27 +422,45 @@ class BaseRTPS:
             for topic in self.publishing_topics.values():
                 await topic.tick()
 
+    async def _monitor_links(self):
+        """
+        Periodically re-evaluates the link state of all peers and the send rates.
+
+        Peers that went silent send no frames that would update their state, so the
+        link monitor is checked once per heartbeat period. The rate control is updated
+        at the same period with the loss reported since the last update and the worst
+        round-trip time to the peers.
+        """
+        while True:
+            await asyncio.sleep(self.heartbeat.period or 0.5)
+            self.link_monitor.check()
+            rtts = [clock.rtt for clock in self.clock_sync.peers.values()]
+            self.rate_control.update(max(rtts) if rtts else None)
+
     async def _main(self):
         """
         Main method for uRTPS functionality.
 
         This method starts the uRTPS process, establishes a connection to the multicast group,
-        and creates tasks for handling subscriptions, publishing sequentially, and updating
+        through its transport, and creates tasks for handling subscriptions, publishing sequentially, and updating
         publish and subscribe topics. It waits for all tasks to complete using `asyncio.gather`.
 
         Returns:
             None
         """
         self.logger.debug('Starting uRTPS.')
-        if not self.connect():
+        if not self.transport.open(self):
             return
         self.logger.debug('Connected to multicast group.')
+        self.publishing_topics[SYNC_TOPIC] = self.clock_sync
+        self.publishing_topics[HEARTBEAT_TOPIC] = self.heartbeat
 
         tasks = [
             asyncio.create_task(self._handle_subscribe()),
             asyncio.create_task(self._handle_publishing_sequential()),
             asyncio.create_task(self._update_pub_topics()),
-            asyncio.create_task(self._update_sub_topics())
+            asyncio.create_task(self._update_sub_topics()),
+            asyncio.create_task(self._monitor_links())
         ]
         await asyncio.gather(*tasks)
     
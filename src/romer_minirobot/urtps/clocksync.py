@@ -0,0 +1,214 @@
+from ..utils import now_us
+from .node import Node
+from .sendqueue import CONTROL
+
+SYNC_TOPIC = '_sync'
+
+
+class PeerClock:
+    """
+    Offset, drift and round-trip estimate of the clock of one remote peer.
+
+    Each exchange yields the four NTP timestamps: t1 (request sent, local clock),
+    t2 (request received, remote clock), t3 (reply sent, remote clock) and t4 (reply
+    received, local clock). The offset of the remote clock is
+    ((t2 - t1) + (t3 - t4)) / 2 and the round-trip time is (t4 - t1) - (t3 - t2).
+    The offset of the exchange with the smallest round-trip time in the window is used,
+    since it is the least disturbed by queueing, and the drift is the least-squares slope
+    of the offsets in the window.
+
+    Args:
+        peer (str): The id of the remote peer.
+        window (int, optional): The number of exchanges kept for filtering. Defaults to 8.
+
+    Attributes:
+        peer (str): The id of the remote peer.
+        offset (int): The remote clock minus the local clock, in microseconds.
+        drift (float): The rate of change of the offset, in microseconds per microsecond.
+        rtt (int): The round-trip time of the latest exchange, in microseconds.
+        jitter (float): The smoothed variation of the round-trip time, in microseconds.
+        ref_time (int): The local time at which `offset` was measured.
+        samples (list): The (local time, offset, round-trip time) of recent exchanges.
+    """
+
+    def __init__(self, peer, window=8) -> None:
+        self.peer = peer
+        self.window = window
+        self.offset = None
+        self.drift = 0.0
+        self.rtt = None
+        self.jitter = 0.0
+        self.ref_time = None
+        self.samples = []
+
+    def add(self, t1, t2, t3, t4):
+        """
+        Adds the timestamps of a completed exchange and updates the estimate.
+
+        Args:
+            t1 (int): Request sent, local clock.
+            t2 (int): Request received, remote clock.
+            t3 (int): Reply sent, remote clock.
+            t4 (int): Reply received, local clock.
+        """
+        rtt = (t4 - t1) - (t3 - t2)
+        offset = ((t2 - t1) + (t3 - t4)) // 2
+        if self.rtt is not None:
+            self.jitter += (abs(rtt - self.rtt) - self.jitter) / 16
+        self.rtt = rtt
+        self.samples.append(((t1 + t4) // 2, offset, rtt))
+        if len(self.samples) > self.window:
+            self.samples.pop(0)
+
+        self.ref_time, self.offset, _ = min(self.samples, key=lambda s: s[2])
+        self.drift = self._slope()
+
+    def _slope(self):
+        n = len(self.samples)
+        if n < 2:
+            return 0.0
+        t0, o0, _ = self.samples[0]
+        mean_t = sum(s[0] - t0 for s in self.samples) / n
+        mean_o = sum(s[1] - o0 for s in self.samples) / n
+        var = sum((s[0] - t0 - mean_t) ** 2 for s in self.samples)
+        if not var:
+            return 0.0
+        cov = sum((s[0] - t0 - mean_t) * (s[1] - o0 - mean_o) for s in self.samples)
+        return cov / var
+
+    def to_local(self, remote_time):
+        """
+        Converts a time of the remote clock to the local clock.
+
+        Args:
+            remote_time (int): A timestamp taken on the remote peer, in microseconds.
+
+        Returns:
+            int: The same instant on the local clock, or None if not yet synchronized.
+        """
+        if self.offset is None:
+            return None
+        # remote = local + offset + drift * (local - ref_time), solved for local
+        return int((remote_time - self.offset + self.drift * self.ref_time) / (1 + self.drift))
+
+    def stats(self):
+        """
+        Returns the current estimate as a dictionary.
+
+        Returns:
+            dict: offset_us, drift_ppm, rtt_us and jitter_us of the peer.
+        """
+        return {
+            'offset_us': self.offset,
+            'drift_ppm': self.drift * 1000000,
+            'rtt_us': self.rtt,
+            'jitter_us': self.jitter,
+        }
+
+
+class ClockSync(Node):
+    """
+    NTP-style clock synchronization between uRTPS participants.
+
+    The node is published on the reserved '_sync' topic by `BaseRTPS`. Every participant
+    answers requests, so a Pico needs no configuration; a participant with a non-zero
+    `sync_period` also sends a request to all peers at that interval and keeps a
+    `PeerClock` for each peer that answers.
+
+    Requests carry 'q' as message and rely on the send stamp of the frame for t1.
+    Replies carry 'r,<requester>,<t1>,<t2>' and the send stamp of the frame is t3.
+
+    Args:
+        peer_id (str): The id of the local participant.
+        sync_period (float, optional): Seconds between requests, 0 to only answer.
+            Defaults to 0.
+        window (int, optional): The number of exchanges kept per peer. Defaults to 8.
+
+    Attributes:
+        peer_id (str): The id of the local participant.
+        sync_period (float): Seconds between requests.
+        peers (dict): The `PeerClock` of each peer, by peer id.
+
+    Example:
+        urtps = uRTPS(sync_period=1)
+        ...
+        print(urtps.clock_sync.stats())
+    """
+
+    traffic_class = CONTROL
+
+    def __init__(self, peer_id, sync_period=0, window=8) -> None:
+        super().__init__(SYNC_TOPIC, 'publishing')
+        self.peer_id = peer_id
+        self.sync_period = sync_period
+        self.window = window
+        self.peers = {}
+        self.outbox = []
+        self.last_request = None
+
+    def get_message(self):
+        """
+        Pops the next request or reply to send.
+
+        Returns:
+            str: The message to send, or None if there is nothing to send.
+        """
+        if not self.outbox:
+            return None
+        self.message = self.outbox.pop(0)
+        return self.message
+
+    async def tick(self):
+        """
+        Queues a request to all peers every `sync_period` seconds.
+        """
+        if not self.sync_period:
+            return
+        time = now_us()
+        if self.last_request is None or time - self.last_request >= self.sync_period * 1000000:
+            self.last_request = time
+            self.outbox.append('q')
+
+    def handle(self, peer, sent_time, received_time, message):
+        """
+        Processes a message received on the '_sync' topic.
+
+        Args:
+            peer (str): The id of the sender.
+            sent_time (int): The send stamp of the frame, sender clock.
+            received_time (int): The time the frame was received, local clock.
+            message (str): The message of the frame.
+        """
+        fields = message.split(',')
+        if fields[0] == 'q':
+            self.outbox.append(f'r,{peer},{sent_time},{received_time}')
+        elif fields[0] == 'r' and fields[1] == self.peer_id:
+            clock = self.peers.get(peer)
+            if clock is None:
+                clock = self.peers[peer] = PeerClock(peer, self.window)
+            clock.add(int(fields[2]), int(fields[3]), sent_time, received_time)
+
+    def to_local(self, peer, remote_time):
+        """
+        Converts a time of a peer's clock to the local clock.
+
+        Args:
+            peer (str): The id of the peer.
+            remote_time (int): A timestamp taken on the peer, in microseconds.
+
+        Returns:
+            int: The same instant on the local clock, or None if the peer is not synchronized.
+        """
+        clock = self.peers.get(peer)
+        if clock is None:
+            return None
+        return clock.to_local(remote_time)
+
+    def stats(self):
+        """
+        Returns the clock estimate of every synchronized peer.
+
+        Returns:
+            dict: The `PeerClock.stats` of each peer, by peer id.
+        """
+        return {peer: clock.stats() for peer, clock in self.peers.items()}
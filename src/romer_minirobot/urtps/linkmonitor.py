@@ -0,0 +1,356 @@
+from ..utils import now_us
+from .node import Node
+from .sendqueue import CONTROL
+
+HEARTBEAT_TOPIC = '_hb'
+
+SEQUENCE_MOD = 0x10000
+
+# The longest heartbeat message, so that the frame fits the 1024-byte receive buffer.
+MAX_REPORT = 900
+
+
+class Heartbeat(Node):
+    """
+    Publishes a heartbeat on the reserved '_hb' topic at a fixed period.
+
+    The heartbeat keeps the sequence numbers of an idle participant moving, so its
+    peers can tell a quiet link from a dead one. Its message starts with the period in
+    milliseconds, which lets receivers derive their timeout, followed by a loss report
+    'peer:permille' for every peer of the link monitor, which lets publishers adapt
+    their rates. With too many peers for one frame the reports of successive heartbeats
+    take turns.
+
+    Args:
+        period (float, optional): Seconds between heartbeats, 0 to disable. Defaults to 0.5.
+        link_monitor (LinkMonitor, optional): The source of the loss reports.
+
+    Attributes:
+        period (float): Seconds between heartbeats.
+        last_time (int): The time of the last heartbeat, in microseconds.
+    """
+
+    traffic_class = CONTROL
+
+    def __init__(self, period=0.5, link_monitor=None) -> None:
+        super().__init__(HEARTBEAT_TOPIC, 'publishing')
+        self.period = period
+        self.link_monitor = link_monitor
+        self.last_time = None
+        self.next_report = 0
+
+    async def tick(self):
+        """
+        Sets the heartbeat message when the period has elapsed.
+        """
+        self.set_message(None)
+        if not self.period:
+            return
+        time = now_us()
+        if self.last_time is None or time - self.last_time >= self.period * 1000000:
+            self.last_time = time
+            message = str(int(self.period * 1000))
+            if self.link_monitor:
+                reports = self.link_monitor.report(time)
+                count = len(reports)
+                for i in range(count):
+                    peer, loss = reports[(self.next_report + i) % count]
+                    report = f',{peer}:{int(loss * 1000)}'
+                    if len(message) + len(report) > MAX_REPORT:
+                        self.next_report = (self.next_report + i) % count
+                        break
+                    message += report
+            self.set_message(message)
+
+
+class PeerLink:
+    """
+    Link statistics of one remote peer.
+
+    Loss is derived from gaps in the 16-bit sequence numbers of the frames of the peer
+    and reported per heartbeat interval. Jitter is the interarrival jitter of RFC 3550,
+    computed from the send stamps of the frames, so it does not need synchronized clocks.
+
+    Args:
+        peer (str): The id of the remote peer.
+
+    Attributes:
+        peer (str): The id of the remote peer.
+        received (int): The number of frames received.
+        lost (int): The number of frames missing from the sequence.
+        loss_rate (float): The fraction of frames lost in the last heartbeat interval.
+        jitter (float): The interarrival jitter, in microseconds.
+        rtt (int): The round-trip time measured by the clock synchronization, if any.
+        last_seen (int): The local time of the last frame, in microseconds.
+        heartbeat_period (int): The heartbeat period announced by the peer, in milliseconds.
+        topics (set): The topics published by the peer.
+    """
+
+    def __init__(self, peer) -> None:
+        self.peer = peer
+        self.received = 0
+        self.lost = 0
+        self.loss_rate = 0.0
+        self.jitter = 0.0
+        self.rtt = None
+        self.last_seen = None
+        self.heartbeat_period = None
+        self.topics = set()
+        self.max_seq = None
+        self.transit = None
+        self.interval_expected = 0
+        self.interval_received = 0
+
+    def update(self, seq, sent_time, received_time):
+        """
+        Accounts for a frame received from the peer.
+
+        Args:
+            seq (int): The sequence number of the frame.
+            sent_time (int): The send stamp of the frame, peer clock.
+            received_time (int): The time the frame was received, local clock.
+        """
+        self.last_seen = received_time
+        self.received += 1
+        self.interval_received += 1
+
+        transit = received_time - sent_time
+        if self.transit is not None:
+            self.jitter += (abs(transit - self.transit) - self.jitter) / 16
+        self.transit = transit
+
+        if self.max_seq is None:
+            self.max_seq = seq
+            self.interval_expected += 1
+            return
+        delta = (seq - self.max_seq) % SEQUENCE_MOD
+        if delta == 0:
+            return
+        if delta < SEQUENCE_MOD // 2:
+            self.lost += delta - 1
+            self.interval_expected += delta
+            self.max_seq = seq
+        elif SEQUENCE_MOD - delta > 1000:
+            # Far behind the highest sequence number: the peer has restarted.
+            self.max_seq = seq
+            self.transit = None
+        else:
+            # A late frame that was already counted as lost, or a duplicate: without a
+            # record of the missing numbers, clamp so duplicates cannot go below zero.
+            if self.lost:
+                self.lost -= 1
+
+    def close_interval(self):
+        """
+        Computes the loss rate of the interval ending with this heartbeat.
+        """
+        if self.interval_expected:
+            received = min(self.interval_received, self.interval_expected)
+            self.loss_rate = 1 - received / self.interval_expected
+        self.interval_expected = 0
+        self.interval_received = 0
+
+    def age(self, time=None):
+        """
+        Returns the time since the last frame of the peer.
+
+        Args:
+            time (int, optional): The current time in microseconds. Defaults to now.
+
+        Returns:
+            float: The age in seconds.
+        """
+        if time is None:
+            time = now_us()
+        return (time - self.last_seen) / 1000000
+
+    def stats(self):
+        """
+        Returns the link statistics as a dictionary.
+
+        Returns:
+            dict: received, lost, loss_rate, jitter_us, rtt_us and age_s of the peer.
+        """
+        return {
+            'received': self.received,
+            'lost': self.lost,
+            'loss_rate': self.loss_rate,
+            'jitter_us': self.jitter,
+            'rtt_us': self.rtt,
+            'age_s': self.age(),
+        }
+
+
+class LinkMonitor:
+    """
+    Tracks the link quality of every peer heard by a uRTPS participant.
+
+    `BaseRTPS` passes every received frame to `received`. A peer is 'lost' when nothing
+    was heard from it for `timeout_periods` heartbeat periods, 'degraded' when its loss
+    rate or round-trip time exceeds the limits, and 'ok' otherwise. Applications read
+    `state` or `stats`, or register a callback with `on_change` to slow down or stop a
+    robot whose link is degrading.
+
+    Args:
+        clock_sync (ClockSync, optional): The source of the round-trip times.
+        max_loss (float, optional): The loss rate above which a link is degraded.
+            Defaults to 0.2.
+        max_rtt (float, optional): The round-trip time in seconds above which a link is
+            degraded. Defaults to 0.1.
+        timeout_periods (int, optional): Heartbeat periods without frames before a peer
+            is lost. Defaults to 3.
+
+    Attributes:
+        peers (dict): The `PeerLink` of each peer, by peer id.
+
+    Example:
+        def on_link_change(peer, state):
+            if state != 'ok':
+                r.drive.move(0, 0)
+
+        r.mpi.link_monitor.on_change(on_link_change)
+    """
+
+    def __init__(self, clock_sync=None, max_loss=0.2, max_rtt=0.1, timeout_periods=3) -> None:
+        self.clock_sync = clock_sync
+        self.max_loss = max_loss
+        self.max_rtt = max_rtt
+        self.timeout_periods = timeout_periods
+        self.peers = {}
+        self.states = {}
+        self.callbacks = []
+
+    def received(self, peer, seq, sent_time, received_time, topic):
+        """
+        Accounts for a frame received from a peer.
+
+        Args:
+            peer (str): The id of the sender.
+            seq (int): The sequence number of the frame.
+            sent_time (int): The send stamp of the frame, sender clock.
+            received_time (int): The time the frame was received, local clock.
+            topic (str): The topic of the frame.
+        """
+        link = self.peers.get(peer)
+        if link is None:
+            link = self.peers[peer] = PeerLink(peer)
+        link.update(seq, sent_time, received_time)
+        if not topic.startswith('_'):
+            link.topics.add(topic)
+        if self.clock_sync:
+            clock = self.clock_sync.peers.get(peer)
+            if clock:
+                link.rtt = clock.rtt
+
+    def heartbeat(self, peer, message):
+        """
+        Accounts for a heartbeat of a peer, closing its loss interval.
+
+        Args:
+            peer (str): The id of the sender.
+            message (str): The heartbeat message, see `Heartbeat`.
+
+        Returns:
+            dict: The loss rates reported by the peer, by the id of the peer they concern.
+        """
+        fields = message.split(',')
+        link = self.peers[peer]
+        link.heartbeat_period = int(fields[0])
+        link.close_interval()
+        self._set_state(peer, self._evaluate(link))
+
+        reports = {}
+        for field in fields[1:]:
+            reported, permille = field.split(':')
+            reports[reported] = int(permille) / 1000
+        return reports
+
+    def report(self, time=None):
+        """
+        Lists the loss rate of every peer that is not lost, for the heartbeat.
+
+        Args:
+            time (int, optional): The current time in microseconds. Defaults to now.
+
+        Returns:
+            list: (peer, loss rate) tuples.
+        """
+        return [(peer, link.loss_rate) for peer, link in self.peers.items()
+                if self._evaluate(link, time) != 'lost']
+
+    def _evaluate(self, link, time=None):
+        if link.heartbeat_period and \
+                link.age(time) * 1000 > self.timeout_periods * link.heartbeat_period:
+            return 'lost'
+        if link.loss_rate > self.max_loss:
+            return 'degraded'
+        if link.rtt is not None and link.rtt > self.max_rtt * 1000000:
+            return 'degraded'
+        return 'ok'
+
+    def _set_state(self, peer, state):
+        if self.states.get(peer) == state:
+            return
+        self.states[peer] = state
+        for callback in self.callbacks:
+            callback(peer, state)
+
+    def check(self):
+        """
+        Re-evaluates the state of all peers, detecting peers that went silent.
+        """
+        time = now_us()
+        for peer, link in self.peers.items():
+            self._set_state(peer, self._evaluate(link, time))
+
+    def state(self, peer):
+        """
+        Returns the state of the link to a peer.
+
+        Args:
+            peer (str): The id of the peer.
+
+        Returns:
+            str: 'ok', 'degraded' or 'lost', or None if the peer was never heard.
+        """
+        link = self.peers.get(peer)
+        if link is None:
+            return None
+        return self._evaluate(link)
+
+    def peer_for_topic(self, topic):
+        """
+        Returns the id of the peer publishing a topic.
+
+        Args:
+            topic (str): The name of the topic.
+
+        Returns:
+            str: The id of the most recently heard peer publishing the topic, or None.
+        """
+        peers = [link for link in self.peers.values() if topic in link.topics]
+        if not peers:
+            return None
+        return max(peers, key=lambda link: link.last_seen).peer
+
+    def on_change(self, callback):
+        """
+        Registers a callback for changes of link state.
+
+        Args:
+            callback (callable): Called with (peer, state) when the state of a peer changes.
+        """
+        self.callbacks.append(callback)
+
+    def stats(self):
+        """
+        Returns the link statistics and state of every peer.
+
+        Returns:
+            dict: The `PeerLink.stats` of each peer with its 'state', by peer id.
+        """
+        stats = {}
+        for peer, link in self.peers.items():
+            stats[peer] = link.stats()
+            stats[peer]['state'] = self._evaluate(link)
+        return stats
@@ -1,4 +1,9 @@
-from ..utils import is_running_on_pico
+from ..utils import ticks_ms, ticks_diff, micropython
+from .sendqueue import TELEMETRY
+
+# Binary payloads start with this byte, which never occurs in UTF-8 text.
+BINARY = b'\xff'
+_BINARY_FIELD = b'|' + BINARY
 
 class BaseNode:
     """
@@ -12,12 +17,21 @@ class BaseNode:
         type (str): The type of the node.
         name (str): The name of the node.
         message: The message associated with the node.
+        stamp (int): The send time of the last received message, in microseconds of
+            the receiver's clock.
+        latency (int): The one-way latency of the last received message, in microseconds.
+            None until the clock of the sender is synchronized.
+        traffic_class (str): The traffic class of the messages of the node, one of
+            'control', 'telemetry' and 'bulk'. Decides their priority in the send queue
+            and their IP_TOS marking. Subclasses override the class attribute.
 
     Methods:
         set_message(message): Sets the message for the node.
         get_message(): Returns the message of the node.
-        encode(): Encodes the node's name and message.
-        decode(data): Decodes the data and returns the name and message as a list.
+        encode_message(message): Encodes a message of the node into bytes.
+        frame(payload, *header): Builds a frame from an encoded message.
+        encode(*header): Encodes the node's name, header fields and message.
+        decode(data): Decodes the data and returns the name, header fields and message as a list.
 
     Example:
         node = BaseNode("Node1", "Type1")
@@ -28,6 +42,8 @@ class BaseNode:
         print(decoded_data)  # Output: ['Node1', 'Hello, world!']
     """
 
+    traffic_class = TELEMETRY
+
     def __init__(self, name, type) -> None:
         """
         Initializes a Node object.
@@ -44,6 +60,8 @@ class BaseNode:
         self.type = type
         self.name = name
         self.message = None
+        self.stamp = None
+        self.latency = None
     
     def set_message(self, message):
         """
@@ -66,20 +84,62 @@ class BaseNode:
         """
         return self.message
     
-    def encode(self):
+    def encode_message(self, message):
+        """
+        Encodes a message of the node into a byte string.
+
+        Binary messages, which start with `BINARY`, are sent as they are.
+
+        Args:
+            message: The message to be encoded.
+
+        Returns:
+            bytes: The encoded message.
+        """
+        if isinstance(message, (bytes, bytearray)):
+            return bytes(message)
+        return str(message).encode()
+
+    def frame(self, payload, *header):
+        """
+        Builds a frame from the name of the node, header fields and an encoded message.
+
+        Args:
+            payload (bytes): The message, encoded by `encode_message`.
+            *header (str): Fields placed between the name and the message. `BaseRTPS`
+                passes the peer id of the sender, a sequence number and the send time.
+
+        Returns:
+            bytes: The frame.
         """
-        Encodes the name and message of the node into a byte string.
+        fields = [self.name.encode()]
+        for field in header:
+            fields.append(field.encode())
+        fields.append(payload)
+        return b'|'.join(fields)
+
+    def encode(self, *header):
+        """
+        Encodes the name, header fields and message of the node into a byte string.
+
+        Args:
+            *header (str): Fields placed between the name and the message, see `frame`.
 
         Returns:
             bytes: The encoded byte string.
         """
-        return f'{self.name}|{self.message}'.encode()
+        return self.frame(self.encode_message(self.message), *header)
     
     @staticmethod
+    @micropython.native
     def decode(data):
         """
         Decode the given data by converting it from bytes to string and splitting it by '|'.
 
+        Frames sent by `BaseRTPS` split into [name, peer, sequence, stamp, message]; the
+        message is always the last element, so frames without header fields decode to
+        [name, message]. A message starting with `BINARY` is left as bytes.
+
         Args:
             data (bytes): The data to be decoded.
 
@@ -87,7 +147,13 @@ class BaseNode:
             list: A list of strings obtained by splitting the decoded data.
 
         """
-        return data.decode().split('|')
+        if _BINARY_FIELD in data:
+            fields = data.split(b'|', 4)
+            message = fields.pop()
+            fields = [field.decode() for field in fields]
+            fields.append(message)
+            return fields
+        return data.decode().split('|', 4)
     
 class Node(BaseNode):
     """
@@ -139,9 +205,8 @@ class BlockingNode(BaseNode):
         delta_time (float): The time interval (in seconds) between message retrievals or settings.
 
     Attributes:
-        gettime (function): A function for retrieving the current time.
         delta_time (float): The time interval (in milliseconds) between message retrievals or settings.
-        last_time (float): The timestamp of the last message retrieval or setting.
+        last_time (int): The `ticks_ms` of the last message retrieval or setting, None before the first.
 
     Example:
         # Create a blocking node with a time interval of 0.5 seconds
@@ -170,18 +235,16 @@ class BlockingNode(BaseNode):
             None
 
         """
-        self.gettime = None
-        if is_running_on_pico():
-            from utime import ticks_ms
-            self.gettime = ticks_ms
-            self.delta_time = delta_time * 1000
-        else:
-            from time import time
-            self.gettime = time
-            self.delta_time = delta_time
-            
+        self.delta_time = delta_time * 1000
         super().__init__(name, type)
-        self.last_time = 0
+        self.last_time = None
+
+    def _elapsed(self):
+        cur_time = ticks_ms()
+        if self.last_time is None or ticks_diff(cur_time, self.last_time) > self.delta_time:
+            self.last_time = cur_time
+            return True
+        return False
         
     def get_message(self):
         """
@@ -194,9 +257,7 @@ class BlockingNode(BaseNode):
         Returns:
             The retrieved message if enough time has passed, otherwise None.
         """
-        cur_time = self.gettime()
-        if cur_time - self.last_time > self.delta_time:
-            self.last_time = cur_time
+        if self._elapsed():
             return super().get_message()
         return None
     
@@ -215,9 +276,7 @@ class BlockingNode(BaseNode):
         - str: The message that was set.
 
         """
-        cur_time = self.gettime()
-        if cur_time - self.last_time > self.delta_time:
-            self.last_time = cur_time
+        if self._elapsed():
             return super().set_message(message)
         return None
     
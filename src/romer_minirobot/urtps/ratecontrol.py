@@ -0,0 +1,189 @@
+class AIMD:
+    """
+    Additive-increase, multiplicative-decrease rate policy.
+
+    On every update a congested link divides the rate by `1 / decrease`, and a healthy
+    link raises it by `increase` messages per second.
+
+    Args:
+        increase (float, optional): Messages per second added per update. Defaults to 2.
+        decrease (float, optional): Factor applied to the rate on congestion. Defaults to 0.5.
+        max_loss (float, optional): The reported loss rate above which the link is
+            congested. Defaults to 0.05.
+        max_rtt (float, optional): The round-trip time in seconds above which the link is
+            congested, None to ignore round-trip times. Defaults to None.
+
+    Example:
+        urtps.rate_control.policy = AIMD(increase=5, decrease=0.7, max_rtt=0.05)
+    """
+
+    def __init__(self, increase=2.0, decrease=0.5, max_loss=0.05, max_rtt=None) -> None:
+        self.increase = increase
+        self.decrease = decrease
+        self.max_loss = max_loss
+        self.max_rtt = max_rtt
+
+    def congested(self, loss, rtt):
+        """
+        Decides whether the feedback indicates congestion.
+
+        Args:
+            loss (float): The worst loss rate reported since the last update.
+            rtt (int): The worst round-trip time in microseconds, or None if unknown.
+
+        Returns:
+            bool: True if the rate should be decreased.
+        """
+        if loss > self.max_loss:
+            return True
+        return self.max_rtt is not None and rtt is not None and rtt > self.max_rtt * 1000000
+
+    def next_rate(self, rate, congested):
+        """
+        Computes the rate for the next update period.
+
+        Args:
+            rate (float): The current rate in messages per second.
+            congested (bool): Whether the link is congested.
+
+        Returns:
+            float: The new rate, before clamping to the bounds of the topic.
+        """
+        if congested:
+            return rate * self.decrease
+        return rate + self.increase
+
+
+class TopicRate:
+    """
+    The send rate of one publishing topic.
+
+    Args:
+        min_rate (float): The lowest rate in messages per second.
+        max_rate (float): The highest rate in messages per second, None for unlimited.
+        critical (bool, optional): Keep the topic at `max_rate` regardless of congestion.
+            Defaults to False.
+
+    Attributes:
+        rate (float): The current rate in messages per second, None for unlimited.
+        last_sent (int): The time of the last message, in microseconds.
+    """
+
+    def __init__(self, min_rate, max_rate, critical=False) -> None:
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.critical = critical
+        self.rate = max_rate
+        self.last_sent = None
+
+    def ready(self, time):
+        if self.rate is None or self.last_sent is None:
+            return True
+        return time - self.last_sent >= 1000000 / self.rate
+
+    def adapt(self, policy, congested):
+        if self.critical or self.max_rate is None:
+            return
+        rate = policy.next_rate(self.rate, congested)
+        self.rate = max(self.min_rate, min(self.max_rate, rate))
+
+
+class RateControl:
+    """
+    Congestion-aware send rates for the publishing topics of a uRTPS participant.
+
+    Receivers report the loss rate they see from each peer in their heartbeats. The
+    worst loss reported about this participant, and optionally the worst round-trip
+    time measured by the clock synchronization, are passed to the policy once per
+    heartbeat period, and every declared topic moves its rate within its bounds.
+    Topics that were not declared are sent whenever they have a message, as before.
+
+    Args:
+        policy (AIMD, optional): The rate policy. Defaults to `AIMD()`.
+
+    Attributes:
+        policy (AIMD): The rate policy.
+        topics (dict): The `TopicRate` of each declared topic, by name.
+        congested (bool): The outcome of the last update.
+
+    Example:
+        urtps.set_rate('neopixel', min_rate=2, max_rate=30)
+        urtps.set_rate('twoWheel', max_rate=50, critical=True)
+    """
+
+    def __init__(self, policy=None) -> None:
+        self.policy = policy or AIMD()
+        self.topics = {}
+        self.loss = 0.0
+        self.congested = False
+
+    def set_rate(self, topic, min_rate=1.0, max_rate=None, critical=False):
+        """
+        Declares the rate bounds of a publishing topic.
+
+        Args:
+            topic (str): The name of the topic.
+            min_rate (float, optional): The lowest rate in messages per second. Defaults to 1.
+            max_rate (float, optional): The highest rate in messages per second, None for
+                unlimited. Defaults to None.
+            critical (bool, optional): Keep the topic at `max_rate` regardless of
+                congestion. Defaults to False.
+        """
+        self.topics[topic] = TopicRate(min_rate, max_rate, critical)
+
+    def ready(self, topic, time):
+        """
+        Checks whether a topic may send at the given time.
+
+        Args:
+            topic (str): The name of the topic.
+            time (int): The current time in microseconds.
+
+        Returns:
+            bool: True if the topic is undeclared or its send interval has elapsed.
+        """
+        rate = self.topics.get(topic)
+        return rate is None or rate.ready(time)
+
+    def sent(self, topic, time):
+        """
+        Records that a topic has sent a message.
+
+        Args:
+            topic (str): The name of the topic.
+            time (int): The current time in microseconds.
+        """
+        rate = self.topics.get(topic)
+        if rate is not None:
+            rate.last_sent = time
+
+    def feedback(self, reporter, loss):
+        """
+        Accounts for a loss report about this participant.
+
+        Args:
+            reporter (str): The id of the peer that sent the report.
+            loss (float): The loss rate seen by the reporter.
+        """
+        self.loss = max(self.loss, loss)
+
+    def update(self, rtt=None):
+        """
+        Applies the policy to every declared topic and starts a new feedback period.
+
+        Args:
+            rtt (int, optional): The worst round-trip time to the peers, in microseconds.
+        """
+        self.congested = self.policy.congested(self.loss, rtt)
+        self.loss = 0.0
+        for rate in self.topics.values():
+            rate.adapt(self.policy, self.congested)
+
+    def rates(self):
+        """
+        Returns the current rate of every declared topic.
+
+        Returns:
+            dict: The rate in messages per second, by topic name.
+        """
+        return {topic: rate.rate for topic, rate in self.topics.items()}
@@ -0,0 +1,143 @@
+CONTROL = 'control'
+TELEMETRY = 'telemetry'
+BULK = 'bulk'
+
+TRAFFIC_CLASSES = (CONTROL, TELEMETRY, BULK)
+
+# IP_TOS byte of each class (DSCP << 2). Wi-Fi WMM maps the top three DSCP bits to the
+# 802.11 user priority, so CS6 lands in the voice queue (UP 6) and CS1 in the background
+# queue (UP 1) under both the legacy mapping and RFC 8325.
+TOS = {
+    CONTROL: 48 << 2,
+    TELEMETRY: 0,
+    BULK: 8 << 2,
+}
+
+
+class SendQueue:
+    """
+    Bounded per-class queue of outgoing frames.
+
+    Every class has its own FIFO of at most `depth` frames. When a queue is full its
+    oldest frame is dropped, and when all queues together hold more than `max_frames`
+    the oldest frame of the lowest non-empty class is dropped, so overload costs bulk
+    data first. In the telemetry and bulk classes a new message of a topic replaces the
+    queued one, since only the latest state is worth sending.
+
+    With the 'strict' policy control frames always go first, then telemetry, then bulk.
+    With the 'weighted' policy the classes are served round-robin, each sending up to
+    its weight in frames per round, so bulk traffic cannot starve entirely.
+
+    Args:
+        policy (str, optional): 'strict' or 'weighted'. Defaults to 'strict'.
+        depth (int, optional): The maximum number of frames per class. Defaults to 16.
+        max_frames (int, optional): The maximum number of frames in all classes.
+            Defaults to 32.
+        weights (dict, optional): Frames per round of each class for the 'weighted'
+            policy. Defaults to 8 control, 4 telemetry and 1 bulk.
+
+    Attributes:
+        queues (dict): The queued (topic, payload) pairs of each class.
+        drops (dict): The number of frames dropped in each class.
+
+    Example:
+        urtps.send_queue = SendQueue('weighted', weights={'control': 4, 'telemetry': 2, 'bulk': 1})
+    """
+
+    def __init__(self, policy='strict', depth=16, max_frames=32, weights=None) -> None:
+        if policy not in ('strict', 'weighted'):
+            raise ValueError('Invalid scheduling policy')
+        self.policy = policy
+        self.depth = depth
+        self.max_frames = max_frames
+        self.weights = weights or {CONTROL: 8, TELEMETRY: 4, BULK: 1}
+        self.queues = {c: [] for c in TRAFFIC_CLASSES}
+        self.drops = {c: 0 for c in TRAFFIC_CLASSES}
+        self.size = 0
+        self.credit = {c: 0 for c in TRAFFIC_CLASSES}
+        self.credit[CONTROL] = self.weights[CONTROL]
+        self.current = 0
+
+    def put(self, topic, payload):
+        """
+        Queues a frame in the traffic class of its topic.
+
+        Args:
+            topic (BaseNode): The topic the payload belongs to.
+            payload (bytes): The encoded message.
+        """
+        traffic_class = topic.traffic_class
+        queue = self.queues[traffic_class]
+        if traffic_class != CONTROL:
+            for i, entry in enumerate(queue):
+                if entry[0] is topic:
+                    queue[i] = (topic, payload)
+                    return
+        if len(queue) >= self.depth:
+            queue.pop(0)
+            self.drops[traffic_class] += 1
+            self.size -= 1
+        queue.append((topic, payload))
+        self.size += 1
+        if self.size > self.max_frames:
+            for c in reversed(TRAFFIC_CLASSES):
+                if self.queues[c]:
+                    self.queues[c].pop(0)
+                    self.drops[c] += 1
+                    self.size -= 1
+                    break
+
+    def _select(self):
+        if self.policy == 'strict':
+            for c in TRAFFIC_CLASSES:
+                if self.queues[c]:
+                    return c
+            return None
+        for _ in range(len(TRAFFIC_CLASSES) + 1):
+            c = TRAFFIC_CLASSES[self.current]
+            if self.queues[c] and self.credit[c] > 0:
+                return c
+            # Move on to the next class and give it a new round of credit.
+            self.current = (self.current + 1) % len(TRAFFIC_CLASSES)
+            c = TRAFFIC_CLASSES[self.current]
+            self.credit[c] = self.weights[c]
+        return None
+
+    def peek(self):
+        """
+        Returns the next frame to send without removing it.
+
+        Returns:
+            tuple: (traffic class, topic, payload), or None if the queue is empty.
+        """
+        if not self.size:
+            return None
+        c = self._select()
+        if c is None:
+            return None
+        topic, payload = self.queues[c][0]
+        return c, topic, payload
+
+    def pop(self, traffic_class):
+        """
+        Removes the frame returned by the last `peek` after it has been sent.
+
+        Args:
+            traffic_class (str): The traffic class returned by `peek`.
+        """
+        self.queues[traffic_class].pop(0)
+        self.size -= 1
+        self.credit[traffic_class] -= 1
+
+    def __len__(self):
+        return self.size
+
+    def stats(self):
+        """
+        Returns the queue length and drop count of every class.
+
+        Returns:
+            dict: {'queued': int, 'dropped': int} by traffic class.
+        """
+        return {c: {'queued': len(self.queues[c]), 'dropped': self.drops[c]}
+                for c in TRAFFIC_CLASSES}
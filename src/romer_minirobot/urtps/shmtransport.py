@@ -0,0 +1,376 @@
+import atexit
+import mmap
+import os
+import struct
+import tempfile
+
+from ..utils import now_us
+from .linkmonitor import HEARTBEAT_TOPIC
+from .node import Node
+from .transport import Transport, MulticastTransport
+
+MAGIC = b'RMSH'
+VERSION = 1
+
+# magic, version, reserved, writer pid, capacity, writer peer id
+HEADER = struct.Struct('<4sHHIQ8s')
+HEAD_OFFSET = 32
+DATA_OFFSET = 64
+# stream position, length
+RECORD = struct.Struct('<QI4x')
+POSITION = struct.Struct('<Q')
+PADDING = 0xFFFFFFFF
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+def ring_directory():
+    """
+    Returns the directory holding the ring buffers.
+
+    Returns:
+        str: '/dev/shm' where it exists, so the rings never touch a disk, and the
+            temporary directory otherwise.
+    """
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+class RingWriter:
+    """
+    The writing end of a shared-memory ring buffer of frames.
+
+    The ring is a file mapped into memory: a 64-byte header followed by `capacity` bytes
+    of records. Each record is its 16-byte header, holding its position in the stream
+    of bytes ever written and its length, followed by the frame padded to 8 bytes. The
+    writer copies the frame, then the record header, then advances the head in the file
+    header, so everything before the head is complete. A record that does not fit
+    before the end of the ring starts at its beginning; the rest of the ring is marked
+    as padding by a record header, or is implicitly padding if shorter than one. There
+    is no lock: a slow reader is overwritten and notices it from the head. The file is
+    removed by `close`, at the latest when the interpreter exits.
+
+    Args:
+        path (str): The file of the ring, created or truncated.
+        peer_id (str): The id of the writing participant.
+        capacity (int, optional): The size of the record area in bytes. Defaults to
+            256 KiB.
+
+    Attributes:
+        head (int): The stream position of the next record.
+    """
+
+    def __init__(self, path, peer_id, capacity=1 << 18) -> None:
+        self.path = path
+        self.capacity = _align(capacity)
+        with open(path, 'w+b') as f:
+            f.truncate(DATA_OFFSET + self.capacity)
+            self.mm = mmap.mmap(f.fileno(), DATA_OFFSET + self.capacity)
+        HEADER.pack_into(self.mm, 0, MAGIC, VERSION, 0, os.getpid(), self.capacity,
+                         peer_id.encode())
+        self.head = 0
+        POSITION.pack_into(self.mm, HEAD_OFFSET, 0)
+        atexit.register(self.close)
+
+    def write(self, frame):
+        """
+        Appends a frame to the ring; frames written after `close` are discarded.
+
+        Args:
+            frame (bytes): The frame.
+
+        Raises:
+            ValueError: If the frame does not fit in a quarter of the ring.
+        """
+        if self.mm.closed:
+            return
+        size = _align(RECORD.size + len(frame))
+        if size > self.capacity // 4:
+            raise ValueError('Frame too large for the ring buffer')
+        offset = self.head % self.capacity
+        if offset + size > self.capacity:
+            if self.capacity - offset >= RECORD.size:
+                RECORD.pack_into(self.mm, DATA_OFFSET + offset, self.head, PADDING)
+            self.head += self.capacity - offset
+            offset = 0
+        start = DATA_OFFSET + offset + RECORD.size
+        self.mm[start:start + len(frame)] = frame
+        RECORD.pack_into(self.mm, DATA_OFFSET + offset, self.head, len(frame))
+        self.head += size
+        POSITION.pack_into(self.mm, HEAD_OFFSET, self.head)
+
+    def close(self):
+        """
+        Unmaps the ring and removes its file.
+        """
+        if self.mm.closed:
+            return
+        self.mm.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class RingReader:
+    """
+    A reading end of a ring buffer created by `RingWriter`.
+
+    Any number of readers may follow one writer. A reader starts at the current head,
+    so it only sees frames written after it was opened.
+
+    Reads are checked like a seqlock: the head is read again after a frame is copied,
+    and the frame is discarded if the writer may have written over it meanwhile. The
+    writer fills up to half the ring beyond the head before advancing it, a padded
+    record of at most a quarter, so a reader must stay within half the ring of the head.
+
+    Args:
+        path (str): The file of the ring.
+
+    Attributes:
+        peer_id (str): The id of the writing participant.
+        pid (int): The process id of the writer.
+        tail (int): The stream position of the next record to read.
+        overruns (int): The number of times the writer overwrote unread records.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.pid, self.capacity, peer_id = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError('Not a ring buffer')
+        self.peer_id = peer_id.rstrip(b'\0').decode()
+        self.tail = self.head()
+        self.overruns = 0
+
+    def head(self):
+        return POSITION.unpack_from(self.mm, HEAD_OFFSET)[0]
+
+    def read(self):
+        """
+        Returns the next frame of the ring.
+
+        Returns:
+            bytes: The frame, or None if the reader has caught up with the writer.
+        """
+        while True:
+            head = self.head()
+            if self.tail == head:
+                return None
+            if self._overrun(head):
+                self.overruns += 1
+                self.tail = head
+                return None
+            offset = self.tail % self.capacity
+            if self.capacity - offset < RECORD.size:
+                # Too short for a record header: implicit padding.
+                self.tail += self.capacity - offset
+                continue
+            position, length = RECORD.unpack_from(self.mm, DATA_OFFSET + offset)
+            if position != self.tail:
+                self.overruns += 1
+                self.tail = head
+                return None
+            if length == PADDING:
+                self.tail += self.capacity - offset
+                continue
+            start = DATA_OFFSET + offset + RECORD.size
+            frame = self.mm[start:start + length]
+            # The writer may have reached the frame while it was copied.
+            head = self.head()
+            if self._overrun(head):
+                self.overruns += 1
+                self.tail = head
+                return None
+            self.tail += _align(RECORD.size + length)
+            return frame
+
+    def _overrun(self, head):
+        # Whether the writer may be writing over the record at the tail: it writes up to
+        # half the ring beyond the head before advancing it.
+        return head - self.tail > self.capacity // 2
+
+    def close(self):
+        self.mm.close()
+
+
+def _process_exists(pid):
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+class SharedMemoryTransport(Transport):
+    """
+    Exchanges frames with participants on the same host through shared memory, and
+    with remote participants over UDP multicast.
+
+    Every participant writes its frames to its own `RingWriter`, a file in '/dev/shm'
+    named after the multicast group, port and peer id, and reads the rings of the other
+    participants of the same group and port, which it discovers by scanning the
+    directory every `scan_period` seconds. There is one writer per ring, so no locks
+    are needed.
+
+    Frames are additionally sent over UDP once a remote participant, one without a ring
+    on this host, has been heard within `remote_timeout` seconds; until then only
+    heartbeats go over UDP, which is how remote participants find each other.
+    Multicast frames of local participants are dropped, since they arrive through their
+    ring. A remote participant that just appeared may count the frames sent before it
+    was heard as lost.
+
+    Args:
+        fallback (str, optional): 'auto' to use UDP only when remote participants are
+            present, 'always' to send every frame over UDP as well, or 'never' to stay
+            on this host. Defaults to 'auto'.
+        capacity (int, optional): The size of the ring of this participant in bytes,
+            which bounds how far a reader can fall behind before it skips ahead.
+            Defaults to 256 KiB, about the receive buffer of a UDP socket on Linux.
+        scan_period (float, optional): Seconds between scans for new rings. Defaults to 1.
+        remote_timeout (float, optional): Seconds after which a silent remote participant
+            no longer counts as present. Defaults to 3.
+        directory (str, optional): The directory of the rings. Defaults to
+            `ring_directory()`.
+
+    Attributes:
+        writer (RingWriter): The ring of this participant.
+        readers (dict): The `RingReader` of each local participant, by peer id.
+        udp (MulticastTransport): The transport to remote participants, or None.
+        closed (bool): Whether `close` was called; nothing is received after it.
+
+    Example:
+        vision = uRTPS(transport=SharedMemoryTransport())
+    """
+
+    def __init__(self, fallback='auto', capacity=1 << 18, scan_period=1.0,
+                 remote_timeout=3.0, directory=None) -> None:
+        if fallback not in ('auto', 'always', 'never'):
+            raise ValueError('Invalid fallback mode')
+        self.fallback = fallback
+        self.capacity = capacity
+        self.scan_period = scan_period
+        self.remote_timeout = remote_timeout
+        self.directory = directory or ring_directory()
+        self.writer = None
+        self.readers = {}
+        self.remote_peers = set()
+        self.udp = None
+        self.participant = None
+        self.prefix = None
+        self.last_scan = None
+        self.remote_seen = None
+        self.next_reader = 0
+        self.closed = False
+
+    def open(self, participant):
+        self.participant = participant
+        group = participant.multicast_group.replace('.', '_')
+        self.prefix = f'urtps-{group}-{participant.multicast_port}-'
+        path = os.path.join(self.directory, self.prefix + participant.peer_id)
+        self.writer = RingWriter(path, participant.peer_id, self.capacity)
+        if self.fallback != 'never':
+            self.udp = MulticastTransport()
+            if not self.udp.open(participant):
+                participant.logger.warning('UDP is not available, only local peers are reachable.')
+                self.udp = None
+        self.scan()
+        return True
+
+    def scan(self):
+        """
+        Opens the rings of new local participants and closes those of exited ones.
+        """
+        self.last_scan = now_us()
+        own = self.participant.peer_id
+        for name in os.listdir(self.directory):
+            if not name.startswith(self.prefix):
+                continue
+            peer = name[len(self.prefix):]
+            if peer == own or peer in self.readers:
+                continue
+            try:
+                reader = RingReader(os.path.join(self.directory, name))
+            except (OSError, ValueError):
+                continue
+            if _process_exists(reader.pid):
+                self.readers[peer] = reader
+            else:
+                reader.close()
+                try:
+                    os.remove(reader.path)
+                except OSError:
+                    pass
+        for peer, reader in list(self.readers.items()):
+            if not os.path.exists(reader.path):
+                reader.close()
+                del self.readers[peer]
+
+    def set_traffic_class(self, traffic_class):
+        if self.udp:
+            self.udp.set_traffic_class(traffic_class)
+
+    def _remote_present(self):
+        if self.fallback == 'always':
+            return True
+        return (self.remote_seen is not None and
+                now_us() - self.remote_seen < self.remote_timeout * 1000000)
+
+    def send(self, topic, payload, header):
+        frame = topic.frame(payload, *header)
+        if self.udp and (topic.name == HEARTBEAT_TOPIC or self._remote_present()):
+            self.udp.send(topic, payload, header)
+        self.writer.write(frame)
+
+    def receive(self):
+        # The subscription task may poll once more after `close`, which must not open
+        # the rings again.
+        if self.closed:
+            return None
+        if now_us() - self.last_scan >= self.scan_period * 1000000:
+            self.scan()
+        readers = list(self.readers.values())
+        for i in range(len(readers)):
+            reader = readers[(self.next_reader + i) % len(readers)]
+            frame = reader.read()
+            if frame is not None:
+                self.next_reader = (self.next_reader + i + 1) % len(readers)
+                return Node.decode(frame), ('shm', reader.peer_id)
+        while self.udp:
+            received = self.udp.receive()
+            if received is None:
+                return None
+            peer = received[0][1] if len(received[0]) == 5 else None
+            if peer in self.readers or peer == self.participant.peer_id:
+                continue
+            if peer not in self.remote_peers:
+                # A participant started since the last scan may be local.
+                if os.path.exists(os.path.join(self.directory, self.prefix + str(peer))):
+                    self.scan()
+                    continue
+                self.remote_peers.add(peer)
+            self.remote_seen = now_us()
+            return received
+        return None
+
+    def close(self):
+        self.closed = True
+        if self.udp:
+            self.udp.close()
+            self.udp = None
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+        for reader in self.readers.values():
+            reader.close()
+        self.readers = {}
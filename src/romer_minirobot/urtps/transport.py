@@ -0,0 +1,232 @@
+import _thread
+import socket
+from collections import deque
+from errno import EAGAIN
+
+from .node import Node
+from .sendqueue import TOS
+
+IP_TOS = getattr(socket, 'IP_TOS', 1)
+
+
+class Transport:
+    """
+    Base class of the ways a `BaseRTPS` participant exchanges frames with its peers.
+
+    The participant hands every outgoing message to `encode` before it is queued and to
+    `send` with its header fields once it leaves the send queue, and polls `receive`
+    for incoming frames. Nodes never see the transport, so it can be swapped without
+    changing them.
+
+    Subclasses implement `open`, `send`, `receive` and `close`.
+    """
+
+    def open(self, participant):
+        """
+        Prepares the transport for a participant; called when the participant starts.
+
+        Args:
+            participant (BaseRTPS): The participant using the transport.
+
+        Returns:
+            bool: True if the transport is ready, False otherwise.
+        """
+        raise NotImplementedError
+
+    def encode(self, topic, message):
+        """
+        Converts a message to the payload queued for sending.
+
+        Args:
+            topic (BaseNode): The topic the message belongs to.
+            message (Any): The message returned by `topic.get_message`.
+
+        Returns:
+            bytes: The payload.
+        """
+        return topic.encode_message(message)
+
+    def set_traffic_class(self, traffic_class):
+        """
+        Applies the traffic class of the following frames, e.g. as a packet marking.
+
+        Args:
+            traffic_class (str): The traffic class of the next frame.
+        """
+        pass
+
+    def send(self, topic, payload, header):
+        """
+        Sends a frame to all peers.
+
+        Args:
+            topic (BaseNode): The topic of the frame.
+            payload (bytes): The payload returned by `encode`.
+            header (tuple): The peer id, sequence number and send stamp, as strings.
+
+        Raises:
+            OSError: EAGAIN, ENOBUFS or ENOMEM when the frame should be retried later.
+        """
+        raise NotImplementedError
+
+    def receive(self):
+        """
+        Returns the next received frame, if any.
+
+        Returns:
+            tuple: (decoded frame, sender address) with the frame decoded as by
+                `Node.decode`, or None if no frame is waiting.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases the resources of the transport.
+        """
+        pass
+
+
+class MulticastTransport(Transport):
+    """
+    Exchanges encoded frames over the UDP multicast socket of the participant.
+
+    This is the default transport. The socket is created by the `connect` method of the
+    participant, which also joins the Wi-Fi network on a Pico. Packets are marked with
+    the IP_TOS of their traffic class while `participant.mark_tos` is set.
+
+    Attributes:
+        participant (BaseRTPS): The participant using the transport.
+    """
+
+    def __init__(self) -> None:
+        self.participant = None
+
+    def open(self, participant):
+        self.participant = participant
+        return bool(participant.connect())
+
+    def set_traffic_class(self, traffic_class):
+        participant = self.participant
+        try:
+            participant.sock.setsockopt(socket.IPPROTO_IP, IP_TOS, TOS[traffic_class])
+        except OSError:
+            participant.logger.warning('IP_TOS is not supported, packets are not marked.')
+            participant.mark_tos = False
+
+    def send(self, topic, payload, header):
+        participant = self.participant
+        frame = topic.frame(payload, *header)
+        participant.sock.sendto(frame, (participant.multicast_group, participant.multicast_port))
+
+    def receive(self):
+        try:
+            data, address = self.participant.sock.recvfrom(1024)
+        except OSError as e:
+            if e.args[0] == EAGAIN:
+                return None
+            raise
+        return Node.decode(data), address
+
+    def close(self):
+        sock = self.participant.sock if self.participant else None
+        if sock:
+            sock.close()
+
+
+# The transports of each bus. A bus is replaced rather than changed, under the lock, so
+# a participant sending from another thread iterates over it without locking.
+_buses = {}
+_buses_lock = _thread.allocate_lock()
+
+
+class InProcessTransport(Transport):
+    """
+    Hands messages directly to the participants of the same process.
+
+    Participants using an in-process transport with the same multicast group and port
+    form a bus. A sent message is appended to the inbox of every other participant on
+    the bus without being encoded, framed, decoded or passing through the kernel; clock
+    synchronization, heartbeats and link monitoring work as over the network.
+
+    By default subscribers receive the message as a string, as they would over a socket:
+    string and binary messages are passed on as they are, a bytearray copied to bytes as
+    the publisher may reuse it, and other messages are converted with `str`. With `raw`
+    set the publisher's object itself is delivered, e.g. to pass NumPy arrays between
+    co-located nodes that expect them.
+
+    Participants usually run in threads of their own, see `uRTPS`, so the inbox is a
+    deque guarded by a lock: the sender appends to it and the receiver pops from it.
+
+    Args:
+        raw (bool, optional): Deliver message objects unconverted. Defaults to False.
+        depth (int, optional): The maximum number of frames waiting in the inbox; the
+            oldest frame is dropped when it is full. Defaults to 256.
+
+    Attributes:
+        inbox (deque): The received frames that were not yet dispatched.
+        dropped (int): The number of frames dropped from the full inbox.
+
+    Example:
+        planner = uRTPS(transport=InProcessTransport())
+        controller = uRTPS(transport=InProcessTransport())
+    """
+
+    def __init__(self, raw=False, depth=256) -> None:
+        self.raw = raw
+        self.depth = depth
+        self.inbox = deque((), depth)
+        self.lock = _thread.allocate_lock()
+        self.dropped = 0
+        self.bus = None
+        self.address = None
+
+    def open(self, participant):
+        self.bus = (participant.multicast_group, participant.multicast_port)
+        self.address = ('in-process', id(participant))
+        with _buses_lock:
+            _buses[self.bus] = _buses.get(self.bus, ()) + (self,)
+        return True
+
+    def encode(self, topic, message):
+        if self.raw or isinstance(message, (str, bytes)):
+            return message
+        if isinstance(message, bytearray):
+            return bytes(message)
+        return str(message)
+
+    def send(self, topic, payload, header):
+        frame = [topic.name, header[0], header[1], header[2], payload]
+        for transport in _buses.get(self.bus, ()):
+            if transport is not self:
+                transport.deliver(frame, self.address)
+
+    def deliver(self, frame, address):
+        """
+        Appends a frame to the inbox.
+
+        Args:
+            frame (list): The frame, as returned by `Node.decode`.
+            address (tuple): The address of the sender.
+        """
+        with self.lock:
+            if len(self.inbox) >= self.depth:
+                self.inbox.popleft()
+                self.dropped += 1
+            self.inbox.append((frame, address))
+
+    def receive(self):
+        with self.lock:
+            if not self.inbox:
+                return None
+            return self.inbox.popleft()
+
+    def close(self):
+        if self.bus is None:
+            return
+        with _buses_lock:
+            bus = tuple(transport for transport in _buses.get(self.bus, ())
+                        if transport is not self)
+            if bus:
+                _buses[self.bus] = bus
+            else:
+                _buses.pop(self.bus, None)
@@ -1,9 +1,10 @@
 import _thread
+import asyncio
 from . import BaseRTPS
 
 
 class uRTPS(BaseRTPS):
-    def __init__(self, multicast_group='224.0.0.253', multicast_port=5007, debug='DEBUG') -> None:
+    def __init__(self, multicast_group='224.0.0.253', multicast_port=5007, debug='DEBUG', sync_period=1, transport=None) -> None:
         """
         Initializes the URTPS (micro Real-Time Publish-Subscribe) object.
 
@@ -11,12 +12,17 @@ class uRTPS(BaseRTPS):
             multicast_group (str): The multicast group IP address to use for communication. Default is '224.0.0.253'.
             multicast_port (int): The multicast port number to use for communication. Default is 5007.
             debug (str): The debug level for logging. Default is 'DEBUG'.
+            sync_period (float): Seconds between clock synchronization requests, 0 to disable. Default is 1.
+            transport (Transport): Carries the frames to the other participants. Default is UDP multicast.
 
         Returns:
             None
         """
-        super().__init__(multicast_group, multicast_port, debug)
+        super().__init__(multicast_group, multicast_port, debug, transport)
+        self.clock_sync.sync_period = sync_period
         self._thread_running = _thread.allocate_lock()
+        self._loop = None
+        self._task = None
         
     def connect(self):
         """
@@ -40,18 +46,30 @@ class uRTPS(BaseRTPS):
         """
         Stops the uRTPS communication.
 
-        This method releases the thread lock, closes the socket connection, and stops the uRTPS communication.
+        This method releases the thread lock and cancels the tasks of the uRTPS loop, which
+        closes the transport, and stops the uRTPS communication. It may be called from any thread.
         After calling this method, the uRTPS communication will be completely stopped.
 
         Note:
         - If the uRTPS communication is already stopped, calling this method has no effect.
 
         """
-        self._thread_running.release()
+        if self._thread_running.locked():
+            self._thread_running.release()
         self.logger.debug('uRTPS stopped.')
-        if self.sock:
-            self.sock.close()
-            
+        if self._task and not self._task.done():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        else:
+            self.transport.close()
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        try:
+            await super()._main()
+        except asyncio.CancelledError:
+            self.logger.debug('uRTPS loop cancelled.')
+
     def _start_async_main_in_thread(self):
         """
         Starts the uRTPS in a new thread.
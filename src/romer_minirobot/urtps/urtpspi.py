@@ -1,4 +1,3 @@
-import network
 import utime
 from . import CONN_TIMEOUT, BaseRTPS
 
@@ -46,6 +45,10 @@ class uRTPSPi(BaseRTPS):
             None
 
         """
+        # Imported here, so the unix port imports uRTPSPi without a network module before
+        # `bench.install` provides one.
+        import network
+
         wlan = network.WLAN(network.STA_IF)
         wlan.active(True)
         wlan.connect(ssid, password)
@@ -56,7 +59,7 @@ class uRTPSPi(BaseRTPS):
         start_time = utime.ticks_ms()
         while not wlan.isconnected():
             current_time = utime.ticks_ms()
-            if current_time - start_time > CONN_TIMEOUT * 1000:
+            if utime.ticks_diff(current_time, start_time) > CONN_TIMEOUT * 1000:
                 self.logger.error("Wifi Connection timed out.")
                 self.logger.error('Quitting.')                
                 return None
@@ -1,2 +1,4 @@
 from .logging import Logger
-from .which_device import is_running_on_pico
\ No newline at end of file
+from .which_device import is_running_on_pico, has_pico_hal
+from .clock import now_us, ticks_ms, ticks_us, ticks_add, ticks_diff, set_time_source
+from .emitters import micropython
\ No newline at end of file
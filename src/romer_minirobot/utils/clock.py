@@ -0,0 +1,122 @@
+from .which_device import is_running_on_pico
+
+TICKS_PERIOD = 1 << 30
+
+if is_running_on_pico():
+    from utime import ticks_ms, ticks_us, ticks_add, ticks_diff
+
+    _last_ticks = ticks_us()
+    _elapsed_us = 0
+
+    def now_us():
+        """
+        Returns a monotonic time in microseconds that does not wrap around.
+
+        `utime.ticks_us` wraps around after about 18 minutes, so the elapsed ticks are
+        accumulated on every call. The uRTPS loops call it far more often than that.
+
+        Returns:
+            int: The time in microseconds since the module was imported.
+        """
+        global _last_ticks, _elapsed_us
+        ticks = ticks_us()
+        _elapsed_us += ticks_diff(ticks, _last_ticks)
+        _last_ticks = ticks
+        return _elapsed_us
+
+    def set_time_source(source=None):
+        """
+        Keeps the clock of the Pico, which is always its hardware timer.
+
+        Code shared with simulations may call it with None, which restores the default
+        clock and so does nothing here.
+
+        Args:
+            source (callable, optional): Must be None on the Pico.
+
+        Raises:
+            ValueError: If a source is given.
+        """
+        if source is not None:
+            raise ValueError('The clock of the Pico cannot be replaced')
+else:
+    from time import time
+
+    _TICKS_MAX = TICKS_PERIOD - 1
+    _TICKS_HALF = TICKS_PERIOD // 2
+
+    def _wall_us():
+        return int(time() * 1000000)
+
+    _source = _wall_us
+
+    def set_time_source(source=None):
+        """
+        Replaces the clock read by `now_us` and the ticks functions.
+
+        Nodes and uRTPS loops read the time only through this module, so a simulation
+        can run them on virtual time.
+
+        Args:
+            source (callable, optional): Returns the current time in microseconds. None
+                restores the wall clock.
+        """
+        global _source
+        _source = source or _wall_us
+
+    def now_us():
+        """
+        Returns the current time in microseconds.
+
+        Returns:
+            int: The time of the clock source, by default the wall-clock time in
+                microseconds since the epoch.
+        """
+        return _source()
+
+    def ticks_us():
+        """
+        Returns a microsecond counter that wraps around like `utime.ticks_us`.
+
+        Returns:
+            int: The time in microseconds modulo `TICKS_PERIOD`.
+        """
+        return _source() & _TICKS_MAX
+
+    def ticks_ms():
+        """
+        Returns a millisecond counter that wraps around like `utime.ticks_ms`.
+
+        Returns:
+            int: The time in milliseconds modulo `TICKS_PERIOD`.
+        """
+        return (_source() // 1000) & _TICKS_MAX
+
+    def ticks_add(ticks, delta):
+        """
+        Offsets a ticks value, wrapping around like `utime.ticks_add`.
+
+        Args:
+            ticks (int): A value returned by `ticks_ms` or `ticks_us`.
+            delta (int): The offset, may be negative.
+
+        Returns:
+            int: The offset ticks value.
+        """
+        return (ticks + delta) & _TICKS_MAX
+
+    def ticks_diff(ticks1, ticks2):
+        """
+        Returns the signed difference of two ticks values, like `utime.ticks_diff`.
+
+        The result is correct across a wrap around as long as the two values are less
+        than half a period apart.
+
+        Args:
+            ticks1 (int): The later ticks value.
+            ticks2 (int): The earlier ticks value.
+
+        Returns:
+            int: ticks1 - ticks2, in the range [-TICKS_PERIOD / 2, TICKS_PERIOD / 2).
+        """
+        return ((ticks1 - ticks2 + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
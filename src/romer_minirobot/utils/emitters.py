@@ -0,0 +1,36 @@
+try:
+    import micropython
+except ImportError:
+    class micropython:
+        """
+        Stands in for the `micropython` module on CPython.
+
+        The MicroPython compiler recognizes `@micropython.native` and `@micropython.viper`
+        from the decorator as written and compiles the function to machine code. Hot
+        functions shared with the PC import `micropython` from here, so the same source
+        runs on CPython, where the decorators return the function unchanged and
+        `schedule` calls the function at once.
+
+        Example:
+            from ..utils import micropython
+
+            @micropython.native
+            def motor_write(self, duty_cycle, direction):
+                ...
+        """
+
+        @staticmethod
+        def const(value):
+            return value
+
+        @staticmethod
+        def native(func):
+            return func
+
+        @staticmethod
+        def viper(func):
+            return func
+
+        @staticmethod
+        def schedule(func, arg):
+            func(arg)
@@ -20,4 +20,19 @@ def is_running_on_windows():
     """
     if 'win32' in sys.platform:
         return True
-    return False
\ No newline at end of file
+    return False
+
+def has_pico_hal():
+    """
+    Check if the Pico hardware modules (machine, utime, ...) can be imported.
+
+    This is the case on a Pico board, and on a host where the emulated modules of
+    `romer_minirobot.sim.hal` are installed.
+
+    Returns:
+        bool: True if the Pico hardware modules are available, False otherwise.
+    """
+    if is_running_on_pico():
+        return True
+    machine = sys.modules.get('machine')
+    return getattr(machine, 'EMULATED', False)